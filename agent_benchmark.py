@@ -0,0 +1,193 @@
+import time
+import uuid
+import argparse
+import contextvars
+from collections import defaultdict
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from campaign_store import get_connection
+from llm_runtime import estimate_tokens
+
+
+SAMPLE_PRODUCT = "AI-powered fitness tracker with personalized coaching"
+SAMPLE_GOAL = "Launch product and acquire 50,000 users in 6 months"
+
+# Agent name -> (test function name in agents.py, sample arguments)
+AGENT_TESTS = {
+    "research": ("test_research_agent", (SAMPLE_PRODUCT, SAMPLE_GOAL)),
+    "content": ("test_content_agent", (SAMPLE_PRODUCT, "Tech-savvy fitness enthusiasts")),
+    "channel": ("test_channel_agent", (SAMPLE_PRODUCT, "Medium", SAMPLE_GOAL)),
+    "schedule": ("test_schedule_agent", ("Google Ads, Meta, LinkedIn", "6 weeks"))
+}
+
+# A window's p95 this much above the baseline's is flagged as a regression
+REGRESSION_RATIO = 1.25
+
+
+def agent_model(name):
+    """Model behind an agent (agents are module globals set by initialize_agents)"""
+    import agents
+
+    agent = getattr(agents, f"{name}_agent", None)
+    llm = getattr(agent, "llm", None)
+    return llm if isinstance(llm, str) else getattr(llm, "model", type(llm).__name__ if llm else None)
+
+
+def token_counts(result):
+    """(prompt, completion) tokens from a CrewOutput's usage metrics, estimated if absent"""
+    usage = getattr(result, "token_usage", None)
+    prompt = getattr(usage, "prompt_tokens", 0) or 0
+    completion = getattr(usage, "completion_tokens", 0) or 0
+    if not (prompt or completion):
+        completion = estimate_tokens(str(result))
+    return int(prompt), int(completion)
+
+
+def run_agent_test(name, args=None):
+    """Run one agent's test with its sample inputs; returns a timing row plus the output"""
+    import agents
+    from campaign_assistant import setup_llm
+
+    func_name, sample_args = AGENT_TESTS[name]
+    started = time.perf_counter()
+    row = {"agent": name, "model": None, "ok": True, "error": None, "output": ""}
+    try:
+        setup_llm()
+        row["model"] = agent_model(name)
+        result = getattr(agents, func_name)(*(args or sample_args))
+        row["prompt_tokens"], row["completion_tokens"] = token_counts(result)
+        row["output"] = str(result)
+    except Exception as e:
+        row.update(ok=False, error=str(e)[:500], prompt_tokens=0, completion_tokens=0)
+    row["latency_s"] = time.perf_counter() - started
+    row["total_tokens"] = row["prompt_tokens"] + row["completion_tokens"]
+    return row
+
+
+def run_benchmark(names=None, inputs=None):
+    """
+    Run the single-agent tests concurrently and record each run in the campaign store.
+    Each test runs in a copy of the caller's context, so it is scheduled under the caller's
+    tenant and priority. Returns the rows in AGENT_TESTS order.
+    """
+    names = list(names or AGENT_TESTS)
+    inputs = inputs or {}
+    run_id = uuid.uuid4().hex[:12]
+    with ThreadPoolExecutor(max_workers=len(names)) as pool:
+        futures = [
+            pool.submit(contextvars.copy_context().run, run_agent_test, name, inputs.get(name))
+            for name in names
+        ]
+        rows = [f.result() for f in futures]
+    record_runs(run_id, rows)
+    return rows
+
+
+def record_runs(run_id, rows, now=None):
+    now = now or time.time()
+    conn = get_connection()
+    try:
+        conn.executemany(
+            "INSERT INTO agent_benchmarks (ts, run_id, agent, model, latency_s, prompt_tokens, "
+            "completion_tokens, ok, error) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (now, run_id, r["agent"], r["model"], r["latency_s"], r["prompt_tokens"],
+                 r["completion_tokens"], int(r["ok"]), r["error"])
+                for r in rows
+            ]
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _load_runs(since, until=None):
+    conn = get_connection()
+    try:
+        return conn.execute(
+            "SELECT ts, agent, COALESCE(model, '-') AS model, latency_s, prompt_tokens + completion_tokens AS tokens "
+            "FROM agent_benchmarks "
+            "WHERE ok = 1 AND ts >= ? AND ts < ? ORDER BY ts",
+            (since, until or time.time() + 1)
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+def _percentiles(latencies, tokens):
+    import numpy as np
+
+    latencies = np.asarray(latencies)
+    return {
+        "runs": len(latencies),
+        "p50_s": round(float(np.percentile(latencies, 50)), 2),
+        "p95_s": round(float(np.percentile(latencies, 95)), 2),
+        "avg_tokens": int(np.mean(tokens))
+    }
+
+
+def latency_history(days=30, now=None):
+    """Daily p50/p95 latency per agent and model over the last days (successful runs only)"""
+    now = now or time.time()
+    groups = defaultdict(lambda: ([], []))
+    for row in _load_runs(now - days * 86400):
+        day = datetime.fromtimestamp(row["ts"]).strftime("%Y-%m-%d")
+        latencies, tokens = groups[(day, row["agent"], row["model"])]
+        latencies.append(row["latency_s"])
+        tokens.append(row["tokens"])
+    return [
+        {"day": day, "agent": agent, "model": model, **_percentiles(*groups[(day, agent, model)])}
+        for day, agent, model in sorted(groups)
+    ]
+
+
+def regressions(window_h=24, baseline_days=7, now=None):
+    """
+    p95 of the last window_h hours vs the preceding baseline_days, per agent and model.
+    A model with no baseline (e.g. just switched to) is reported with ratio None.
+    """
+    now = now or time.time()
+    start = now - window_h * 3600
+    baseline, recent = defaultdict(lambda: ([], [])), defaultdict(lambda: ([], []))
+    for row in _load_runs(start - baseline_days * 86400, now + 1):
+        bucket = recent if row["ts"] >= start else baseline
+        latencies, tokens = bucket[(row["agent"], row["model"])]
+        latencies.append(row["latency_s"])
+        tokens.append(row["tokens"])
+
+    report = []
+    for agent, model in sorted(recent):
+        current = _percentiles(*recent[(agent, model)])
+        before = _percentiles(*baseline[(agent, model)]) if (agent, model) in baseline else None
+        ratio = round(current["p95_s"] / before["p95_s"], 2) if before and before["p95_s"] else None
+        report.append({
+            "agent": agent,
+            "model": model,
+            "p95_s": current["p95_s"],
+            "baseline_p95_s": before["p95_s"] if before else None,
+            "ratio": ratio,
+            "regressed": bool(ratio and ratio >= REGRESSION_RATIO)
+        })
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the four agents concurrently with sample data")
+    parser.add_argument("--runs", type=int, default=1, help="Benchmark rounds to run")
+    parser.add_argument("--report", action="store_true", help="Only print history and regressions")
+    args = parser.parse_args()
+
+    if not args.report:
+        for _ in range(args.runs):
+            for row in run_benchmark():
+                status = "✅" if row["ok"] else f"❌ {row['error'][:60]}"
+                print(f"{row['agent']:<10} {row['model'] or '-':<28} {row['latency_s']:6.2f}s "
+                      f"{row['total_tokens']:>6} tokens {status}")
+
+    for row in latency_history(days=7):
+        print(f"📈 {row['day']} {row['agent']:<10} {row['model'] or '-':<28} "
+              f"p50 {row['p50_s']}s p95 {row['p95_s']}s ({row['runs']} runs)")
+    for row in regressions():
+        if row["regressed"]:
+            print(f"⚠️ {row['agent']} on {row['model']}: p95 {row['p95_s']}s vs {row['baseline_p95_s']}s baseline")
@@ -1,6 +1,13 @@
 
-from crewai import Agent, Task, Crew
+from crewai import Agent, Task
 import os
+from page_extraction import fetch_page_text, resolve_max_bytes
+from cassettes import wrap_tool
+from crew_executor import run_task
+from llm_runtime import current_run
+from context_cache import PREFIX_BOUNDARY
+from budget_optimizer import format_allocation
+from schedule_solver import format_schedule
 
 
 try:
@@ -9,6 +16,30 @@ try:
 except ImportError:
     has_research_tools = False
 
+# Running totals for scraped pages (bytes fetched vs bytes handed to the agent)
+scrape_stats = {"pages": 0, "bytes_in": 0, "bytes_out": 0, "truncated": 0}
+
+if has_research_tools:
+    class CappedScrapeWebsiteTool(ScrapeWebsiteTool):
+        """ScrapeWebsiteTool that streams the page and keeps only capped, boilerplate-free text"""
+        max_bytes: int = resolve_max_bytes()
+
+        def _run(self, **kwargs):
+            website_url = kwargs.get("website_url", self.website_url)
+            text, stats = fetch_page_text(
+                website_url,
+                headers=self.headers,
+                cookies=self.cookies,
+                timeout=current_run().time_left(15),
+                max_bytes=self.max_bytes
+            )
+            scrape_stats["pages"] += 1
+            scrape_stats["bytes_in"] += stats["bytes_in"]
+            scrape_stats["bytes_out"] += stats["bytes_out"]
+            scrape_stats["truncated"] += int(stats["truncated"])
+            print(f"🧹 Scraped {website_url}: {stats['bytes_in']} bytes in, {stats['bytes_out']} bytes out")
+            return text
+
 # Global agent variables
 research_agent = None
 content_agent = None
@@ -24,7 +55,7 @@ def initialize_agents(llm):
     serper_api_key = os.getenv("SERPER_API_KEY")
     
     if has_research_tools and serper_api_key:
-        research_tools = [SerperDevTool(), WebsiteSearchTool(), ScrapeWebsiteTool()]
+        research_tools = [wrap_tool(t) for t in (SerperDevTool(), WebsiteSearchTool(), CappedScrapeWebsiteTool())]
         print("🔍 Enhanced research agent with live tools")
     
     # Create agents directly
@@ -68,14 +99,70 @@ def initialize_agents(llm):
         verbose=False
     )
 
-def create_tasks(product_description, marketing_goal, budget_range, campaign_duration):
-    """Simple task creation"""
+def format_brief(product_description, marketing_goal=None, research=None):
+    """
+    Campaign brief that opens every task description, byte-identical across the crews,
+    so agent persona + brief form a stable, cacheable prompt prefix
+    """
+    lines = ["Campaign brief:", f"Product: {product_description}"]
+    if marketing_goal:
+        lines.append(f"Marketing Goal: {marketing_goal}")
+    if research:
+        lines.append(f"Market research:\n{research}")
+    return "\n".join(lines) + PREFIX_BOUNDARY
+
+def create_tasks(product_description, marketing_goal, budget_range, campaign_duration, budget_allocation=None,
+                 posting_schedule=None, market=None, research=None):
+    """
+    Simple task creation; the shared brief comes first and stage instructions after it.
+    With budget_allocation (budget_optimizer.optimize_allocation) the channel agent
+    explains that split instead of inventing one; likewise the schedule agent reviews
+    posting_schedule (schedule_solver.solve_schedule) instead of writing a schedule.
+    market localises every task to one region or market cluster; research (shared
+    across a multi-geo campaign's regions) goes into the brief, so it stays in the prefix.
+    """
+    
+    brief = format_brief(product_description, marketing_goal, research)
+    market_note = ""
+    if market:
+        market_note = (f"\n        Target market: {market}. Localise for it: language, cultural references, "
+                       f"local platforms, regulations and pricing.")
+    
+    if budget_allocation:
+        channel_instructions = f"""The budget split below was computed by our allocation optimizer from channel
+        response curves. Use it as given and explain it; do not propose a different split.
+        {format_allocation(budget_allocation)}
+        
+        Provide:
+        - Why each funded channel fits this product and goal
+        - Platform-specific strategies
+        - What to watch to rebalance mid-campaign"""
+    else:
+        channel_instructions = """Provide:
+        - Top 5 recommended channels
+        - Budget allocation suggestions
+        - Platform-specific strategies"""
+    
+    if posting_schedule:
+        schedule_instructions = f"""Our schedule solver produced the posting calendar below from channel frequency caps,
+        audience activity per timezone and campaign phases. Review it; do not rewrite the timings.
+        {format_schedule(posting_schedule)}
+        
+        Provide:
+        - Content themes for each phase
+        - Timing risks or adjustments worth A/B testing
+        - Performance milestones"""
+    else:
+        schedule_instructions = """Provide:
+        - Weekly posting frequency
+        - Best days and times
+        - Content calendar structure
+        - Performance milestones"""
     
     # Research task
     research_task = Task(
-        description=f"""
-        Analyze the market for: {product_description}
-        Marketing Goal: {marketing_goal}
+        description=f"""{brief}{market_note}
+        Analyze the market for the product above.
         
         Provide:
         - Target audience analysis
@@ -91,8 +178,8 @@ def create_tasks(product_description, marketing_goal, budget_range, campaign_dur
     
     # Content task
     content_task = Task(
-        description=f"""
-        Create marketing content for: {product_description}
+        description=f"""{brief}{market_note}
+        Create marketing content for the product above.
         
         Generate:
         1. 3 compelling headlines
@@ -108,16 +195,12 @@ def create_tasks(product_description, marketing_goal, budget_range, campaign_dur
     
     # Channel task  
     channel_task = Task(
-        description=f"""
-        Recommend marketing channels for: {product_description}
+        description=f"""{brief}{market_note}
+        Recommend marketing channels for the product above.
         Budget: {budget_range}
-        Goal: {marketing_goal}
         Duration: {campaign_duration}
         
-        Provide:
-        - Top 5 recommended channels
-        - Budget allocation suggestions
-        - Platform-specific strategies
+        {channel_instructions}
         
         Focus on ROI and effectiveness.
         """,
@@ -127,15 +210,10 @@ def create_tasks(product_description, marketing_goal, budget_range, campaign_dur
     
     # Schedule task
     schedule_task = Task(
-        description=f"""
-        Create posting schedule for: {campaign_duration} campaign
-        Goal: {marketing_goal}
+        description=f"""{brief}{market_note}
+        Create posting schedule for a {campaign_duration} campaign.
         
-        Provide:
-        - Weekly posting frequency
-        - Best days and times
-        - Content calendar structure
-        - Performance milestones
+        {schedule_instructions}
         
         Optimize for maximum engagement.
         """,
@@ -145,10 +223,64 @@ def create_tasks(product_description, marketing_goal, budget_range, campaign_dur
     
     return research_task, content_task, channel_task, schedule_task
 
+def create_variant_task(product_description, count, avoid_headlines=None, audience_info=""):
+    """Task asking the content agent for one batch of A/B ad variants"""
+    
+    avoid_text = ""
+    if avoid_headlines:
+        avoid_text = "Do NOT reuse these existing angles:\n" + "\n".join(f"- {h}" for h in avoid_headlines)
+    
+    return Task(
+        description=f"""{format_brief(product_description)}
+        Create {count} distinct A/B test ad variants for the product above.
+        Audience: {audience_info or "General"}
+        
+        Each variant must use a different angle, hook or framework (AIDA, PAS, Before-After-Bridge, social proof, urgency...).
+        {avoid_text}
+        
+        Format exactly one variant per line:
+        1. <headline> || <ad copy, 25-50 words>
+        """,
+        agent=content_agent,
+        expected_output=f"{count} numbered ad variants, one per line, formatted as headline || ad copy."
+    )
+
+def create_platform_task(product_description, marketing_goal, platform, spec, count, fix=None):
+    """
+    Task asking the content agent for count ad variants in one platform's format (see
+    platform_content.PLATFORM_SPECS). fix lists (variant, problems) pairs to be replaced.
+    """
+    
+    fields = " || ".join(f"<{name.replace('_', ' ')}, max {limit} chars>" for name, limit in spec["fields"])
+    rules = "\n".join(f"- {rule}" for rule in spec.get("notes", []))
+    fix_text = ""
+    if fix:
+        fix_text = "These variants failed our checks; write replacements that fix the problems:\n" + "\n".join(
+            f"- {' || '.join(variant.values())} ({'; '.join(problems)})" for variant, problems in fix
+        )
+    
+    return Task(
+        description=f"""{format_brief(product_description, marketing_goal)}
+        Write {count} {platform} {spec['format']} variants for the product above.
+        Character limits are hard limits: count characters and stay under them.
+        {rules}
+        {fix_text}
+        
+        Format exactly one variant per line:
+        1. {fields}
+        """,
+        agent=content_agent,
+        expected_output=f"{count} numbered {platform} variants, one per line, fields separated by ||."
+    )
+
 def get_agents():
     """Return all agents"""
     return research_agent, content_agent, channel_agent, schedule_agent
 
+def get_scrape_stats():
+    """Return scrape extraction totals"""
+    return dict(scrape_stats)
+
 
 
 """The below code is for Frontend Feature"""
@@ -161,8 +293,7 @@ def test_research_agent(product_description, marketing_goal):
         agent=research_agent,
         expected_output="Market research analysis."
     )
-    crew = Crew(agents=[research_agent], tasks=[task], verbose=True)
-    return crew.kickoff()
+    return run_task(research_agent, task)
 
 def test_content_agent(product_description, audience_info=""):
     """Test content agent"""
@@ -171,8 +302,7 @@ def test_content_agent(product_description, audience_info=""):
         agent=content_agent,
         expected_output="Content variations."
     )
-    crew = Crew(agents=[content_agent], tasks=[task], verbose=True)
-    return crew.kickoff()
+    return run_task(content_agent, task)
 
 def test_channel_agent(product_description, budget_range, marketing_goal):
     """Test channel agent"""
@@ -181,8 +311,7 @@ def test_channel_agent(product_description, budget_range, marketing_goal):
         agent=channel_agent,
         expected_output="Channel recommendations."
     )
-    crew = Crew(agents=[channel_agent], tasks=[task], verbose=True)
-    return crew.kickoff()
+    return run_task(channel_agent, task)
 
 def test_schedule_agent(selected_channels, campaign_duration):
     """Test schedule agent"""
@@ -191,5 +320,4 @@ def test_schedule_agent(selected_channels, campaign_duration):
         agent=schedule_agent,
         expected_output="Posting schedule."
     )
-    crew = Crew(agents=[schedule_agent], tasks=[task], verbose=True)
-    return crew.kickoff()
\ No newline at end of file
+    return run_task(schedule_agent, task)
\ No newline at end of file
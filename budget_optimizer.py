@@ -0,0 +1,137 @@
+import math
+import importlib.util
+
+import numpy as np
+
+# scipy.optimize is slow to import, so brentq is only imported on the first optimisation
+has_scipy = importlib.util.find_spec("scipy") is not None
+
+
+# Midpoint spend per budget tier (render_campaign_builder's "Investment Level"); the CLI, the
+# channel agent test and generate_campaign_plan's default use Low/Medium/High for the same tiers
+BUDGET_TIERS = {
+    "startup": 3000,
+    "smb": 15000,
+    "enterprise": 50000,
+    "low": 3000,
+    "medium": 15000,
+    "high": 50000
+}
+
+# Reach response curves: reach(spend) = saturation * (1 - exp(-spend / scale))
+# saturation is the reach the channel tops out at, scale the spend where ~63% of it is reached
+CHANNEL_CURVES = {
+    "Google Ads": {"saturation": 60000, "scale": 6000, "paid": True},
+    "Meta": {"saturation": 70000, "scale": 5000, "paid": True},
+    "LinkedIn": {"saturation": 25000, "scale": 8000, "paid": True},
+    "YouTube": {"saturation": 80000, "scale": 12000, "paid": True},
+    "Email": {"saturation": 15000, "scale": 1500, "paid": False}
+}
+
+# Channel effectiveness by industry (multiplies saturation; unlisted channels are 1.0)
+INDUSTRY_FACTORS = {
+    "Technology": {"LinkedIn": 1.3, "Google Ads": 1.1},
+    "Healthcare": {"Google Ads": 1.2, "Meta": 0.9},
+    "Finance": {"LinkedIn": 1.4, "Google Ads": 1.2, "Meta": 0.8},
+    "E-commerce": {"Meta": 1.3, "Google Ads": 1.2, "YouTube": 1.1, "LinkedIn": 0.5},
+    "Education": {"YouTube": 1.3, "Meta": 1.1}
+}
+
+# Each competition level above 3 makes paid reach 15% more expensive (and below 3, cheaper)
+COMPETITION_COST_STEP = 0.15
+
+
+def resolve_budget(budget_range):
+    """Spend for a budget tier name ("SMB", "Startup ($1K-5K)", "Medium") or a plain number"""
+    text = str(budget_range or "").strip()
+    try:
+        return float(text.replace("$", "").replace(",", ""))
+    except ValueError:
+        pass
+    tier = text.split()[0].lower() if text else "smb"
+    if tier not in BUDGET_TIERS:
+        print(f"⚠️ Unknown budget tier {text!r}: using SMB (${BUDGET_TIERS['smb']:,}); "
+              f"use Startup/SMB/Enterprise, Low/Medium/High or an amount")
+        tier = "smb"
+    return float(BUDGET_TIERS[tier])
+
+
+def channel_curves(industry="Other", competition_level=3):
+    """(names, saturation, scale) arrays adjusted for industry and competition"""
+    factors = INDUSTRY_FACTORS.get(industry, {})
+    cost = 1 + COMPETITION_COST_STEP * (int(competition_level or 3) - 3)
+    names = list(CHANNEL_CURVES)
+    saturation = np.array([CHANNEL_CURVES[n]["saturation"] * factors.get(n, 1.0) for n in names])
+    scale = np.array([CHANNEL_CURVES[n]["scale"] * (cost if CHANNEL_CURVES[n]["paid"] else 1.0) for n in names])
+    return names, saturation, scale
+
+
+def _spend_at(marginal, saturation, scale):
+    """Spend per channel at which each channel's marginal reach per dollar equals marginal"""
+    return np.maximum(0.0, scale * np.log(saturation / (scale * marginal)))
+
+
+def optimize_allocation(budget_range, industry="Other", competition_level=3):
+    """
+    Reach-maximising split of the budget across channels.
+    With concave curves the optimum equalises marginal reach per dollar across funded
+    channels, so we solve for that marginal value (one root find) instead of searching.
+    """
+    budget = resolve_budget(budget_range)
+    names, saturation, scale = channel_curves(industry, competition_level)
+
+    def excess(log_marginal):
+        return _spend_at(math.exp(log_marginal), saturation, scale).sum() - budget
+
+    # At the highest initial marginal nothing is funded; at the low bound everything is
+    hi = math.log((saturation / scale).max())
+    lo = hi - 50
+    if has_scipy:
+        from scipy.optimize import brentq
+
+        log_marginal = brentq(excess, lo, hi, xtol=1e-10)
+    else:
+        for _ in range(100):
+            mid = (lo + hi) / 2
+            if excess(mid) > 0:
+                lo = mid
+            else:
+                hi = mid
+        log_marginal = (lo + hi) / 2
+
+    spend = _spend_at(math.exp(log_marginal), saturation, scale)
+    spend *= budget / spend.sum()
+    reach = saturation * (1 - np.exp(-spend / scale))
+
+    channels = [
+        {
+            "channel": name,
+            "spend": round(float(s), 2),
+            "share_pct": round(float(s / budget * 100), 1),
+            "expected_reach": int(r)
+        }
+        for name, s, r in zip(names, spend, reach)
+    ]
+    channels.sort(key=lambda c: c["spend"], reverse=True)
+    return {
+        "budget": budget,
+        "industry": industry,
+        "competition_level": int(competition_level or 3),
+        "channels": channels,
+        "expected_reach": int(reach.sum())
+    }
+
+
+def funded_channels(allocation):
+    """Channels that received budget, largest first"""
+    return [c["channel"] for c in allocation["channels"] if c["spend"] >= 1]
+
+
+def format_allocation(allocation):
+    """Allocation as lines for the channel agent's prompt"""
+    lines = [f"Total budget: ${allocation['budget']:,.0f}"]
+    for c in allocation["channels"]:
+        if c["spend"] >= 1:
+            lines.append(f"- {c['channel']}: ${c['spend']:,.0f} ({c['share_pct']}%), "
+                         f"expected reach {c['expected_reach']:,}")
+    return "\n".join(lines)
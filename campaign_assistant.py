@@ -1,149 +1,394 @@
-
 import os
+import copy
 import json
+import threading
 from datetime import datetime
-from crewai import Agent, Task, Crew
-from agents import initialize_agents, create_tasks, get_agents
-from agents import test_research_agent, test_content_agent, test_channel_agent, test_schedule_agent
-from crewai import LLM
+from cassettes import cassette, is_replay, is_record
+from campaign_store import save_campaign
+from llm_runtime import install_llm_hooks, run_context, current_run, Deadline, DeadlineExceeded, estimate_tokens
+from output_caps import controller as output_caps
+from stage_cache import get_cached, put_cached
+from crew_executor import run_task
+from token_budget import Budget, BudgetExceeded
 
+# CrewAI/LiteLLM (and numpy via the planners) are imported on first use, so the CLI menu
+# and the web UI's first render don't wait on them; see setup_llm()
 
-api_key = os.getenv("GEMINI_API_KEY")
-if not api_key:
-    raise ValueError("❌ GEMINI_API_KEY environment variable is required!")
 
+model_options = ["gemini/gemini-1.5-flash", "gemini/gemini-pro", "gemini/gemini-1.5-pro"]
 
-serper_api_key = os.getenv("SERPER_API_KEY")
-if serper_api_key:
-    print("🔍 SerperDev API key found - enhanced market research enabled!")
-else:
-    print("💡 Set SERPER_API_KEY for live market research with real Google search")
+llm = None
+_setup_lock = threading.Lock()
 
 
-os.environ["GOOGLE_API_KEY"] = api_key
-os.environ["LITELLM_REQUEST_TIMEOUT"] = "120"
-os.environ["LITELLM_DROP_PARAMS"] = "true"
+def _configure_llm():
+    from crewai import LLM
+    from agents import initialize_agents
 
-model_options = ["gemini/gemini-1.5-flash", "gemini/gemini-pro", "gemini/gemini-1.5-pro"]
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key and not is_replay():
+        raise ValueError("❌ GEMINI_API_KEY environment variable is required!")
 
-print("🔄 Setting up Gemini models...")
-llm = None
+    if is_replay():
+        print(f"📼 Replaying LLM and tool calls from {cassette.path}")
+    elif is_record():
+        print(f"🔴 Recording LLM and tool calls to {cassette.path}")
 
+    serper_api_key = os.getenv("SERPER_API_KEY")
+    if serper_api_key:
+        print("🔍 SerperDev API key found - enhanced market research enabled!")
+    else:
+        print("💡 Set SERPER_API_KEY for live market research with real Google search")
 
-try:
-    print("🔄 Trying simple configuration...")
-    llm = LLM(model="gemini/gemini-1.5-flash")
-    print("✅ Successfully configured gemini-1.5-flash (simple config)")
-except Exception as e:
-    print(f"⚠️ Simple config failed: {str(e)[:100]}...")
-    
-    # Try with explicit parameters
-    for model in model_options:
+    os.environ["GOOGLE_API_KEY"] = api_key or "replay"
+    os.environ["LITELLM_REQUEST_TIMEOUT"] = "120"
+    os.environ["LITELLM_DROP_PARAMS"] = "true"
+
+    print("🔄 Setting up Gemini models...")
+    configured = None
+
+    # Optional OpenAI-compatible endpoint (e.g. fake_llm_server.py for load tests)
+    llm_base_url = os.getenv("CAMPAIGN_LLM_BASE_URL")
+
+    if llm_base_url:
+        llm_model = os.getenv("CAMPAIGN_LLM_MODEL", "openai/fake-model")
+        configured = LLM(model=llm_model, base_url=llm_base_url, api_key="local")
+        print(f"✅ Using local LLM endpoint {llm_base_url} ({llm_model})")
+    else:
         try:
-            print(f"🔄 Trying {model} with explicit params...")
-            llm = LLM(model=model, temperature=0.7)
-            print(f"✅ Successfully configured {model}")
-            break
+            print("🔄 Trying simple configuration...")
+            configured = LLM(model="gemini/gemini-1.5-flash")
+            print("✅ Successfully configured gemini-1.5-flash (simple config)")
         except Exception as e:
-            print(f"⚠️ {model} failed: {str(e)[:100]}...")
-            continue
+            print(f"⚠️ Simple config failed: {str(e)[:100]}...")
+            
+            # Try with explicit parameters
+            for model in model_options:
+                try:
+                    print(f"🔄 Trying {model} with explicit params...")
+                    configured = LLM(model=model, temperature=0.7)
+                    print(f"✅ Successfully configured {model}")
+                    break
+                except Exception as e:
+                    print(f"⚠️ {model} failed: {str(e)[:100]}...")
+                    continue
+
+    # Final fallback
+    if configured is None:
+        print("⚠️ Using string fallback...")
+        configured = "gemini/gemini-1.5-flash"
+
+    # Route all agent LLM calls through the shared fair scheduler
+    configured = install_llm_hooks(configured)
+
+    # Initialize agents
+    initialize_agents(configured)
+    return configured
+
+
+def setup_llm():
+    """Configure the LLM and initialize the agents on first call (raises if no API key is set)"""
+    global llm
+    if llm is None:
+        with _setup_lock:
+            if llm is None:
+                llm = _configure_llm()
+    return llm
+
+# Rough seconds a stage needs for a full / shortened answer when a deadline is set
+STAGE_TIME_ESTIMATES = {
+    "research": (15, 5),
+    "content": (12, 5),
+    "channel": (10, 4),
+    "schedule": (8, 3)
+}
+SHORT_OUTPUT_NOTE = "\n\nTime is short: answer in under 80 words, bullet points only."
+
+# Default per-campaign deadline in seconds (0 = no deadline)
+DEFAULT_DEADLINE_S = float(os.getenv("CAMPAIGN_DEADLINE_S", "0"))
 
-# Final fallback
-if llm is None:
-    print("⚠️ Using string fallback...")
-    llm = "gemini/gemini-1.5-flash"
+def degrade_stage(stage, mode, brief, degraded_stages):
+    """Fallback output for a stage that ran out of time: a (possibly stale) cached answer, the template or a note"""
+    fallback = get_cached(stage, brief, allow_stale=True)
+    template = brief.get("templates", {}).get(stage)
+    if fallback is not None:
+        mode = mode + "+cached"
+    elif template is not None:
+        # Keep the draft plan's template section
+        fallback = template
+        mode = mode + "+template"
+    else:
+        fallback = f"⏱️ {stage.title()} analysis skipped: the campaign time limit was reached."
+    print(f"⏱️ {stage} degraded ({mode})")
+    if degraded_stages is not None:
+        degraded_stages.append({"stage": stage, "mode": mode})
+    return fallback
+
+def run_stage(stage, agent, task, brief, use_cache=True, cached_stages=None, cache_source="live",
+              degraded_stages=None, output_stats=None):
+    """
+    Run one agent task, serving and filling the stage cache
+    degraded_stages and output_stats, when given, collect degraded stages and output token usage
+    """
+    run = current_run()
+    run.check_cancelled()
+    
+    # A used-up budget stops the remaining stages; the plan keeps their template sections
+    if run.budget is not None and run.budget.exceeded:
+        return degrade_stage(stage, "budget", brief, degraded_stages)
+    
+    if use_cache:
+        cached = get_cached(stage, brief)
+        if cached is not None:
+            print(f"⚡ Using cached {stage} output")
+            if cached_stages is not None:
+                cached_stages.append(stage)
+            return cached
+    
+    short = False
+    if run.deadline is not None:
+        full_s, short_s = STAGE_TIME_ESTIMATES.get(stage, (10, 4))
+        remaining = run.deadline.remaining()
+        if remaining < short_s:
+            return degrade_stage(stage, "skipped", brief, degraded_stages)
+        if remaining < full_s:
+            fallback = get_cached(stage, brief, allow_stale=True)
+            if fallback is not None:
+                return degrade_stage(stage, "stale", brief, degraded_stages)
+            short = True
+            task.description += SHORT_OUTPUT_NOTE
+            if degraded_stages is not None:
+                degraded_stages.append({"stage": stage, "mode": "short"})
+    
+    cap_hits = []
+    try:
+        with run_context(max_tokens=output_caps.cap_for(stage, short=short), cap_hits=cap_hits):
+            result = str(run_task(agent, task))
+    except Exception:
+        run.check_cancelled()
+        if run.budget is not None and run.budget.exceeded:
+            return degrade_stage(stage, "budget", brief, degraded_stages)
+        if run.deadline is None or not run.deadline.expired:
+            raise
+        return degrade_stage(stage, "timeout", brief, degraded_stages)
+    run.check_cancelled()
+    
+    # Shortened answers would drag the adaptive caps down, so only full ones are observed
+    output_tokens = estimate_tokens(result)
+    saved = 0 if short else output_caps.observe(stage, output_tokens, cap_hits=len(cap_hits))
+    if output_stats is not None:
+        output_stats[stage] = {"output_tokens": output_tokens, "tokens_saved": saved, "capped_calls": len(cap_hits)}
+    
+    if use_cache and not short:
+        put_cached(stage, brief, result, source=cache_source)
+    return result
+
+def run_platform_stage(product_description, marketing_goal, platforms, brief, use_cache, campaign_plan,
+                       degraded_stages=None):
+    """
+    Content stage as one generation per platform (platform_content); per-platform results
+    go into campaign_plan["platform_content"]. Degrades like run_stage on budget or timeout.
+    """
+    from platform_content import generate_platform_content, format_platform_content, summarize
+    
+    run = current_run()
+    run.check_cancelled()
+    if run.budget is not None and run.budget.exceeded:
+        return degrade_stage("content", "budget", brief, degraded_stages)
+    
+    try:
+        results = generate_platform_content(product_description, marketing_goal, platforms, use_cache=use_cache)
+    except Exception:
+        run.check_cancelled()
+        if run.budget is not None and run.budget.exceeded:
+            return degrade_stage("content", "budget", brief, degraded_stages)
+        if run.deadline is None or not run.deadline.expired:
+            raise
+        return degrade_stage("content", "timeout", brief, degraded_stages)
+    
+    campaign_plan["platform_content"] = results
+    campaign_plan["platform_content_stats"] = summarize(results)
+    return format_platform_content(results)
 
-# Initialize agents
-initialize_agents(llm)
+def finalize_plan(campaign_plan, output_stats, budget, variant_results=None):
+    """Mark the plan enriched (sections left as templates keep it a draft), attach stats and save it"""
+    from plan_templates import STAGE_SECTIONS
+    
+    if len(campaign_plan["enriched_sections"]) == len(STAGE_SECTIONS):
+        campaign_plan["status"] = "enriched"
+    campaign_plan["output_tokens"] = {
+        "per_stage": output_stats,
+        "total": sum(s["output_tokens"] for s in output_stats.values()),
+        "saved": sum(s["tokens_saved"] for s in output_stats.values())
+    }
+    
+    if budget.enabled:
+        campaign_plan["token_budget"] = budget.report()
+    
+    if variant_results:
+        campaign_plan["ad_variants"] = variant_results["variants"]
+        campaign_plan["ad_variant_stats"] = variant_results["stats"]
+    
+    # Keep a copy in the campaign store (history, exports, session offload)
+    try:
+        campaign_plan["campaign_id"] = save_campaign(campaign_plan)
+    except Exception as e:
+        print(f"⚠️ Could not save campaign to store: {str(e)[:100]}")
+    
+    print("✅ Campaign Plan Generated Successfully!")
+    return {
+        "success": True,
+        "campaign_plan": campaign_plan
+    }
 
 def generate_campaign_plan(product_description: str, marketing_goal: str, 
-                         budget_range: str = "Medium", campaign_duration: str = "4 weeks"):
+                         budget_range: str = "Medium", campaign_duration: str = "4 weeks",
+                         ad_variants: int = 0, use_cache: bool = True, cancel_token=None,
+                         deadline_s: float = None, industry: str = "Other", competition_level: int = 3,
+                         geo_target: str = "", on_update=None, multi_geo: bool = False,
+                         platform_content: bool = False):
     """
-    Generate complete campaign plan using CrewAI agents
-    This is the main function that orchestrates everything
+    Generate complete campaign plan using CrewAI agents, starting from a template draft
+    cancel_token (llm_runtime.CancellationToken) stops generation at the next stage or LLM call
+    deadline_s bounds the whole campaign (default CAMPAIGN_DEADLINE_S); late stages degrade
+    on_update(plan) is called with a copy of the plan each time a stage enriches a section
+    multi_geo plans each geo_target region separately; platform_content writes per-channel variants
     """
     
+    if deadline_s is None:
+        deadline_s = DEFAULT_DEADLINE_S
+    deadline = Deadline(deadline_s) if deadline_s and deadline_s > 0 else current_run().deadline
+    budget = Budget(current_run().tenant, models=model_options)
+    
     print("🚀 Starting AI Campaign Planning...")
     print("=" * 50)
     
     try:
-        # Step 1: Verify agents are initialized
-        print("🔍 Checking agent initialization...")
-        research_agent, content_agent, channel_agent, schedule_agent = get_agents()
-        
-        if not all([research_agent, content_agent, channel_agent, schedule_agent]):
-            raise ValueError("❌ One or more agents are not properly initialized. Please check your API configuration.")
-        
-        print("✅ All agents are properly initialized")
-        
-        # Step 2: Create all tasks
-        print("📋 Creating agent tasks...")
-        research_task, content_task, channel_task, schedule_task = create_tasks(
-            product_description, marketing_goal, budget_range, campaign_duration
-        )
-        
-        # Step 2: Execute all agents in sequence
-        print("🔍 Research agent analyzing market...")
-        research_crew = Crew(
-            agents=[research_agent],
-            tasks=[research_task],
-            verbose=True
-        )
-        research_results = research_crew.kickoff()
-        
-        print("✨ Content agent creating variations...")
-        content_crew = Crew(
-            agents=[content_agent],
-            tasks=[content_task],
-            verbose=True
-        )
-        content_results = content_crew.kickoff()
-        
-        print("📱 Channel agent selecting platforms...")
-        channel_crew = Crew(
-            agents=[channel_agent],
-            tasks=[channel_task],
-            verbose=True
-        )
-        channel_results = channel_crew.kickoff()
-        
-        print("📅 Schedule agent optimizing timing...")
-        schedule_crew = Crew(
-            agents=[schedule_agent],
-            tasks=[schedule_task],
-            verbose=True
-        )
-        schedule_results = schedule_crew.kickoff()
-        
-        # Step 6: Compile final campaign plan
-        campaign_plan = {
-            "campaign_overview": {
+        # Everything below shares this campaign's cancellation token and deadline
+        with run_context(cancel_token=cancel_token or current_run().cancel_token, deadline=deadline,
+                         budget=budget):
+            from agents import create_tasks, get_agents
+            from content_variants import generate_variants
+            from plan_templates import build_skeleton_plan, structured_sections, STAGE_SECTIONS
+            from multi_geo import split_regions, run_multi_geo
+            from budget_optimizer import funded_channels
+            
+            # Step 1: Verify agents are initialized
+            print("🔍 Checking agent initialization...")
+            setup_llm()
+            research_agent, content_agent, channel_agent, schedule_agent = get_agents()
+            
+            if not all([research_agent, content_agent, channel_agent, schedule_agent]):
+                raise ValueError("❌ One or more agents are not properly initialized. Please check your API configuration.")
+            
+            print("✅ All agents are properly initialized")
+            
+            regions = split_regions(geo_target) if multi_geo else []
+            if len(regions) > 1:
+                campaign_plan, output_stats = run_multi_geo(
+                    product_description, marketing_goal, budget_range, campaign_duration,
+                    industry, competition_level, regions, use_cache=use_cache, on_update=on_update
+                )
+                # Both write single-market content, so they are reported rather than silently dropped
+                not_generated = [name for name, requested in (("A/B variants", ad_variants),
+                                                              ("platform-formatted content", platform_content))
+                                 if requested]
+                if not_generated:
+                    skipped = " and ".join(not_generated)
+                    print(f"🧪 {skipped[0].upper()}{skipped[1:]} are not generated for multi-geo plans")
+                    campaign_plan["multi_geo"]["not_generated"] = not_generated
+                return finalize_plan(campaign_plan, output_stats, budget)
+            
+            # Step 2: Create all tasks
+            print("📋 Creating agent tasks...")
+            budget_allocation, posting_schedule = structured_sections(
+                budget_range, campaign_duration, industry, competition_level, geo_target
+            )
+            research_task, content_task, channel_task, schedule_task = create_tasks(
+                product_description, marketing_goal, budget_range, campaign_duration,
+                budget_allocation=budget_allocation, posting_schedule=posting_schedule
+            )
+            
+            # Step 3: Start from the template draft; each agent stage replaces its section
+            campaign_plan = build_skeleton_plan(
+                product_description, marketing_goal, budget_range, campaign_duration,
+                industry, competition_level, geo_target
+            )
+            brief = {
                 "product": product_description,
                 "goal": marketing_goal,
                 "budget": budget_range,
                 "duration": campaign_duration,
-                "created_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            },
-            "research_insights": str(research_results),
-            "content_strategy": str(content_results),
-            "channel_recommendations": str(channel_results),
-            "posting_schedule": str(schedule_results),
-            "next_steps": [
-                "Review and approve content variations",
-                "Set up accounts on recommended platforms",
-                "Configure targeting and budgets",
-                "Launch campaign according to schedule",
-                "Monitor performance and optimize"
-            ]
-        }
-        
-        print("✅ Campaign Plan Generated Successfully!")
-        return {
-            "success": True,
-            "campaign_plan": campaign_plan
-        }
-        
+                "industry": industry,
+                "competition": competition_level,
+                "geo": geo_target,
+                "templates": {stage: campaign_plan[section] for stage, section in STAGE_SECTIONS.items()}
+            }
+            cached_stages = campaign_plan["cached_stages"]
+            degraded_stages = campaign_plan["degraded_stages"]
+            output_stats = {}
+            
+            def enrich(stage, output):
+                output = str(output)
+                if output != brief["templates"][stage]:
+                    campaign_plan[STAGE_SECTIONS[stage]] = output
+                    campaign_plan["enriched_sections"].append(stage)
+                if on_update is not None:
+                    on_update(copy.deepcopy(campaign_plan))
+            
+            # Step 4: Execute all agents in sequence (reusing cached stage outputs)
+            print("🔍 Research agent analyzing market...")
+            enrich("research", run_stage("research", research_agent, research_task, brief, use_cache,
+                                         cached_stages, degraded_stages=degraded_stages,
+                                         output_stats=output_stats))
+            
+            if platform_content:
+                print("✨ Content agent writing per-platform variants...")
+                enrich("content", run_platform_stage(product_description, marketing_goal,
+                                                     funded_channels(budget_allocation), brief, use_cache,
+                                                     campaign_plan, degraded_stages))
+            else:
+                print("✨ Content agent creating variations...")
+                enrich("content", run_stage("content", content_agent, content_task, brief, use_cache,
+                                            cached_stages, degraded_stages=degraded_stages,
+                                            output_stats=output_stats))
+            
+            variant_results = None
+            if ad_variants and deadline is not None and deadline.remaining() < 30:
+                print("⏱️ Skipping A/B variants: not enough time left")
+                degraded_stages.append({"stage": "ad_variants", "mode": "skipped"})
+            elif ad_variants and budget.exceeded:
+                degraded_stages.append({"stage": "ad_variants", "mode": "budget"})
+            elif ad_variants:
+                print(f"🧪 Content agent generating {ad_variants} A/B variants...")
+                try:
+                    variant_results = generate_variants(product_description, target_count=ad_variants)
+                except DeadlineExceeded:
+                    degraded_stages.append({"stage": "ad_variants", "mode": "timeout"})
+                except BudgetExceeded:
+                    degraded_stages.append({"stage": "ad_variants", "mode": "budget"})
+            
+            print("📱 Channel agent selecting platforms...")
+            enrich("channel", run_stage("channel", channel_agent, channel_task, brief, use_cache,
+                                        cached_stages, degraded_stages=degraded_stages,
+                                        output_stats=output_stats))
+            
+            print("📅 Schedule agent optimizing timing...")
+            enrich("schedule", run_stage("schedule", schedule_agent, schedule_task, brief, use_cache,
+                                         cached_stages, degraded_stages=degraded_stages,
+                                         output_stats=output_stats))
+            
+            # Step 5: Finalise the campaign plan
+            return finalize_plan(campaign_plan, output_stats, budget, variant_results)
+            
     except Exception as e:
+        if cancel_token is not None and cancel_token.cancelled:
+            print(f"🛑 {cancel_token.reason.capitalize()}")
+            return {
+                "success": False,
+                "cancelled": True,
+                "error": f"Campaign generation {cancel_token.reason}"
+            }
         print(f"❌ Error: {str(e)}")
         return {
             "success": False,
@@ -186,6 +431,16 @@ def display_campaign_summary(result):
     for i, step in enumerate(plan['next_steps'], 1):
         print(f"   {i}. {step}")
     
+    budget = plan.get("token_budget")
+    if budget:
+        print(f"\n💰 Budget: {budget['tokens']} tokens, ${budget['cost_usd']:.4f}"
+              f" ({budget['downgraded_calls']} calls downgraded, {budget['shortened_calls']} shortened)"
+              + (f" - {budget['exceeded']} budget used up, partial plan" if budget["exceeded"] else ""))
+    
+    tokens = plan.get("output_tokens")
+    if tokens and tokens["saved"]:
+        print(f"\n🎚️ Output tokens: {tokens['total']} generated, ~{tokens['saved']} saved by per-task caps")
+    
     print(f"\n💾 Generated: {overview['created_date']}")
     print("=" * 60)
 
@@ -0,0 +1,166 @@
+import json
+import zipfile
+import argparse
+import importlib.util
+
+from campaign_store import iter_campaigns
+
+# pyarrow is slow to import and only needed for Parquet export, so it's imported there
+has_pyarrow = importlib.util.find_spec("pyarrow") is not None
+
+
+PLAN_SECTIONS = ["research_insights", "content_strategy", "channel_recommendations", "posting_schedule"]
+OVERVIEW_FIELDS = ["product", "goal", "budget", "duration", "created_date"]
+
+
+def create_text_summary(plan):
+    """Create executive summary"""
+    overview = plan["campaign_overview"]
+
+    return f"""
+AI CAMPAIGN PLAN - EXECUTIVE SUMMARY
+{'='*50}
+
+CAMPAIGN OVERVIEW
+Product: {overview['product']}
+Objective: {overview['goal']}
+Investment: {overview['budget']}
+Timeline: {overview['duration']}
+Generated: {overview['created_date']}
+
+RESEARCH INSIGHTS
+{plan['research_insights'][:500]}...
+
+CONTENT STRATEGY
+{plan['content_strategy'][:500]}...
+
+CHANNEL RECOMMENDATIONS
+{plan['channel_recommendations'][:500]}...
+
+IMPLEMENTATION ROADMAP
+{chr(10).join([f"{i}. {step}" for i, step in enumerate(plan['next_steps'], 1)])}
+
+Generated by AI Campaign Assistant Pro
+{overview['created_date']}
+    """
+
+
+def iter_ndjson(campaigns):
+    """Yield one JSON line (bytes) per (id, plan) pair"""
+    for campaign_id, plan in campaigns:
+        record = dict(plan)
+        record["campaign_id"] = campaign_id
+        yield (json.dumps(record) + "\n").encode("utf-8")
+
+
+class _ChunkBuffer:
+    """Write-only sink that lets zipfile stream into a generator"""
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def write(self, b):
+        self.data.extend(b)
+        return len(b)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        chunk = bytes(self.data)
+        self.data.clear()
+        return chunk
+
+
+def iter_zip_summaries(campaigns):
+    """Yield a ZIP archive of text summaries chunk by chunk, one entry per campaign"""
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for campaign_id, plan in campaigns:
+            created = plan["campaign_overview"]["created_date"].replace(":", "-").replace(" ", "_")
+            archive.writestr(f"campaign_{campaign_id}_{created}.txt", create_text_summary(plan))
+            chunk = buffer.drain()
+            if chunk:
+                yield chunk
+    chunk = buffer.drain()
+    if chunk:
+        yield chunk
+
+
+def _parquet_schema():
+    import pyarrow as pa
+
+    fields = [pa.field("campaign_id", pa.int64())]
+    fields += [pa.field(name, pa.string()) for name in OVERVIEW_FIELDS]
+    fields += [pa.field(name, pa.string()) for name in PLAN_SECTIONS]
+    fields.append(pa.field("next_steps", pa.list_(pa.string())))
+    return pa.schema(fields)
+
+
+def write_parquet(campaigns, path, batch_size=500):
+    """Write campaigns to Parquet in row-group batches (one column per plan section)"""
+    if not has_pyarrow:
+        raise ImportError("Parquet export requires pyarrow: pip install pyarrow")
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _parquet_schema()
+    columns = {name: [] for name in schema.names}
+    rows = 0
+
+    def flush(writer):
+        writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+        for values in columns.values():
+            values.clear()
+
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        for campaign_id, plan in campaigns:
+            overview = plan.get("campaign_overview", {})
+            columns["campaign_id"].append(campaign_id)
+            for name in OVERVIEW_FIELDS:
+                columns[name].append(overview.get(name))
+            for name in PLAN_SECTIONS:
+                columns[name].append(plan.get(name))
+            columns["next_steps"].append(plan.get("next_steps") or [])
+            rows += 1
+            if len(columns["campaign_id"]) >= batch_size:
+                flush(writer)
+        if columns["campaign_id"]:
+            flush(writer)
+    return rows
+
+
+def export_campaigns(fmt, output, since=None, until=None, budgets=None, goal_contains=None):
+    """Stream matching campaigns from the store into an NDJSON, Parquet or ZIP file"""
+    campaigns = iter_campaigns(since=since, until=until, budgets=budgets, goal_contains=goal_contains)
+
+    if fmt == "parquet":
+        return write_parquet(campaigns, output)
+
+    count = 0
+
+    def counted():
+        nonlocal count
+        for item in campaigns:
+            count += 1
+            yield item
+
+    chunks = iter_ndjson(counted()) if fmt == "ndjson" else iter_zip_summaries(counted())
+    with open(output, "wb") as f:
+        for chunk in chunks:
+            f.write(chunk)
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export stored campaign plans")
+    parser.add_argument("--format", choices=["ndjson", "parquet", "zip"], default="ndjson")
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--since", help="Earliest created date, e.g. 2024-01-01")
+    parser.add_argument("--until", help="Latest created date, e.g. 2024-12-31 23:59:59")
+    parser.add_argument("--budget", action="append", help="Budget value to include (repeatable)")
+    parser.add_argument("--goal", help="Only plans whose goal contains this text")
+    args = parser.parse_args()
+
+    exported = export_campaigns(args.format, args.output, args.since, args.until, args.budget, args.goal)
+    print(f"✅ Exported {exported} campaign(s) to {args.output}")
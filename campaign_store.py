@@ -0,0 +1,205 @@
+import os
+import json
+import sqlite3
+import threading
+from datetime import datetime
+
+
+DB_PATH = os.getenv("CAMPAIGN_DB_PATH", "campaigns.db")
+
+_init_lock = threading.Lock()
+_initialized = set()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS campaigns (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_date TEXT NOT NULL,
+    product TEXT,
+    goal TEXT,
+    budget TEXT,
+    duration TEXT,
+    plan_json TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_campaigns_created ON campaigns (created_date);
+CREATE TABLE IF NOT EXISTS stage_cache (
+    key TEXT PRIMARY KEY,
+    stage TEXT NOT NULL,
+    inputs_json TEXT NOT NULL,
+    output TEXT NOT NULL,
+    source TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS cache_events (
+    ts REAL NOT NULL,
+    stage TEXT NOT NULL,
+    hit INTEGER NOT NULL,
+    source TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_cache_events_ts ON cache_events (ts);
+CREATE TABLE IF NOT EXISTS output_caps (
+    stage TEXT PRIMARY KEY,
+    cap INTEGER NOT NULL,
+    ewma_tokens REAL,
+    samples INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    idempotency_key TEXT UNIQUE,
+    status TEXT NOT NULL,
+    payload_json TEXT NOT NULL,
+    result_json TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    lease_owner TEXT,
+    lease_expires_at REAL,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS agent_benchmarks (
+    ts REAL NOT NULL,
+    run_id TEXT NOT NULL,
+    agent TEXT NOT NULL,
+    model TEXT,
+    latency_s REAL NOT NULL,
+    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+    completion_tokens INTEGER NOT NULL DEFAULT 0,
+    ok INTEGER NOT NULL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_agent_benchmarks_ts ON agent_benchmarks (ts);
+CREATE TABLE IF NOT EXISTS token_usage (
+    day TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    key TEXT NOT NULL,
+    tokens INTEGER NOT NULL DEFAULT 0,
+    cost_usd REAL NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (day, scope, key)
+);
+CREATE TABLE IF NOT EXISTS plan_versions (
+    lineage TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    base_version INTEGER,
+    codec TEXT NOT NULL,
+    dict_id INTEGER,
+    blob BLOB NOT NULL,
+    sha TEXT NOT NULL,
+    raw_bytes INTEGER NOT NULL,
+    stored_bytes INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (lineage, version)
+);
+CREATE TABLE IF NOT EXISTS plan_dictionaries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    codec TEXT NOT NULL,
+    data BLOB NOT NULL,
+    samples INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+def get_connection(db_path=None):
+    """Open a connection to the campaign store, creating the schema on first use"""
+    path = db_path or DB_PATH
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    if path not in _initialized:
+        with _init_lock:
+            if path not in _initialized:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(SCHEMA)
+                conn.commit()
+                _initialized.add(path)
+    return conn
+
+
+def _plan_from_json(plan_json, db_path=None):
+    plan = json.loads(plan_json)
+    if "version_ref" in plan:
+        from plan_versions import load_version
+
+        plan = load_version(*plan["version_ref"], db_path=db_path)
+    return plan
+
+
+def save_campaign(plan, db_path=None):
+    """
+    Persist a campaign plan and return its id. The plan itself is stored as the next
+    version of its lineage (see plan_versions); the campaigns row references it.
+    """
+    # plan_versions imports this module, so import it here
+    from plan_versions import save_version
+
+    overview = plan.get("campaign_overview", {})
+    conn = get_connection(db_path)
+    try:
+        # Take the write lock before reading the latest version, so concurrent saves of one
+        # lineage queue up instead of both claiming the same version number
+        conn.execute("BEGIN IMMEDIATE")
+        version_ref = save_version(conn, plan, db_path)
+        cursor = conn.execute(
+            "INSERT INTO campaigns (created_date, product, goal, budget, duration, plan_json) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                overview.get("created_date") or datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                overview.get("product"),
+                overview.get("goal"),
+                overview.get("budget"),
+                overview.get("duration"),
+                json.dumps({"version_ref": version_ref})
+            )
+        )
+        conn.commit()
+        return cursor.lastrowid
+    finally:
+        conn.close()
+
+
+def load_campaign(campaign_id, db_path=None):
+    """Load a campaign plan by id (None if missing)"""
+    conn = get_connection(db_path)
+    try:
+        row = conn.execute("SELECT plan_json FROM campaigns WHERE id = ?", (campaign_id,)).fetchone()
+        return _plan_from_json(row["plan_json"], db_path) if row else None
+    finally:
+        conn.close()
+
+
+def iter_campaigns(since=None, until=None, budgets=None, goal_contains=None, batch_size=500, db_path=None):
+    """Yield (id, plan) pairs matching the filters without loading them all at once"""
+    clauses = []
+    params = []
+    if since:
+        clauses.append("created_date >= ?")
+        params.append(since)
+    if until:
+        clauses.append("created_date <= ?")
+        params.append(until)
+    if budgets:
+        clauses.append("budget IN (%s)" % ", ".join("?" for _ in budgets))
+        params.extend(budgets)
+    if goal_contains:
+        clauses.append("goal LIKE ?")
+        params.append(f"%{goal_contains}%")
+
+    query = "SELECT id, plan_json FROM campaigns"
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    query += " ORDER BY id"
+
+    conn = get_connection(db_path)
+    try:
+        cursor = conn.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield row["id"], _plan_from_json(row["plan_json"], db_path)
+    finally:
+        conn.close()
@@ -0,0 +1,193 @@
+import os
+import json
+import gzip
+import time
+import hashlib
+import importlib
+import functools
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+
+# live (default) | record | replay
+LLM_MODE = os.getenv("CAMPAIGN_LLM_MODE", "live").lower()
+CASSETTE_PATH = os.getenv("CAMPAIGN_CASSETTE", os.path.join("cassettes", "default.jsonl.gz"))
+# Seconds to sleep per replayed interaction, or "recorded" to reuse the recorded duration
+REPLAY_LATENCY = os.getenv("CAMPAIGN_REPLAY_LATENCY", "0")
+
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode when a request was never recorded"""
+
+
+class UnrecordableResponse(TypeError):
+    """Raised in record mode for a response type the cassette can't rebuild on replay"""
+
+
+def encode_response(response):
+    """
+    Cassette form of a response: strings as-is, anything else in a type-tagged envelope
+    (JSON values, or pydantic models by class path) so replay returns the same type
+    """
+    if isinstance(response, str):
+        return response
+    if response is None or isinstance(response, (bool, int, float, list, dict)):
+        try:
+            json.dumps(response)
+        except (TypeError, ValueError) as e:
+            raise UnrecordableResponse(f"Response is not JSON-serialisable: {e}") from None
+        return {"__type__": "json", "value": response}
+    cls = type(response)
+    if hasattr(response, "model_dump") and hasattr(cls, "model_validate"):
+        return {"__type__": "pydantic", "class": f"{cls.__module__}.{cls.__qualname__}",
+                "value": response.model_dump(mode="json")}
+    raise UnrecordableResponse(f"Can't record a {cls.__module__}.{cls.__qualname__} response")
+
+
+def decode_response(stored):
+    """Inverse of encode_response"""
+    if isinstance(stored, str):
+        return stored
+    if stored["__type__"] == "json":
+        return stored["value"]
+    module, _, qualname = stored["class"].rpartition(".")
+    cls = importlib.import_module(module)
+    for part in qualname.split("."):
+        cls = getattr(cls, part)
+    return cls.model_validate(stored["value"])
+
+
+def request_key(kind, name, payload):
+    """Stable hash of an LLM request or tool call"""
+    raw = json.dumps({"kind": kind, "name": name, "payload": payload}, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+class Cassette:
+    """Gzipped JSON-lines store of recorded LLM responses and tool results"""
+
+    def __init__(self, path=CASSETTE_PATH, replay_latency=REPLAY_LATENCY):
+        self.path = path
+        self.replay_latency = replay_latency
+        self._lock = threading.Lock()
+        self._entries = None
+        self._cursor = defaultdict(int)
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+        # Recorded duration of every replayed interaction, for offline latency estimates
+        self.replayed_s = 0.0
+
+    def _load(self):
+        entries = defaultdict(list)
+        if os.path.exists(self.path):
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        entries[entry["key"]].append(entry)
+        return entries
+
+    def lookup(self, key):
+        """Next recorded entry for this key (repeated identical requests replay in order)"""
+        with self._lock:
+            if self._entries is None:
+                self._entries = self._load()
+            recorded = self._entries.get(key)
+            if not recorded:
+                self.misses += 1
+                return None
+            index = min(self._cursor[key], len(recorded) - 1)
+            self._cursor[key] += 1
+            self.hits += 1
+            self.replayed_s += recorded[index].get("duration_s", 0)
+            return recorded[index]
+
+    def record(self, kind, name, key, response, duration_s):
+        """Append one interaction; each append is its own gzip member so writes stay cheap"""
+        entry = {
+            "kind": kind,
+            "name": name,
+            "key": key,
+            "response": response,
+            "duration_s": round(duration_s, 3)
+        }
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with gzip.open(self.path, "at", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+            if self._entries is not None:
+                self._entries[key].append(entry)
+            self.recorded += 1
+
+    def simulate_latency(self, entry):
+        if self.replay_latency == "recorded":
+            delay = entry.get("duration_s", 0)
+        else:
+            delay = float(self.replay_latency or 0)
+        if delay:
+            time.sleep(delay)
+
+
+cassette = Cassette()
+
+
+def is_replay():
+    return LLM_MODE == "replay"
+
+
+def is_record():
+    return LLM_MODE == "record"
+
+
+@contextmanager
+def use_cassette(path, mode):
+    """Switch the process to another cassette and mode for the block (single-threaded tools only)"""
+    global cassette, LLM_MODE
+    previous = cassette, LLM_MODE
+    cassette, LLM_MODE = Cassette(path, replay_latency="0"), mode
+    try:
+        yield cassette
+    finally:
+        cassette, LLM_MODE = previous
+
+
+def replay_or_record(kind, name, payload, call):
+    """Serve a call from the cassette (replay), record it (record) or just run it (live)"""
+    if LLM_MODE not in ("record", "replay"):
+        return call()
+
+    key = request_key(kind, name, payload)
+
+    if LLM_MODE == "replay":
+        entry = cassette.lookup(key)
+        if entry is None:
+            raise CassetteMiss(f"No recorded {kind} response for {name} (key {key}) in {cassette.path}")
+        cassette.simulate_latency(entry)
+        return decode_response(entry["response"])
+
+    start = time.perf_counter()
+    response = call()
+    cassette.record(kind, name, key, encode_response(response), time.perf_counter() - start)
+    return response
+
+
+def wrap_tool(tool):
+    """Record/replay a CrewAI tool's _run calls"""
+    if LLM_MODE not in ("record", "replay") or getattr(tool, "_cassette_wrapped", False):
+        return tool
+
+    original_run = tool._run
+    name = getattr(tool, "name", type(tool).__name__)
+
+    @functools.wraps(original_run)
+    def recorded_run(*args, **kwargs):
+        return replay_or_record("tool", name, {"args": args, "kwargs": kwargs},
+                                lambda: original_run(*args, **kwargs))
+
+    object.__setattr__(tool, "_run", recorded_run)
+    object.__setattr__(tool, "_cassette_wrapped", True)
+    return tool
@@ -0,0 +1,127 @@
+import re
+import zlib
+
+import numpy as np
+
+
+EMBEDDING_DIM = 512
+DEFAULT_SIMILARITY_THRESHOLD = 0.85
+
+VARIANT_LINE = re.compile(r"^\s*(?:\d+[.)]|[-*•])\s+(.+)$")
+
+
+def _features(text):
+    """Word unigrams/bigrams plus character trigrams of a normalised text"""
+    words = re.findall(r"[a-z0-9']+", text.lower())
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    joined = " ".join(words)
+    features += [joined[i:i + 3] for i in range(len(joined) - 2)]
+    return features
+
+
+def embed_texts(texts, dim=EMBEDDING_DIM):
+    """Local hashed bag-of-features embeddings, L2-normalised (rows of a float32 matrix)"""
+    vectors = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for feature in _features(text):
+            vectors[row, zlib.crc32(feature.encode("utf-8")) % dim] += 1.0
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def prune_near_duplicates(candidates, kept_vectors=None, threshold=DEFAULT_SIMILARITY_THRESHOLD):
+    """
+    Split candidates into distinct and duplicate texts using pairwise cosine similarity.
+    Candidates are compared with each other and with kept_vectors (already accepted variants).
+    Returns (distinct_texts, distinct_vectors, duplicate_count).
+    """
+    if not candidates:
+        return [], np.zeros((0, EMBEDDING_DIM), dtype=np.float32), 0
+
+    vectors = embed_texts(candidates)
+    if kept_vectors is None:
+        kept_vectors = np.zeros((0, vectors.shape[1]), dtype=np.float32)
+
+    # Similarity of every candidate to the accepted pool and to every other candidate
+    against_kept = vectors @ kept_vectors.T if len(kept_vectors) else np.zeros((len(candidates), 0))
+    pairwise = vectors @ vectors.T
+
+    duplicate = against_kept.max(axis=1) >= threshold if against_kept.shape[1] else np.zeros(len(candidates), bool)
+    keep = []
+    for i in range(len(candidates)):
+        if duplicate[i]:
+            continue
+        if keep and pairwise[i, keep].max() >= threshold:
+            duplicate[i] = True
+            continue
+        keep.append(i)
+
+    return [candidates[i] for i in keep], vectors[keep], int(duplicate.sum())
+
+
+def parse_variants(text):
+    """Parse numbered 'headline || ad copy' lines out of agent output"""
+    variants = []
+    for line in str(text).splitlines():
+        match = VARIANT_LINE.match(line)
+        if not match:
+            continue
+        body = match.group(1).strip().strip('"')
+        if "||" in body:
+            headline, copy = [part.strip().strip('"') for part in body.split("||", 1)]
+        else:
+            headline, copy = body, ""
+        if headline:
+            variants.append({"headline": headline, "copy": copy})
+    return variants
+
+
+def generate_variants(product_description, target_count=30, batch_size=10, max_batches=8,
+                      threshold=DEFAULT_SIMILARITY_THRESHOLD, audience_info=""):
+    """
+    Request ad variants from the content agent in batches until target_count distinct
+    variants have been collected (or max_batches is reached).
+    """
+    from agents import get_agents, create_variant_task
+    from crew_executor import run_task
+    from llm_runtime import run_context
+    from output_caps import variant_batch_cap
+
+    content_agent = get_agents()[1]
+    accepted = []
+    accepted_vectors = None
+    stats = {"batches": 0, "received": 0, "duplicates_pruned": 0}
+
+    while len(accepted) < target_count and stats["batches"] < max_batches:
+        missing = target_count - len(accepted)
+        # Ask for a little more than needed since some will be pruned
+        request_count = min(batch_size, missing + max(1, missing // 4))
+        task = create_variant_task(
+            product_description,
+            request_count,
+            avoid_headlines=[v["headline"] for v in accepted[-15:]],
+            audience_info=audience_info
+        )
+        with run_context(max_tokens=variant_batch_cap(request_count)):
+            batch = parse_variants(run_task(content_agent, task, verbose=False))
+        stats["batches"] += 1
+        stats["received"] += len(batch)
+
+        texts = [f"{v['headline']} {v['copy']}" for v in batch]
+        distinct, vectors, duplicates = prune_near_duplicates(texts, accepted_vectors, threshold)
+        stats["duplicates_pruned"] += duplicates
+
+        take = min(len(distinct), target_count - len(accepted))
+        by_text = dict(zip(texts, batch))
+        accepted.extend(by_text[text] for text in distinct[:take])
+        if accepted_vectors is None:
+            accepted_vectors = vectors[:take]
+        else:
+            accepted_vectors = np.vstack([accepted_vectors, vectors[:take]])
+
+        print(f"✨ Variant batch {stats['batches']}: {len(batch)} received, "
+              f"{duplicates} near-duplicates pruned, {len(accepted)}/{target_count} distinct")
+
+    stats["distinct"] = len(accepted)
+    return {"variants": accepted, "stats": stats}
@@ -0,0 +1,116 @@
+import os
+import copy
+import hashlib
+import threading
+
+
+CONTEXT_CACHE_MODE = os.getenv("CONTEXT_CACHE", "local").lower()
+
+# Task descriptions open with the campaign brief and end it with this line (see agents.format_brief)
+PREFIX_BOUNDARY = "\n---\n"
+
+
+def split_prefix(messages):
+    """
+    Split chat messages into (stable prefix, variable suffix).
+    The prefix is the leading system messages (agent persona) plus the first user
+    message up to and including PREFIX_BOUNDARY (the campaign brief).
+    """
+    prefix = []
+    for index, message in enumerate(messages):
+        if not isinstance(message, dict):
+            break
+        content = str(message.get("content", ""))
+        if message.get("role") == "system":
+            prefix.append(message)
+            continue
+        if message.get("role") == "user" and PREFIX_BOUNDARY in content:
+            head, tail = content.split(PREFIX_BOUNDARY, 1)
+            prefix.append({**message, "content": head + PREFIX_BOUNDARY})
+            rest = [{**message, "content": tail}] if tail else []
+            return prefix, rest + list(messages[index + 1:])
+        break
+    return prefix, list(messages[len(prefix):])
+
+
+def prefix_handle(prefix):
+    raw = "\x1e".join(f"{m.get('role')}:{m.get('content')}" for m in prefix)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def prefix_bytes(prefix):
+    return sum(len(str(m.get("content", "")).encode("utf-8")) for m in prefix)
+
+
+class LocalContextCache:
+    """
+    Provider-agnostic context cache. Prefixes are registered once and referred to by
+    handle; later calls with a registered prefix count its bytes as saved. Messages are
+    still sent in full, so this only measures what real provider caching would save.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._prefixes = {}
+
+    def register(self, prefix):
+        """Handle for this prefix, registering it on first sight; returns (handle, new)"""
+        handle = prefix_handle(prefix)
+        with self._lock:
+            entry = self._prefixes.get(handle)
+            if entry is None:
+                self._prefixes[handle] = {"bytes": prefix_bytes(prefix), "uses": 1, "bytes_saved": 0}
+                return handle, True
+            entry["uses"] += 1
+            entry["bytes_saved"] += entry["bytes"]
+            return handle, False
+
+    def prepare(self, messages):
+        """Messages to send for this call, plus the prefix handle (None without a prefix)"""
+        prefix, _ = split_prefix(messages)
+        if not prefix:
+            return messages, None
+        handle, _ = self.register(prefix)
+        return messages, handle
+
+    def stats(self):
+        with self._lock:
+            entries = list(self._prefixes.values())
+        sent = sum(e["bytes"] * e["uses"] for e in entries)
+        saved = sum(e["bytes_saved"] for e in entries)
+        return {
+            "mode": CONTEXT_CACHE_MODE,
+            "prefixes": len(entries),
+            "calls": sum(e["uses"] for e in entries),
+            "prefix_bytes_sent": sent - saved,
+            "prefix_bytes_saved": saved,
+            "saved_ratio": round(saved / sent, 3) if sent else 0.0
+        }
+
+
+class ProviderContextCache(LocalContextCache):
+    """
+    Marks the stable prefix with cache_control so LiteLLM can use the provider's
+    context caching (e.g. Gemini cached content). Providers impose minimum prefix
+    sizes, below which the marker is ignored and the call behaves as uncached.
+    """
+
+    def prepare(self, messages):
+        prefix, suffix = split_prefix(messages)
+        if not prefix:
+            return messages, None
+        handle, _ = self.register(prefix)
+        marked = copy.deepcopy(prefix)
+        marked[-1]["cache_control"] = {"type": "ephemeral"}
+        return marked + suffix, handle
+
+
+class NoContextCache(LocalContextCache):
+    def prepare(self, messages):
+        return messages, None
+
+
+context_cache = {
+    "provider": ProviderContextCache,
+    "off": NoContextCache
+}.get(CONTEXT_CACHE_MODE, LocalContextCache)()
@@ -0,0 +1,186 @@
+import os
+import time
+import argparse
+import threading
+from contextlib import contextmanager
+
+
+# Crew's task checks, re-run when a pooled crew takes a new task (the rest of its
+# validators set up crew-wide state); names missing from older CrewAI versions are skipped
+TASK_VALIDATORS = (
+    "validate_tasks",
+    "validate_end_with_at_most_one_async_task",
+    "validate_must_have_non_conditional_task",
+    "validate_first_task",
+    "validate_async_tasks_not_async",
+    "validate_context_no_future_tasks"
+)
+
+
+def swap_task(crew, task):
+    """
+    Point a pooled crew at a new task. Construction only sets up crew-wide state (cache and
+    RPM handlers, memory, event listeners); per-task wiring (callbacks, agent setup, output
+    handler reset) happens in kickoff, so only the task checks need to run again.
+    """
+    crew.tasks = [task]
+    for name in TASK_VALIDATORS:
+        validator = getattr(crew, name, None)
+        if validator is not None:
+            validator()
+
+
+class CrewExecutor:
+    """
+    Long-lived single-agent crews for one agent, each on its own copy of the agent.
+    A run checks an idle (agent copy, crew) pair out of the pool, building one only when
+    every pair is busy, binds its task to that copy and swaps it into the crew, so
+    concurrent runs (multi-geo regions, platforms, variant batches) never share an agent
+    and crews are built once per concurrent run rather than once per call.
+    """
+
+    def __init__(self, agent):
+        self.agent = agent
+        self._lock = threading.Lock()
+        self._idle = {True: [], False: []}
+        self.built = 0
+        self.runs = 0
+
+    @contextmanager
+    def crew(self, task, verbose=True):
+        """A crew running task on an agent copy no other run is using"""
+        with self._lock:
+            pair = self._idle[verbose].pop() if self._idle[verbose] else None
+            if pair is None:
+                self.built += 1
+            self.runs += 1
+        try:
+            if pair is None:
+                from crewai import Crew
+
+                worker = self.agent.copy()
+                # Sequential crews execute each task with task.agent
+                task.agent = worker
+                pair = worker, Crew(agents=[worker], tasks=[task], verbose=verbose)
+            else:
+                worker, crew = pair
+                task.agent = worker
+                swap_task(crew, task)
+            yield pair[1]
+        finally:
+            # A pair that failed to build is dropped; one that fails a task check goes back
+            if pair is not None:
+                with self._lock:
+                    self._idle[verbose].append(pair)
+
+    def run(self, task, verbose=True):
+        """Kick off task on a pooled crew"""
+        with self.crew(task, verbose) as crew:
+            return crew.kickoff()
+
+    def stats(self):
+        with self._lock:
+            return {"built": self.built, "runs": self.runs,
+                    "idle": len(self._idle[True]) + len(self._idle[False])}
+
+
+_executors_lock = threading.Lock()
+
+
+def executor_for(agent):
+    """The agent's CrewExecutor, attached to the agent on first use (rebuilt agents get new ones)"""
+    executor = getattr(agent, "_crew_executor", None)
+    if executor is None:
+        with _executors_lock:
+            executor = getattr(agent, "_crew_executor", None)
+            if executor is None:
+                executor = CrewExecutor(agent)
+                # Agents are pydantic models, so bypass attribute validation
+                object.__setattr__(agent, "_crew_executor", executor)
+    return executor
+
+
+def run_task(agent, task, verbose=True):
+    """Run one task on a pooled crew with its own copy of agent"""
+    return executor_for(agent).run(task, verbose=verbose)
+
+
+def benchmark(iterations=200, kickoffs=20):
+    """
+    Per-call setup of a fresh Crew (on the shared agent, as before pooling) vs. a pooled crew,
+    the one-off agent copy behind each pooled crew, and end-to-end per-stage time against a
+    zero-latency fake LLM both ways (alternating, after a warm-up run each). Returns ms.
+    """
+    from fake_llm_server import start_fake_llm_server
+
+    server, base_url = start_fake_llm_server(latency=0.0)
+    os.environ["CAMPAIGN_LLM_BASE_URL"] = base_url
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark-key")
+    try:
+        from crewai import Crew, Task
+        from agents import get_agents
+        from campaign_assistant import setup_llm
+
+        setup_llm()
+
+        agent = get_agents()[0]
+
+        def make_tasks(count):
+            return [Task(description="Summarise the market for a fitness tracker.", agent=agent,
+                         expected_output="A short summary.") for _ in range(count)]
+
+        tasks = make_tasks(iterations)
+        start = time.perf_counter()
+        for task in tasks:
+            Crew(agents=[agent], tasks=[task], verbose=False)
+        fresh_build = (time.perf_counter() - start) / iterations * 1000
+
+        start = time.perf_counter()
+        for _ in range(min(iterations, 20)):
+            agent.copy()
+        agent_copy = (time.perf_counter() - start) / min(iterations, 20) * 1000
+
+        executor = CrewExecutor(agent)
+        with executor.crew(make_tasks(1)[0], verbose=False):
+            pass
+        tasks = make_tasks(iterations)
+        start = time.perf_counter()
+        for task in tasks:
+            with executor.crew(task, verbose=False):
+                pass
+        pooled_build = (time.perf_counter() - start) / iterations * 1000
+
+        fresh_runs, pooled_runs = [], []
+        for i, task in enumerate(make_tasks(2 * (kickoffs + 1))):
+            start = time.perf_counter()
+            if i % 2:
+                executor.run(task, verbose=False)
+                pooled_runs.append(time.perf_counter() - start)
+            else:
+                Crew(agents=[agent], tasks=[task], verbose=False).kickoff()
+                fresh_runs.append(time.perf_counter() - start)
+        # The first run of each path is a warm-up
+        fresh_stage = sum(fresh_runs[1:]) / kickoffs * 1000
+        pooled_stage = sum(pooled_runs[1:]) / kickoffs * 1000
+    finally:
+        server.shutdown()
+
+    return {
+        "setup_ms": {"fresh": round(fresh_build, 3), "pooled": round(pooled_build, 3)},
+        "stage_ms": {"fresh": round(fresh_stage, 2), "pooled": round(pooled_stage, 2)},
+        # Paid once per pooled crew, i.e. per concurrent run an agent has seen
+        "agent_copy_ms": round(agent_copy, 2),
+        "crews_built": executor.stats()["built"]
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmark per-call crews vs. pooled crews")
+    parser.add_argument("--iterations", type=int, default=200, help="Crew setups to time")
+    parser.add_argument("--kickoffs", type=int, default=20, help="End-to-end stage runs to time (fake LLM)")
+    args = parser.parse_args()
+
+    results = benchmark(args.iterations, args.kickoffs)
+    for name in ("setup_ms", "stage_ms"):
+        print(f"⏱️ {name}: fresh {results[name]['fresh']} ms, pooled {results[name]['pooled']} ms")
+    print(f"🧬 agent copy: {results['agent_copy_ms']} ms once per pooled crew ({results['crews_built']} built)")
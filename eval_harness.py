@@ -0,0 +1,321 @@
+import os
+import re
+import json
+import time
+import argparse
+from collections import defaultdict
+
+import numpy as np
+
+from budget_optimizer import CHANNEL_CURVES, funded_channels
+from token_budget import cost_usd
+
+
+EVAL_DIR = os.getenv("CAMPAIGN_EVAL_DIR", "eval")
+RESULTS_PATH = os.path.join(EVAL_DIR, "results.jsonl")
+
+# Fixed briefs every configuration is scored on
+GOLDEN_BRIEFS = [
+    {"id": "fitness-tracker", "product": "AI-powered fitness tracker with personalized coaching",
+     "goal": "Acquire 50,000 users in 6 months", "budget": "SMB", "duration": "6 weeks",
+     "industry": "Technology", "competition": 4, "geo": "North America", "ad_variants": 10},
+    {"id": "budgeting-app", "product": "Mobile budgeting app that automatically categorizes spending",
+     "goal": "Reach 10,000 paid subscribers", "budget": "Startup", "duration": "4 weeks",
+     "industry": "Finance", "competition": 5, "geo": "UK", "ad_variants": 0},
+    {"id": "skincare-dtc", "product": "Vegan skincare subscription box with dermatologist-picked products",
+     "goal": "Double monthly online sales", "budget": "SMB", "duration": "8 weeks",
+     "industry": "E-commerce", "competition": 4, "geo": "Europe", "ad_variants": 10},
+    {"id": "telehealth", "product": "Telehealth platform for same-day dermatology consultations",
+     "goal": "Increase bookings by 40% in one quarter", "budget": "Enterprise", "duration": "12 weeks",
+     "industry": "Healthcare", "competition": 3, "geo": "USA", "ad_variants": 0},
+    {"id": "coding-bootcamp", "product": "Online coding bootcamp with job placement support",
+     "goal": "Fill 500 seats for the spring cohort", "budget": "SMB", "duration": "4 weeks",
+     "industry": "Education", "competition": 3, "geo": "India, Global", "ad_variants": 0}
+]
+
+# Expected word count per stage (the prompts ask for "under 300 words" etc.)
+LENGTH_TARGETS = {
+    "research": (120, 360),
+    "content": (150, 700),
+    "channel": (120, 700),
+    "schedule": (100, 700),
+    "variants": (0, 10 ** 6)
+}
+
+CHANNEL_ALIASES = {
+    "Google Ads": r"google|search ads|ppc",
+    "Meta": r"meta|facebook|instagram",
+    "LinkedIn": r"linkedin",
+    "YouTube": r"youtube",
+    "Email": r"e-?mail|newsletter"
+}
+# Anything else that reads like a channel recommendation
+OTHER_CHANNELS = r"tiktok|twitter|\bx\b|reddit|pinterest|podcast|influencer|seo|blog|snapchat"
+
+LIST_ITEM = re.compile(r"^\s*(?:\d+[.)]|[-*•])\s+\S")
+HEADING = re.compile(r"^\s*(?:#+\s*|\*\*[^*]+\*\*\s*:?\s*$|[A-Z][^.!?]{0,60}:\s*$)")
+
+
+def section_items(text, start):
+    """Number of list items under the first line matching start, up to the next heading"""
+    lines = str(text).splitlines()
+    for i, line in enumerate(lines):
+        if re.search(start, line, re.I):
+            count = 0
+            for following in lines[i + 1:]:
+                if LIST_ITEM.match(following):
+                    count += 1
+                elif count and HEADING.match(following):
+                    break
+            return count
+    return 0
+
+
+def has(text, pattern):
+    return 1.0 if re.search(pattern, str(text), re.I) else 0.0
+
+
+def length_check(stage, text):
+    low, high = LENGTH_TARGETS[stage]
+    words = len(str(text).split())
+    if low <= words <= high:
+        return 1.0
+    # Partial credit, falling off linearly to zero at half / double the target range
+    if words < low:
+        return max(0.0, 2 * words / low - 1) if low else 0.0
+    return max(0.0, 2 - words / high)
+
+
+def score_research(text, brief):
+    return {
+        "audience": has(text, r"audience|demographic|persona"),
+        "trends": has(text, r"trend"),
+        "competitors": has(text, r"competit"),
+        "opportunities": has(text, r"opportunit|recommend"),
+        "length": length_check("research", text)
+    }
+
+
+def score_content(text, brief):
+    return {
+        "headlines": min(1.0, section_items(text, r"headline") / 3),
+        "ad_copy": min(1.0, section_items(text, r"ad copy|copy variation") / 3),
+        "themes": has(text, r"messag|theme"),
+        "cta": has(text, r"call.to.action|\bcta"),
+        "length": length_check("content", text)
+    }
+
+
+def score_channel(text, brief):
+    mentioned = [name for name, pattern in CHANNEL_ALIASES.items() if has(text, pattern)]
+    funded = funded_channels(brief["allocation"]) if brief.get("allocation") else list(CHANNEL_CURVES)[:2]
+    return {
+        "channel_count": min(1.0, (len(mentioned) + has(text, OTHER_CHANNELS)) / 3),
+        "funded_covered": len(set(mentioned) & set(funded)) / len(funded) if funded else 1.0,
+        "budget_figures": has(text, r"\$\s?\d|\d+\s?%"),
+        "strategies": has(text, r"strateg|target|creative"),
+        "length": length_check("channel", text)
+    }
+
+
+def score_schedule(text, brief):
+    return {
+        "days": has(text, r"monday|tuesday|wednesday|thursday|friday|saturday|sunday|\b(mon|tue|wed|thu|fri|sat|sun)\b"),
+        "times": has(text, r"\b\d{1,2}(:\d{2})?\s?(am|pm)\b|\b\d{2}:\d{2}\b"),
+        "phases": has(text, r"week|phase|launch"),
+        "milestones": has(text, r"milestone|kpi|metric|target"),
+        "length": length_check("schedule", text)
+    }
+
+
+def score_variants(variants, brief):
+    requested = brief.get("ad_variants") or 0
+    if not requested:
+        return {}
+    copies = [v.get("copy", "") for v in variants]
+    in_range = [25 <= len(c.split()) <= 50 for c in copies]
+    return {
+        "count": min(1.0, len(variants) / requested),
+        "formatted": sum(1 for c in copies if c) / len(variants) if variants else 0.0,
+        "copy_length": sum(in_range) / len(in_range) if in_range else 0.0
+    }
+
+
+SCORERS = {
+    "research": score_research,
+    "content": score_content,
+    "channel": score_channel,
+    "schedule": score_schedule,
+    "variants": score_variants
+}
+
+
+def score_output(stage, output, brief):
+    """(quality 0-1, per-check scores) from local heuristics; no LLM judge"""
+    checks = SCORERS[stage](output, brief)
+    return (round(float(np.mean(list(checks.values()))), 3) if checks else None), checks
+
+
+def configure_model(model):
+    """Point all four agents at model (hooks installed as for the main LLM)"""
+    from campaign_assistant import setup_llm
+    from crewai import LLM
+    from agents import initialize_agents
+    from llm_runtime import install_llm_hooks
+
+    # Default setup first, so a later first-use setup can't override our agents
+    setup_llm()
+    initialize_agents(install_llm_hooks(LLM(model=model, temperature=0.7)))
+
+
+def run_brief(brief, model, variant):
+    """Run each stage for one golden brief and yield a scored row per stage"""
+    from agents import create_tasks, get_agents
+    from campaign_assistant import run_stage
+    from content_variants import generate_variants
+    from plan_templates import structured_sections
+    from llm_runtime import run_context, UsageMeter
+    import cassettes
+
+    allocation, schedule = structured_sections(brief["budget"], brief["duration"], brief["industry"],
+                                               brief["competition"], brief["geo"])
+    tasks = create_tasks(brief["product"], brief["goal"], brief["budget"], brief["duration"],
+                         budget_allocation=allocation, posting_schedule=schedule)
+    stages = list(zip(("research", "content", "channel", "schedule"), get_agents(), tasks))
+    if brief.get("ad_variants"):
+        stages.append(("variants", None, None))
+    scoring_brief = {**brief, "allocation": allocation}
+
+    for stage, agent, task in stages:
+        meter = UsageMeter()
+        replayed_before = cassettes.cassette.replayed_s
+        started = time.perf_counter()
+        row = {"variant": variant, "model": model, "brief": brief["id"], "stage": stage, "error": None}
+        try:
+            with run_context(usage=meter):
+                if stage == "variants":
+                    output = generate_variants(brief["product"], target_count=brief["ad_variants"])["variants"]
+                else:
+                    output = run_stage(stage, agent, task, brief, use_cache=False)
+            row["quality"], row["checks"] = score_output(stage, output, scoring_brief)
+        except Exception as e:
+            row.update(quality=0.0, checks={}, error=str(e)[:200])
+        # Replayed calls return instantly, so count the latency they were recorded with
+        row["latency_s"] = round(time.perf_counter() - started + cassettes.cassette.replayed_s - replayed_before, 3)
+        usage = meter.snapshot()
+        row.update(usage)
+        row["cost_usd"] = round(cost_usd(model, usage["prompt_tokens"], usage["completion_tokens"]), 6)
+        yield row
+
+
+def evaluate(models, variant="baseline", mode="replay", briefs=GOLDEN_BRIEFS, results_path=RESULTS_PATH):
+    """
+    Score every golden brief for each model. mode "record" calls the live models and saves
+    their outputs to eval/cassettes/<variant>/<model>.jsonl.gz; "replay" re-scores those
+    recordings offline. Prompt changes alter the recorded keys, so a changed prompt set
+    needs its own variant name and one recording run.
+    """
+    from cassettes import use_cassette
+
+    os.makedirs(os.path.dirname(results_path) or ".", exist_ok=True)
+    rows = []
+    for model in models:
+        path = os.path.join(EVAL_DIR, "cassettes", variant, re.sub(r"[^\w.-]+", "_", model) + ".jsonl.gz")
+        with use_cassette(path, mode):
+            # Agents are rebuilt inside the cassette so their tools are recorded too
+            configure_model(model)
+            for brief in briefs:
+                for row in run_brief(brief, model, variant):
+                    row["ts"] = time.time()
+                    row["mode"] = mode
+                    rows.append(row)
+                    print(f"🧪 {variant} {model} {brief['id']:<16} {row['stage']:<9} "
+                          f"quality {row['quality']} {row['latency_s']:.2f}s ${row['cost_usd']:.5f}"
+                          + (f" ❌ {row['error'][:60]}" if row["error"] else ""))
+    with open(results_path, "a", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row) + "\n")
+    return rows
+
+
+def load_results(results_path=RESULTS_PATH):
+    """Latest row per (variant, model, brief, stage): re-running a configuration replaces it"""
+    latest = {}
+    if os.path.exists(results_path):
+        with open(results_path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    row = json.loads(line)
+                    latest[(row["variant"], row["model"], row["brief"], row["stage"])] = row
+    return list(latest.values())
+
+
+def frontier(rows):
+    """
+    Per agent stage, aggregate each (model, variant) configuration and mark the Pareto
+    frontier: no other configuration is at least as fast, as cheap and as good, and better on one.
+    """
+    groups = defaultdict(list)
+    for row in rows:
+        if row["quality"] is not None:
+            groups[(row["stage"], row["model"], row["variant"])].append(row)
+
+    configs = []
+    for (stage, model, variant), group in sorted(groups.items()):
+        configs.append({
+            "stage": stage,
+            "model": model,
+            "variant": variant,
+            "briefs": len(group),
+            "errors": sum(1 for r in group if r["error"]),
+            "quality": round(float(np.mean([r["quality"] for r in group])), 3),
+            "p50_latency_s": round(float(np.percentile([r["latency_s"] for r in group], 50)), 2),
+            "cost_usd": round(float(np.mean([r["cost_usd"] for r in group])), 6)
+        })
+
+    for config in configs:
+        rivals = [c for c in configs if c["stage"] == config["stage"] and c is not config]
+        config["on_frontier"] = not any(
+            c["quality"] >= config["quality"] and c["p50_latency_s"] <= config["p50_latency_s"]
+            and c["cost_usd"] <= config["cost_usd"]
+            and (c["quality"] > config["quality"] or c["p50_latency_s"] < config["p50_latency_s"]
+                 or c["cost_usd"] < config["cost_usd"])
+            for c in rivals
+        )
+    return configs
+
+
+def print_frontier(configs):
+    stage = None
+    for c in configs:
+        if c["stage"] != stage:
+            stage = c["stage"]
+            print(f"\n📊 {stage}")
+        marker = "⭐" if c["on_frontier"] else "  "
+        print(f"{marker} {c['model']:<26} {c['variant']:<14} quality {c['quality']:.3f}  "
+              f"p50 {c['p50_latency_s']:6.2f}s  ${c['cost_usd']:.5f}/brief"
+              + (f"  ({c['errors']}/{c['briefs']} errors)" if c["errors"] else ""))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score golden briefs per model and prompt variant offline")
+    parser.add_argument("--models", default="gemini/gemini-1.5-flash,gemini/gemini-1.5-pro")
+    parser.add_argument("--variant", default="baseline", help="Name for the current prompt set")
+    parser.add_argument("--mode", choices=["record", "replay"], default="replay")
+    parser.add_argument("--briefs", default=None, help="JSON file with golden briefs (default built-in set)")
+    parser.add_argument("--report", action="store_true", help="Only print the frontier from stored results")
+    args = parser.parse_args()
+
+    if not args.report:
+        # Keep eval runs out of the production store (stage cache, output caps, history)
+        os.environ.setdefault("CAMPAIGN_DB_PATH", os.path.join(EVAL_DIR, "eval.db"))
+        os.makedirs(EVAL_DIR, exist_ok=True)
+        # Lets campaign_assistant start without an API key when only replaying
+        os.environ["CAMPAIGN_LLM_MODE"] = args.mode
+        briefs = GOLDEN_BRIEFS
+        if args.briefs:
+            with open(args.briefs, encoding="utf-8") as f:
+                briefs = json.load(f)
+        evaluate([m.strip() for m in args.models.split(",") if m.strip()], args.variant, args.mode, briefs)
+
+    print_frontier(frontier(load_results()))
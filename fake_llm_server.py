@@ -0,0 +1,88 @@
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+SAMPLE_ANSWER = (
+    "Target audience: health-conscious professionals aged 25-45 who track workouts on mobile. "
+    "Key trends: personalised coaching, wearables integration and subscription bundles. "
+    "Headlines: 1. Train Smarter, Not Longer 2. Your Coach in Your Pocket 3. Results You Can Measure. "
+    "Channels: Google Ads 35%, Meta 30%, LinkedIn 20%, YouTube 10%, Email 5%. "
+    "Schedule: 3-5 posts per week, Tuesday to Thursday 7-9am and 6-8pm, weekly performance reviews."
+)
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    """OpenAI-compatible /chat/completions endpoint that answers with canned text"""
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        server = self.server
+
+        with server.lock:
+            server.request_count += 1
+
+        if server.latency:
+            time.sleep(server.latency)
+
+        prompt_chars = sum(len(str(m.get("content", ""))) for m in request.get("messages", []))
+        content = "Thought: I now can give a great answer\nFinal Answer: " + server.answer
+        body = json.dumps({
+            "id": f"chatcmpl-fake-{server.request_count}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "fake-model"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_chars // 4,
+                "completion_tokens": len(content) // 4,
+                "total_tokens": prompt_chars // 4 + len(content) // 4
+            }
+        }).encode("utf-8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fake_llm_server(port=0, latency=0.0, answer=SAMPLE_ANSWER):
+    """Start the fake LLM server in a daemon thread and return (server, base_url)"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeLLMHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.answer = answer
+    server.request_count = 0
+    server.lock = threading.Lock()
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible LLM for local testing")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds to wait per completion")
+    args = parser.parse_args()
+
+    server, base_url = start_fake_llm_server(args.port, args.latency)
+    print(f"🤖 Fake LLM listening on {base_url}")
+    print(f"Set CAMPAIGN_LLM_BASE_URL={base_url} to use it")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,136 @@
+import os
+import re
+import glob
+import hashlib
+import argparse
+import functools
+
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+CSS_SOURCE = os.path.join(STATIC_DIR, "app.css")
+# Streamlit serves ./static at this path when server.enableStaticServing is on
+STATIC_URL = "app/static"
+
+FONT_FACE = re.compile(r"@font-face\{[^}]*\}")
+FONT_FILES = {
+    "inter-latin-wght-normal.woff2": "https://cdn.jsdelivr.net/fontsource/fonts/inter:vf@latest/latin-wght-normal.woff2"
+}
+
+
+def minify_css(css):
+    """Strip comments and insignificant whitespace"""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{}:;,>])\s*", r"\1", css)
+    return css.replace(";}", "}").strip()
+
+
+def drop_missing_fonts(css):
+    """Remove @font-face rules whose font file hasn't been fetched (browsers would only get a 404)"""
+    def keep(match):
+        url = re.search(r"url\('?([^')]+)'?\)", match.group(0))
+        return match.group(0) if url and os.path.exists(os.path.join(STATIC_DIR, url.group(1))) else ""
+    return FONT_FACE.sub(keep, css)
+
+
+@functools.lru_cache(maxsize=512)
+def minify_html(markup):
+    """Collapse indentation and whitespace between tags (memoised: most markup is static)"""
+    markup = re.sub(r">\s+<", "><", markup.strip())
+    return re.sub(r"\s{2,}", " ", markup)
+
+
+@functools.lru_cache(maxsize=1)
+def build_stylesheet():
+    """
+    Write the minified stylesheet as static/app.<hash>.css (content-hashed, so browsers
+    can cache it indefinitely) and return (file name or None if unwritable, minified css).
+    Fonts not yet fetched are left out, and fetching them changes the hash.
+    """
+    with open(CSS_SOURCE, encoding="utf-8") as f:
+        css = drop_missing_fonts(minify_css(f.read()))
+    digest = hashlib.sha256(css.encode("utf-8")).hexdigest()[:10]
+    name = f"app.{digest}.css"
+    path = os.path.join(STATIC_DIR, name)
+    if not os.path.exists(path):
+        try:
+            for stale in glob.glob(os.path.join(STATIC_DIR, "app.*.css")):
+                os.remove(stale)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(css)
+        except OSError as e:
+            # Read-only deploy without a prebuilt asset: fall back to inline CSS
+            print(f"⚠️ Could not write {name}: {e}")
+            return None, css
+    return name, css
+
+
+def stylesheet_markup(static_serving=True):
+    """
+    Markup that loads the app styles: a one-line @import of the hashed asset, or the
+    minified CSS inline when static file serving is disabled.
+    """
+    name, css = build_stylesheet()
+    if static_serving and name:
+        return f"<style>@import url('{STATIC_URL}/{name}');</style>"
+    # Inline URLs resolve against the page, and fonts are only reachable through static serving
+    if static_serving:
+        return "<style>" + css.replace("url('fonts/", f"url('{STATIC_URL}/fonts/") + "</style>"
+    return f"<style>{FONT_FACE.sub('', css)}</style>"
+
+
+def fetch_fonts():
+    """Download the self-hosted font files into static/fonts (run once at build time)"""
+    import urllib.request
+
+    font_dir = os.path.join(STATIC_DIR, "fonts")
+    os.makedirs(font_dir, exist_ok=True)
+    for name, url in FONT_FILES.items():
+        path = os.path.join(font_dir, name)
+        if os.path.exists(path):
+            print(f"✅ {name} already present")
+            continue
+        urllib.request.urlretrieve(url, path)
+        print(f"⬇️ {name}: {os.path.getsize(path)} bytes")
+
+
+def tree_payload_bytes(node):
+    """Serialized size of every element and block proto under an AppTest tree node"""
+    size = 0
+    proto = getattr(node, "proto", None)
+    if proto is not None and hasattr(proto, "ByteSize"):
+        size += proto.ByteSize()
+    children = getattr(node, "children", None)
+    if isinstance(children, dict):
+        size += sum(tree_payload_bytes(child) for child in children.values())
+    return size
+
+
+def measure_rerun_payload(script="streamlit_app.py", reruns=3, timeout=30):
+    """Bytes of element deltas the app sends per rerun (first run and repeat reruns)"""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(script, default_timeout=timeout)
+    sizes = []
+    for _ in range(reruns):
+        at.run()
+        sizes.append(tree_payload_bytes(at._tree))
+    return sizes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build and measure the web UI's front-end assets")
+    parser.add_argument("--build", action="store_true", help="Write the hashed, minified stylesheet")
+    parser.add_argument("--fetch-fonts", action="store_true", help="Download self-hosted fonts into static/fonts")
+    parser.add_argument("--measure", action="store_true", help="Report per-rerun payload bytes via AppTest")
+    parser.add_argument("--script", default="streamlit_app.py")
+    args = parser.parse_args()
+
+    if args.build:
+        name, css = build_stylesheet()
+        print(f"🎨 static/{name}: {len(css)} bytes")
+    if args.fetch_fonts:
+        fetch_fonts()
+    if args.measure:
+        for i, size in enumerate(measure_rerun_payload(args.script), 1):
+            print(f"📦 Rerun {i}: {size / 1024:.1f} KB of element payload")
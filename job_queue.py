@@ -0,0 +1,220 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+
+from campaign_store import get_connection, DB_PATH
+
+
+# Shared by the web tier and every worker (a SQLite file, so workers need working file locks on it)
+QUEUE_DB_PATH = os.getenv("JOB_QUEUE_DB_PATH", DB_PATH)
+DEFAULT_LEASE_S = float(os.getenv("JOB_LEASE_S", "60"))
+DEFAULT_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+FINAL_STATUSES = ("done", "failed", "cancelled")
+
+
+def _row_to_job(row):
+    if row is None:
+        return None
+    job = dict(row)
+    job["payload"] = json.loads(job.pop("payload_json"))
+    result_json = job.pop("result_json")
+    job["result"] = json.loads(result_json) if result_json else None
+    return job
+
+
+def enqueue(payload, idempotency_key=None, max_attempts=DEFAULT_MAX_ATTEMPTS, db_path=None):
+    """Queue a job and return its id; re-enqueueing an idempotency key returns the existing job"""
+    now = time.time()
+    job_id = uuid.uuid4().hex
+    conn = get_connection(db_path or QUEUE_DB_PATH)
+    try:
+        try:
+            conn.execute(
+                "INSERT INTO jobs (id, idempotency_key, status, payload_json, max_attempts, created_at, updated_at) "
+                "VALUES (?, ?, 'queued', ?, ?, ?, ?)",
+                (job_id, idempotency_key, json.dumps(payload), max_attempts, now, now)
+            )
+            conn.commit()
+            return job_id
+        except sqlite3.IntegrityError:
+            conn.rollback()
+            row = conn.execute("SELECT id FROM jobs WHERE idempotency_key = ?", (idempotency_key,)).fetchone()
+            return row["id"]
+    finally:
+        conn.close()
+
+
+def claim(worker_id, lease_s=DEFAULT_LEASE_S, db_path=None):
+    """
+    Atomically lease the oldest runnable job to worker_id (None if the queue is empty).
+    Running jobs whose lease expired (a worker died) are runnable again until max_attempts.
+    """
+    now = time.time()
+    conn = get_connection(db_path or QUEUE_DB_PATH)
+    try:
+        # Take the write lock before picking the job so concurrent claims are serialised.
+        # SQLite has no row locks; a Postgres port would pick the job with FOR UPDATE SKIP LOCKED.
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute(
+            """
+            UPDATE jobs
+            SET status = 'running', lease_owner = ?, lease_expires_at = ?,
+                attempts = attempts + 1, updated_at = ?
+            WHERE id = (
+                SELECT id FROM jobs
+                WHERE cancel_requested = 0 AND attempts < max_attempts
+                  AND (status = 'queued' OR (status = 'running' AND lease_expires_at < ?))
+                ORDER BY created_at
+                LIMIT 1
+            )
+            RETURNING *
+            """,
+            (worker_id, now + lease_s, now, now)
+        ).fetchone()
+        conn.commit()
+        return _row_to_job(row)
+    finally:
+        conn.close()
+
+
+def heartbeat(job_id, worker_id, lease_s=DEFAULT_LEASE_S, db_path=None):
+    """
+    Extend worker_id's lease; returns 'held', 'cancel' (held, but cancellation was
+    requested) or 'lost' (lease expired and the job was reclaimed or finished).
+    """
+    conn = get_connection(db_path or QUEUE_DB_PATH)
+    try:
+        row = conn.execute(
+            "UPDATE jobs SET lease_expires_at = ?, updated_at = ? "
+            "WHERE id = ? AND lease_owner = ? AND status = 'running' "
+            "RETURNING cancel_requested",
+            (time.time() + lease_s, time.time(), job_id, worker_id)
+        ).fetchone()
+        conn.commit()
+        if row is None:
+            return "lost"
+        return "cancel" if row["cancel_requested"] else "held"
+    finally:
+        conn.close()
+
+
+def complete(job_id, result, db_path=None):
+    """
+    Store a job's result. Idempotent: the first result written wins and later writes
+    (e.g. from a worker whose lease was reclaimed) are ignored. Returns True if written.
+    """
+    conn = get_connection(db_path or QUEUE_DB_PATH)
+    try:
+        cursor = conn.execute(
+            "UPDATE jobs SET status = 'done', result_json = ?, error = NULL, lease_owner = NULL, "
+            "lease_expires_at = NULL, updated_at = ? WHERE id = ? AND status NOT IN ('done', 'failed', 'cancelled')",
+            (json.dumps(result), time.time(), job_id)
+        )
+        conn.commit()
+        return cursor.rowcount == 1
+    finally:
+        conn.close()
+
+
+def fail(job_id, worker_id, error, db_path=None):
+    """Release a failed attempt: requeue it, or mark it failed once max_attempts is used up"""
+    conn = get_connection(db_path or QUEUE_DB_PATH)
+    try:
+        conn.execute(
+            "UPDATE jobs SET status = CASE WHEN attempts < max_attempts THEN 'queued' ELSE 'failed' END, "
+            "error = ?, lease_owner = NULL, lease_expires_at = NULL, updated_at = ? "
+            "WHERE id = ? AND lease_owner = ? AND status = 'running'",
+            (str(error)[:1000], time.time(), job_id, worker_id)
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def release(job_id, worker_id, db_path=None):
+    """Hand a job back without using up an attempt (worker shutting down)"""
+    conn = get_connection(db_path or QUEUE_DB_PATH)
+    try:
+        conn.execute(
+            "UPDATE jobs SET status = 'queued', attempts = CASE WHEN attempts > 0 THEN attempts - 1 ELSE 0 END, lease_owner = NULL, "
+            "lease_expires_at = NULL, updated_at = ? WHERE id = ? AND lease_owner = ? AND status = 'running'",
+            (time.time(), job_id, worker_id)
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def mark_cancelled(job_id, db_path=None):
+    conn = get_connection(db_path or QUEUE_DB_PATH)
+    try:
+        conn.execute(
+            "UPDATE jobs SET status = 'cancelled', lease_owner = NULL, lease_expires_at = NULL, updated_at = ? "
+            "WHERE id = ? AND status NOT IN ('done', 'failed', 'cancelled')",
+            (time.time(), job_id)
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def request_cancel(job_id, db_path=None):
+    """Cancel a job: queued jobs immediately, running ones at the worker's next heartbeat"""
+    conn = get_connection(db_path or QUEUE_DB_PATH)
+    try:
+        now = time.time()
+        conn.execute("UPDATE jobs SET cancel_requested = 1, updated_at = ? WHERE id = ?", (now, job_id))
+        conn.execute(
+            "UPDATE jobs SET status = 'cancelled', updated_at = ? WHERE id = ? AND status = 'queued'",
+            (now, job_id)
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def reclaim_expired(db_path=None):
+    """
+    Sweep running jobs whose lease expired: requeue them, or fail them once
+    max_attempts is used up. Returns the number of jobs reclaimed.
+    """
+    now = time.time()
+    conn = get_connection(db_path or QUEUE_DB_PATH)
+    try:
+        cursor = conn.execute(
+            "UPDATE jobs SET status = CASE WHEN cancel_requested = 1 THEN 'cancelled' "
+            "WHEN attempts < max_attempts THEN 'queued' ELSE 'failed' END, "
+            "error = COALESCE(error, 'lease expired'), lease_owner = NULL, lease_expires_at = NULL, updated_at = ? "
+            "WHERE status = 'running' AND lease_expires_at < ?",
+            (now, now)
+        )
+        conn.commit()
+        return cursor.rowcount
+    finally:
+        conn.close()
+
+
+def get_job(job_id, db_path=None):
+    conn = get_connection(db_path or QUEUE_DB_PATH)
+    try:
+        return _row_to_job(conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+    finally:
+        conn.close()
+
+
+def queue_stats(db_path=None):
+    """Job counts by status plus workers holding live leases"""
+    conn = get_connection(db_path or QUEUE_DB_PATH)
+    try:
+        counts = {row["status"]: row["n"] for row in
+                  conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status")}
+        workers = conn.execute(
+            "SELECT COUNT(DISTINCT lease_owner) AS n FROM jobs WHERE status = 'running' AND lease_expires_at >= ?",
+            (time.time(),)
+        ).fetchone()["n"]
+        return {"counts": counts, "active_workers": workers}
+    finally:
+        conn.close()
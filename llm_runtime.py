@@ -0,0 +1,229 @@
+import copy
+import time
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+
+from llm_scheduler import scheduler
+from cassettes import replay_or_record
+from context_cache import context_cache
+from token_budget import session_budget
+
+
+# Token counts are estimated from text, so a completion this close to max_tokens was cut off
+CAP_HIT_RATIO = 0.9
+
+
+class CampaignCancelled(Exception):
+    """Raised at the next checkpoint after a campaign's cancellation token fires"""
+
+
+class DeadlineExceeded(Exception):
+    """Raised at the next checkpoint once a campaign's deadline has passed"""
+
+
+class Deadline:
+    """End-to-end time budget for one campaign"""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self):
+        return time.monotonic() >= self.expires_at
+
+
+class CancellationToken:
+    """Cooperative cancellation flag shared by the UI and a running generation"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.reason = None
+
+    def cancel(self, reason="cancelled"):
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise CampaignCancelled(f"Campaign generation {self.reason}")
+
+
+class UsageMeter:
+    """Estimated tokens and call count for the LLM calls made under one run_context"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def add(self, prompt_tokens, completion_tokens):
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens
+            }
+
+
+class RunContext:
+    """Per-request settings that follow a campaign or agent test down to each LLM call"""
+
+    def __init__(self, tenant="default", priority="interactive", cancel_token=None, deadline=None,
+                 max_tokens=None, usage=None, budget=None, cap_hits=None):
+        self.tenant = tenant
+        self.priority = priority
+        self.cancel_token = cancel_token
+        self.deadline = deadline
+        self.max_tokens = max_tokens
+        self.usage = usage
+        self.budget = budget
+        # List that collects the completion tokens of calls cut off at their max_tokens
+        self.cap_hits = cap_hits
+
+    def check_cancelled(self):
+        if self.cancel_token is not None:
+            self.cancel_token.raise_if_cancelled()
+
+    def checkpoint(self):
+        """Stop here if this run has been cancelled or has run out of time"""
+        self.check_cancelled()
+        if self.deadline is not None and self.deadline.expired:
+            raise DeadlineExceeded(f"Campaign deadline of {self.deadline.seconds:g}s reached")
+
+    def time_left(self, default):
+        """default seconds, or less if the deadline is closer"""
+        if self.deadline is None:
+            return default
+        return max(0.1, min(default, self.deadline.remaining()))
+
+
+_current_run = contextvars.ContextVar("campaign_run", default=None)
+
+
+def current_run():
+    """The active RunContext (a default one outside run_context)"""
+    return _current_run.get() or RunContext()
+
+
+@contextmanager
+def run_context(**settings):
+    """Scope LLM calls made inside the block; unspecified settings are inherited"""
+    merged = dict(vars(current_run()))
+    merged.update(settings)
+    token = _current_run.set(RunContext(**merged))
+    try:
+        yield _current_run.get()
+    finally:
+        _current_run.reset(token)
+
+
+# Latest in-flight generation per owner (e.g. Streamlit session id)
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def start_generation(owner):
+    """New cancellation token for owner; cancels the generation it supersedes"""
+    token = CancellationToken()
+    with _inflight_lock:
+        previous = _inflight.get(owner)
+        _inflight[owner] = token
+    if previous is not None:
+        previous.cancel("superseded by a newer request")
+    return token
+
+
+def finish_generation(owner, token):
+    with _inflight_lock:
+        if _inflight.get(owner) is token:
+            del _inflight[owner]
+
+
+def estimate_tokens(value):
+    """Rough token count (about four characters per token)"""
+    if isinstance(value, list):
+        return sum(estimate_tokens(m.get("content", "") if isinstance(m, dict) else m) for m in value)
+    return len(str(value or "")) // 4
+
+
+def _call_with_overrides(llm, original_call, overrides, messages, *args, **kwargs):
+    """Call the LLM with per-call attribute overrides without touching the shared instance"""
+    if not overrides:
+        return original_call(messages, *args, **kwargs)
+    clone = copy.copy(llm)
+    for name, value in overrides.items():
+        object.__setattr__(clone, name, value)
+    # Use the class method: the clone carries our patched instance-level call
+    return type(llm).call(clone, messages, *args, **kwargs)
+
+
+def install_llm_hooks(llm):
+    """Route every call on this LLM instance through record/replay, the fair scheduler and the context cache"""
+    if isinstance(llm, str) or getattr(llm, "_campaign_hooks_installed", False):
+        return llm
+
+    original_call = llm.call
+    model = getattr(llm, "model", type(llm).__name__)
+
+    @functools.wraps(original_call)
+    def managed_call(messages, *args, **kwargs):
+        run = current_run()
+        run.checkpoint()
+        prompt_tokens = estimate_tokens(messages)
+        # Campaign, session and daily budgets: may pick a cheaper model or shorter output, or raise
+        budget = run.budget or session_budget(run.tenant)
+        budget_overrides = budget.plan_call(model, prompt_tokens, run.max_tokens)
+
+        def scheduled_call():
+            with scheduler.slot(run.tenant, run.priority, cost=max(1, prompt_tokens),
+                                abort_check=run.checkpoint) as slot:
+                run.checkpoint()
+                overrides = {}
+                if run.deadline is not None:
+                    # Only the time left in the campaign, not the global LITELLM_REQUEST_TIMEOUT
+                    overrides["timeout"] = run.time_left(float(getattr(llm, "timeout", None) or 120))
+                if run.max_tokens:
+                    overrides["max_tokens"] = run.max_tokens
+                overrides.update(budget_overrides)
+                # Stable persona + brief prefix is registered once and reused by handle
+                send_messages, _ = context_cache.prepare(messages) if isinstance(messages, list) else (messages, None)
+                result = _call_with_overrides(llm, original_call, overrides, send_messages, *args, **kwargs)
+                slot.tokens_used = prompt_tokens + estimate_tokens(result)
+            return result
+
+        # Replayed calls never reach the scheduler or the network
+        result = replay_or_record("llm", model, {"messages": messages}, scheduled_call)
+        # A provider call can't be interrupted mid-flight, so drop its result if cancelled meanwhile
+        run.check_cancelled()
+        completion_tokens = estimate_tokens(result)
+        if run.usage is not None:
+            run.usage.add(prompt_tokens, completion_tokens)
+        budget.charge(budget_overrides.get("model", model), prompt_tokens, completion_tokens)
+        # LLM.call only returns text, so a completion that fills its max_tokens counts as cut off
+        max_tokens = budget_overrides.get("max_tokens", run.max_tokens)
+        if run.cap_hits is not None and max_tokens and completion_tokens >= CAP_HIT_RATIO * max_tokens:
+            run.cap_hits.append(completion_tokens)
+        return result
+
+    # LLM classes may be pydantic models, so bypass attribute validation
+    object.__setattr__(llm, "call", managed_call)
+    object.__setattr__(llm, "_campaign_hooks_installed", True)
+    return llm
@@ -0,0 +1,224 @@
+import os
+import math
+import time
+import itertools
+import threading
+from collections import deque, defaultdict
+from contextlib import contextmanager
+
+
+# Lower rank is served first; batch work only runs when no interactive call is waiting
+PRIORITY_CLASSES = {"interactive": 0, "batch": 1}
+
+MAX_CONCURRENT = int(os.getenv("LLM_MAX_CONCURRENT", "4"))
+TENANT_TOKENS_PER_MIN = int(os.getenv("LLM_TENANT_TOKENS_PER_MIN", "0"))
+
+# Batch requests waiting longer than this are served alongside interactive ones
+BATCH_MAX_WAIT_S = float(os.getenv("LLM_BATCH_MAX_WAIT_S", "30"))
+
+
+def _percentile(ordered, pct):
+    if not ordered:
+        return 0.0
+    return round(ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)], 3)
+
+
+class _Tenant:
+    def __init__(self, weight, last_finish=0.0):
+        self.weight = weight
+        self.last_finish = last_finish
+        self.usage = deque()
+        self.tokens_in_window = 0
+        # Granted calls still running; a tenant is only forgotten once this is 0
+        self.active = 0
+
+
+class _Request:
+    def __init__(self, tenant, priority, start_tag, finish_tag, seq):
+        self.tenant = tenant
+        self.priority = priority
+        self.start_tag = start_tag
+        self.finish_tag = finish_tag
+        self.seq = seq
+        self.enqueued = time.monotonic()
+        self.granted = threading.Event()
+
+    def sort_key(self, now):
+        rank = PRIORITY_CLASSES.get(self.priority, 1)
+        if rank and now - self.enqueued > BATCH_MAX_WAIT_S:
+            rank = 0
+        return (rank, self.finish_tag, self.seq)
+
+
+class FairScheduler:
+    """
+    Weighted fair queuing of LLM calls across tenants (one tenant per user session).
+    Each request gets a virtual finish tag of start + cost / weight, so a tenant that
+    submits many calls is interleaved with everyone else instead of running first.
+    """
+
+    def __init__(self, max_concurrent=MAX_CONCURRENT, tokens_per_min=TENANT_TOKENS_PER_MIN,
+                 quota_window_s=60.0, history=1000):
+        self.max_concurrent = max_concurrent
+        self.tokens_per_min = tokens_per_min
+        self.quota_window_s = quota_window_s
+        self._lock = threading.Lock()
+        self._tenants = {}
+        self._weights = {}
+        self._queue = []
+        self._seq = itertools.count()
+        self._virtual_time = 0.0
+        self._active = 0
+        self._waits = {name: deque(maxlen=history) for name in PRIORITY_CLASSES}
+        self._served = defaultdict(int)
+        self._swept_at = 0.0
+
+    def set_weight(self, tenant, weight):
+        """Give a tenant a larger (or smaller) share of LLM capacity"""
+        with self._lock:
+            self._weights[tenant] = weight
+            if tenant in self._tenants:
+                self._tenants[tenant].weight = weight
+
+    def _tenant(self, name):
+        tenant = self._tenants.get(name)
+        if tenant is None:
+            # New or returning tenants start at the current virtual time, with no backlog
+            tenant = _Tenant(self._weights.get(name, 1.0), self._virtual_time)
+            self._tenants[name] = tenant
+        return tenant
+
+    def _forget_if_idle(self, name, now, queued=None):
+        """Drop a tenant with nothing queued, in flight or left in its quota window"""
+        tenant = self._tenants.get(name)
+        if tenant is None or tenant.active:
+            return
+        self._expire_usage(tenant, now)
+        if queued is None:
+            queued = {request.tenant for request in self._queue}
+        if not tenant.usage and name not in queued:
+            del self._tenants[name]
+
+    def _sweep(self, now):
+        """Forget tenants kept only by their quota window once it has emptied (at most once a second)"""
+        if now - self._swept_at < 1.0:
+            return
+        self._swept_at = now
+        queued = {request.tenant for request in self._queue}
+        for name in list(self._tenants):
+            self._forget_if_idle(name, now, queued)
+
+    def _expire_usage(self, tenant, now):
+        while tenant.usage and now - tenant.usage[0][0] > self.quota_window_s:
+            tenant.tokens_in_window -= tenant.usage.popleft()[1]
+
+    def _over_quota(self, name, now):
+        if not self.tokens_per_min:
+            return False
+        tenant = self._tenants[name]
+        self._expire_usage(tenant, now)
+        return tenant.tokens_in_window >= self.tokens_per_min * self.quota_window_s / 60.0
+
+    def _dispatch(self):
+        """Grant free slots to the best queued requests (caller holds the lock)"""
+        now = time.monotonic()
+        self._sweep(now)
+        while self._active < self.max_concurrent and self._queue:
+            candidates = sorted(self._queue, key=lambda r: r.sort_key(now))
+            chosen = next((r for r in candidates if not self._over_quota(r.tenant, now)), None)
+            if chosen is None:
+                return
+            self._queue.remove(chosen)
+            self._virtual_time = max(self._virtual_time, chosen.start_tag)
+            self._active += 1
+            self._tenants[chosen.tenant].active += 1
+            self._waits[chosen.priority].append(now - chosen.enqueued)
+            self._served[chosen.priority] += 1
+            chosen.granted.set()
+
+    def acquire(self, tenant="default", priority="interactive", cost=1.0, abort_check=None):
+        """
+        Block until the request is scheduled; returns the queued request.
+        abort_check is polled while waiting and may raise to leave the queue early.
+        """
+        if priority not in PRIORITY_CLASSES:
+            priority = "batch"
+        with self._lock:
+            state = self._tenant(tenant)
+            start = max(self._virtual_time, state.last_finish)
+            state.last_finish = start + cost / state.weight
+            request = _Request(tenant, priority, start, state.last_finish, next(self._seq))
+            self._queue.append(request)
+            self._dispatch()
+
+        # Re-check periodically so quota windows, batch ageing and cancellation take effect
+        while not request.granted.wait(timeout=0.5):
+            if abort_check is not None:
+                try:
+                    abort_check()
+                except BaseException:
+                    with self._lock:
+                        if request in self._queue:
+                            self._queue.remove(request)
+                            self._forget_if_idle(tenant, time.monotonic())
+                            raise
+                    # Granted in the meantime: hand the slot straight back
+                    self.release(request)
+                    raise
+            with self._lock:
+                self._dispatch()
+        return request
+
+    def release(self, request, tokens_used=0):
+        """Free the slot and charge the tenant's token quota"""
+        with self._lock:
+            self._active -= 1
+            tenant = self._tenants[request.tenant]
+            tenant.active -= 1
+            # Usage is only kept while a quota applies
+            if tokens_used and self.tokens_per_min:
+                tenant.usage.append((time.monotonic(), tokens_used))
+                tenant.tokens_in_window += tokens_used
+            self._dispatch()
+            # Forget idle tenants so finished sessions don't accumulate (quota-only ones go in _sweep)
+            self._forget_if_idle(request.tenant, time.monotonic())
+
+    @contextmanager
+    def slot(self, tenant="default", priority="interactive", cost=1.0, abort_check=None):
+        """Hold one LLM slot; set slot.tokens_used inside the block to charge the quota"""
+        request = self.acquire(tenant, priority, cost, abort_check)
+        request.tokens_used = 0
+        try:
+            yield request
+        finally:
+            self.release(request, request.tokens_used)
+
+    def metrics(self):
+        """Queue depth and wait-time figures per priority class"""
+        with self._lock:
+            self._sweep(time.monotonic())
+            depth = defaultdict(int)
+            tenants = defaultdict(int)
+            for request in self._queue:
+                depth[request.priority] += 1
+                tenants[request.tenant] += 1
+            waits = {name: sorted(values) for name, values in self._waits.items()}
+            result = {
+                "active": self._active,
+                "max_concurrent": self.max_concurrent,
+                "queue_depth": {name: depth[name] for name in PRIORITY_CLASSES},
+                "queued_tenants": len(tenants),
+                "tracked_tenants": len(self._tenants),
+                "classes": {}
+            }
+            for name, values in waits.items():
+                result["classes"][name] = {
+                    "served": self._served[name],
+                    "wait_p50_s": _percentile(values, 50),
+                    "wait_p95_s": _percentile(values, 95),
+                    "wait_max_s": round(values[-1], 3) if values else 0.0
+                }
+            return result
+
+
+scheduler = FairScheduler()
@@ -0,0 +1,211 @@
+import os
+import gc
+import math
+import json
+import time
+import argparse
+import threading
+from datetime import datetime
+
+from fake_llm_server import start_fake_llm_server
+
+
+APP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "streamlit_app.py")
+
+SAMPLE_PRODUCT = "AI-powered fitness tracker with personalized coaching"
+SAMPLE_GOAL = "Acquire 50,000 new users in 6 months"
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def current_rss_bytes():
+    """Resident set size of this process"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def find_button(at, label_prefix=None, key=None):
+    for button in at.button:
+        if key is not None and button.key == key:
+            return button
+        if label_prefix is not None and button.label.startswith(label_prefix):
+            return button
+    raise LookupError(f"Button not found: {label_prefix or key}")
+
+
+class SessionResult:
+    def __init__(self):
+        self.rerun_latencies = []
+        self.generation_latencies = []
+        self.agent_test_latencies = []
+        self.errors = []
+        self.interactions = 0
+
+
+def run_session(at, iterations, timeout, result):
+    """Drive one simulated user through the Campaign Builder and Test AI Agents tabs"""
+    def timed_run(bucket):
+        start = time.perf_counter()
+        at.run(timeout=timeout)
+        bucket.append(time.perf_counter() - start)
+        result.interactions += 1
+        if at.exception:
+            result.errors.append(str(at.exception[0].value)[:200])
+
+    try:
+        timed_run(result.rerun_latencies)
+
+        for _ in range(iterations):
+            # Campaign Builder: fill the brief (one rerun per widget) then generate
+            at.text_area[0].input(SAMPLE_PRODUCT)
+            timed_run(result.rerun_latencies)
+            at.text_area[1].input(SAMPLE_GOAL)
+            timed_run(result.rerun_latencies)
+
+            find_button(at, label_prefix="🚀 Generate AI Campaign").click()
+            timed_run(result.generation_latencies)
+
+            # Test AI Agents: single-agent test button
+            find_button(at, key="test_research").click()
+            timed_run(result.agent_test_latencies)
+
+            # Plain interaction rerun with a plan already in session state
+            timed_run(result.rerun_latencies)
+    except Exception as e:
+        result.errors.append(f"{type(e).__name__}: {str(e)[:200]}")
+
+
+def run_level(sessions, iterations, timeout):
+    """Run N concurrent sessions and collect latency, throughput and memory figures"""
+    from streamlit.testing.v1 import AppTest
+
+    gc.collect()
+    rss_before = current_rss_bytes()
+
+    apps = [AppTest.from_file(APP_FILE, default_timeout=timeout) for _ in range(sessions)]
+    results = [SessionResult() for _ in range(sessions)]
+    threads = [
+        threading.Thread(target=run_session, args=(at, iterations, timeout, res), daemon=True)
+        for at, res in zip(apps, results)
+    ]
+
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    # Sessions are still alive here, so the RSS delta approximates their footprint
+    rss_after = current_rss_bytes()
+
+    reruns = [x for r in results for x in r.rerun_latencies]
+    generations = [x for r in results for x in r.generation_latencies]
+    agent_tests = [x for r in results for x in r.agent_test_latencies]
+    interactions = sum(r.interactions for r in results)
+    errors = [e for r in results for e in r.errors]
+
+    del apps
+    gc.collect()
+
+    return {
+        "sessions": sessions,
+        "elapsed_s": round(elapsed, 3),
+        "interactions": interactions,
+        "throughput_per_s": round(interactions / elapsed, 3) if elapsed else 0.0,
+        "rerun_p50_s": round(percentile(reruns, 50), 4),
+        "rerun_p95_s": round(percentile(reruns, 95), 4),
+        "rerun_p99_s": round(percentile(reruns, 99), 4),
+        "generation_p50_s": round(percentile(generations, 50), 4),
+        "generation_p95_s": round(percentile(generations, 95), 4),
+        "agent_test_p50_s": round(percentile(agent_tests, 50), 4),
+        "agent_test_p95_s": round(percentile(agent_tests, 95), 4),
+        "memory_per_session_mb": round(max(0, rss_after - rss_before) / sessions / 1024 / 1024, 2),
+        "errors": len(errors),
+        "sample_errors": errors[:3]
+    }
+
+
+def find_collapse_point(levels, min_gain=0.1, max_rerun_p95=None):
+    """First level where adding sessions stops adding throughput (or reruns get too slow)"""
+    best = None
+    for level in levels:
+        if max_rerun_p95 and level["rerun_p95_s"] > max_rerun_p95:
+            return level["sessions"]
+        if level["errors"]:
+            return level["sessions"]
+        if best is not None and level["throughput_per_s"] < best * (1 + min_gain):
+            return level["sessions"]
+        best = max(best or 0, level["throughput_per_s"])
+    return None
+
+
+def print_report(levels, collapse_at):
+    print("\n" + "=" * 100)
+    print("📈 STREAMLIT LOAD TEST REPORT")
+    print("=" * 100)
+    print(f"{'sessions':>8} {'thr/s':>8} {'rerun p50':>10} {'rerun p95':>10} {'rerun p99':>10} "
+          f"{'gen p50':>9} {'gen p95':>9} {'agent p95':>10} {'MB/sess':>8} {'errors':>7}")
+    for level in levels:
+        print(f"{level['sessions']:>8} {level['throughput_per_s']:>8} {level['rerun_p50_s']:>10} "
+              f"{level['rerun_p95_s']:>10} {level['rerun_p99_s']:>10} {level['generation_p50_s']:>9} "
+              f"{level['generation_p95_s']:>9} {level['agent_test_p95_s']:>10} "
+              f"{level['memory_per_session_mb']:>8} {level['errors']:>7}")
+    print("-" * 100)
+    if collapse_at:
+        print(f"💥 Throughput collapses at {collapse_at} concurrent sessions")
+    else:
+        print("✅ No throughput collapse within the tested range")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for streamlit_app.py")
+    parser.add_argument("--levels", default="1,2,4,8,16", help="Comma-separated concurrent session counts")
+    parser.add_argument("--iterations", type=int, default=2, help="Scenario repetitions per session")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Fake LLM seconds per completion")
+    parser.add_argument("--timeout", type=float, default=300, help="Per-rerun timeout in seconds")
+    parser.add_argument("--max-rerun-p95", type=float, default=None,
+                        help="Treat a level as collapsed once rerun p95 exceeds this many seconds")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    server, base_url = start_fake_llm_server(latency=args.llm_latency)
+    os.environ["CAMPAIGN_LLM_BASE_URL"] = base_url
+    os.environ.setdefault("GEMINI_API_KEY", "load-test-key")
+    print(f"🤖 Fake LLM at {base_url} ({args.llm_latency}s per completion)")
+
+    levels = []
+    for sessions in [int(x) for x in args.levels.split(",") if x.strip()]:
+        print(f"🚦 Running {sessions} concurrent session(s)...")
+        levels.append(run_level(sessions, args.iterations, args.timeout))
+
+    collapse_at = find_collapse_point(levels, max_rerun_p95=args.max_rerun_p95)
+    print_report(levels, collapse_at)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "created_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "llm_latency_s": args.llm_latency,
+                "llm_requests": server.request_count,
+                "levels": levels,
+                "collapse_at_sessions": collapse_at
+            }, f, indent=2)
+        print(f"💾 Report saved to {args.output}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+import os
+import re
+import copy
+import time
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Research runs once per market cluster (or once for all regions with MULTI_GEO_RESEARCH=shared);
+# regions without a known cluster share "Global" research
+MARKET_CLUSTERS = {
+    "Americas": ("north america", "usa", "us", "canada", "latin america"),
+    "EMEA": ("uk", "europe", "middle east", "africa"),
+    "APAC": ("india", "asia", "australia")
+}
+SHARED_CLUSTER = "Global"
+RESEARCH_MODE = os.getenv("MULTI_GEO_RESEARCH", "cluster").lower()
+MAX_WORKERS = int(os.getenv("MULTI_GEO_WORKERS", "6"))
+
+# Stages localised per region, after the shared research
+LOCAL_STAGES = ("content", "channel", "schedule")
+
+
+def split_regions(geo_target):
+    """Distinct regions in a free-text geo target like "USA, UK and India" (original spelling kept)"""
+    regions = []
+    for part in re.split(r"[,;/\n]|\band\b|&", str(geo_target or "")):
+        part = part.strip()
+        if part and part.lower() not in (r.lower() for r in regions):
+            regions.append(part)
+    return regions
+
+
+def market_cluster(region):
+    from schedule_solver import parse_regions
+
+    names, _ = parse_regions(region)
+    for cluster, members in MARKET_CLUSTERS.items():
+        if names and all(name in members for name in names):
+            return cluster
+    return SHARED_CLUSTER
+
+
+def cluster_regions(regions, mode=None):
+    """{cluster: [regions]} in first-seen order; one shared cluster when mode is "shared" """
+    if (mode or RESEARCH_MODE) == "shared":
+        return {SHARED_CLUSTER: list(regions)}
+    clusters = {}
+    for region in regions:
+        clusters.setdefault(market_cluster(region), []).append(region)
+    return clusters
+
+
+def split_budget(budget_range, regions):
+    """{region: spend}: the campaign budget shared evenly, so the regions together spend it once"""
+    from budget_optimizer import resolve_budget
+
+    total = resolve_budget(budget_range)
+    return {region: round(total / len(regions), 2) for region in regions}
+
+
+def _join(parts):
+    """Per-region (or per-cluster) sections under their own headings"""
+    if len(parts) == 1:
+        return next(iter(parts.values()))
+    return "\n\n".join(f"### {name}\n\n{text}" for name, text in parts.items())
+
+
+def run_multi_geo(product_description, marketing_goal, budget_range, campaign_duration, industry,
+                  competition_level, regions, use_cache=True, on_update=None, research_mode=None):
+    """
+    Research once per market cluster, then content, channel and schedule for every region in
+    parallel, each prompt carrying its cluster's research in the shared brief prefix. The
+    budget is split evenly across regions (split_budget) before each region's allocation.
+    Returns (combined plan, output_stats); the plan keeps every region's sections under
+    plan["regions"] and joins them into the usual top-level sections.
+    Runs inside generate_campaign_plan's run context (cancellation, deadline and budget are shared).
+    Units pass the shared agents, but each run gets its own pooled copy (crew_executor), so
+    parallel units never share an agent's executor or memory.
+    """
+    from agents import create_tasks, get_agents
+    from campaign_assistant import run_stage
+    from plan_templates import build_skeleton_plan, structured_sections, STAGE_SECTIONS
+
+    research_agent, content_agent, channel_agent, schedule_agent = get_agents()
+    stage_agents = {"content": content_agent, "channel": channel_agent, "schedule": schedule_agent}
+    clusters = cluster_regions(regions, research_mode)
+    started = time.perf_counter()
+
+    plan = build_skeleton_plan(product_description, marketing_goal, budget_range, campaign_duration,
+                               industry, competition_level, ", ".join(regions))
+    base_brief = {
+        "product": product_description,
+        "goal": marketing_goal,
+        "budget": budget_range,
+        "duration": campaign_duration,
+        "industry": industry,
+        "competition": competition_level
+    }
+    lock = threading.Lock()
+    output_stats = {}
+    unit_seconds = []
+
+    def run_unit(stage, agent, task, brief, label):
+        """One stage for one region or cluster; stage lists are tagged with the label"""
+        cached, degraded, stats = [], [], {}
+        unit_start = time.perf_counter()
+        output = str(run_stage(stage, agent, task, brief, use_cache, cached,
+                               degraded_stages=degraded, output_stats=stats))
+        with lock:
+            unit_seconds.append(time.perf_counter() - unit_start)
+            plan["cached_stages"].extend(f"{s} ({label})" for s in cached)
+            plan["degraded_stages"].extend({**d, "stage": f"{d['stage']} ({label})"} for d in degraded)
+            output_stats.update({f"{s} ({label})": v for s, v in stats.items()})
+        return output, output != brief["templates"][stage]
+
+    def fan_out(jobs):
+        with ThreadPoolExecutor(max_workers=max(1, min(MAX_WORKERS, len(jobs)))) as pool:
+            futures = [pool.submit(contextvars.copy_context().run, run_unit, *job) for job in jobs]
+            return [f.result() for f in futures]
+
+    # Step 1: shared research, one run per market cluster
+    research_jobs = []
+    for cluster, members in clusters.items():
+        market = cluster if cluster == SHARED_CLUSTER else f"{cluster} ({', '.join(members)})"
+        research_task = create_tasks(product_description, marketing_goal, budget_range, campaign_duration,
+                                     market=market)[0]
+        brief = {**base_brief, "region": cluster, "templates": {"research": plan["research_insights"]}}
+        research_jobs.append(("research", research_agent, research_task, brief, cluster))
+    print(f"🔍 Research agent analyzing {len(clusters)} market cluster(s)...")
+    research = {}
+    research_enriched = True
+    for cluster, (output, enriched) in zip(clusters, fan_out(research_jobs)):
+        research[cluster] = output
+        research_enriched = research_enriched and enriched
+
+    # Step 2: localised stages for every region in parallel, sharing their cluster's research
+    cluster_of = {region: cluster for cluster, members in clusters.items() for region in members}
+    region_budgets = split_budget(budget_range, regions)
+    region_plans = {}
+    stage_jobs = []
+    for region in regions:
+        # Each region's allocation and prompts only see its share of the budget
+        region_budget = region_budgets[region]
+        share_pct = round(100 / len(regions), 1)
+        region_plan = build_skeleton_plan(product_description, marketing_goal, region_budget, campaign_duration,
+                                          industry, competition_level, region)
+        budget_allocation, posting_schedule = structured_sections(
+            region_budget, campaign_duration, industry, competition_level, region
+        )
+        _, content_task, channel_task, schedule_task = create_tasks(
+            product_description, marketing_goal, f"${region_budget:,.0f} ({share_pct}% of {budget_range})",
+            campaign_duration, budget_allocation=budget_allocation, posting_schedule=posting_schedule,
+            market=region, research=research[cluster_of[region]]
+        )
+        brief = {
+            **base_brief, "budget": region_budget, "geo": region, "region": region,
+            "templates": {stage: region_plan[STAGE_SECTIONS[stage]] for stage in LOCAL_STAGES}
+        }
+        region_plans[region] = {
+            "cluster": cluster_of[region],
+            "budget": region_budget,
+            "budget_share_pct": share_pct,
+            "enriched_sections": [],
+            **{key: region_plan[key] for key in ("budget_allocation", "posting_calendar")},
+            **{STAGE_SECTIONS[stage]: region_plan[STAGE_SECTIONS[stage]] for stage in LOCAL_STAGES}
+        }
+        for stage, task in zip(LOCAL_STAGES, (content_task, channel_task, schedule_task)):
+            stage_jobs.append((stage, stage_agents[stage], task, brief, region))
+
+    def combine():
+        plan["research_insights"] = _join(research)
+        for stage in LOCAL_STAGES:
+            section = STAGE_SECTIONS[stage]
+            plan[section] = _join({region: region_plans[region][section] for region in regions})
+        # A section counts as enriched once every region's (or cluster's) version is
+        plan["enriched_sections"] = (["research"] if research_enriched else []) + [
+            stage for stage in LOCAL_STAGES
+            if all(stage in region_plans[region]["enriched_sections"] for region in regions)
+        ]
+        plan["regions"] = copy.deepcopy(region_plans)
+
+    combine()
+    if on_update is not None:
+        on_update(copy.deepcopy(plan))
+
+    print(f"🌍 Localising content, channels and schedule for {len(regions)} regions in parallel...")
+
+    def run_region_stage(stage, agent, task, brief, region):
+        output, enriched = run_unit(stage, agent, task, brief, region)
+        with lock:
+            region_plans[region][STAGE_SECTIONS[stage]] = output
+            if enriched:
+                region_plans[region]["enriched_sections"].append(stage)
+            combine()
+            draft = copy.deepcopy(plan) if on_update is not None else None
+        if draft is not None:
+            on_update(draft)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_WORKERS, len(stage_jobs)))) as pool:
+        futures = [pool.submit(contextvars.copy_context().run, run_region_stage, *job) for job in stage_jobs]
+        for future in futures:
+            future.result()
+
+    combine()
+    wall_s = time.perf_counter() - started
+    stage_s = sum(unit_seconds)
+    plan["multi_geo"] = {
+        "regions": regions,
+        "clusters": clusters,
+        "research_runs": len(clusters),
+        "localised_runs": len(stage_jobs),
+        # Stage runs a separate generation per region would have needed
+        "runs_without_fan_out": 4 * len(regions),
+        "wall_s": round(wall_s, 2),
+        "stage_s": round(stage_s, 2),
+        "parallel_speedup": round(stage_s / wall_s, 2) if wall_s else None
+    }
+    return plan, output_stats
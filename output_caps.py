@@ -0,0 +1,153 @@
+import os
+import threading
+from collections import deque
+
+from campaign_store import get_connection
+
+
+CAPS_ENABLED = os.getenv("OUTPUT_TOKEN_CAPS", "on").lower() not in ("0", "off", "false")
+
+# Output length each task's prompt asks for (e.g. "under 300 words"), in tokens
+TARGET_TOKENS = {
+    "research": 400,
+    "content": 500,
+    "channel": 420,
+    "schedule": 360
+}
+
+# Typical uncapped Gemini output per task: what a call cut off at its cap would have run to
+UNCAPPED_BASELINE_TOKENS = {
+    "research": 900,
+    "content": 1100,
+    "channel": 1000,
+    "schedule": 900
+}
+
+MAX_CAP = int(os.getenv("OUTPUT_TOKEN_CAP_MAX", "1500"))
+SHORT_CAP = 200
+# An ad variant line ("N. headline || copy") runs to roughly this many tokens
+TOKENS_PER_VARIANT = 80
+MIN_SAMPLES = 5
+EWMA_ALPHA = 0.2
+
+
+class OutputCapController:
+    """
+    Hard max-output-token caps per task, tuned from observed output lengths.
+    Caps start 25% above the length the prompt asks for (the UI shows sections in full,
+    so the prompt's length is the one to aim for); a cap that calls keep hitting is raised,
+    and a cap well above typical usage is lowered towards it (never below target).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = None
+
+    def _load(self):
+        state = {
+            stage: {"cap": int(target * 1.25), "ewma": None, "samples": 0, "recent_hits": deque(maxlen=20)}
+            for stage, target in TARGET_TOKENS.items()
+        }
+        try:
+            conn = get_connection()
+            try:
+                for row in conn.execute("SELECT stage, cap, ewma_tokens, samples FROM output_caps"):
+                    if row["stage"] in state:
+                        state[row["stage"]].update(cap=row["cap"], ewma=row["ewma_tokens"], samples=row["samples"])
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"⚠️ Could not load output caps: {str(e)[:100]}")
+        return state
+
+    def _stage(self, stage):
+        if self._state is None:
+            self._state = self._load()
+        return self._state.get(stage)
+
+    def cap_for(self, stage, short=False):
+        """max_tokens for this stage's LLM calls (None when caps are disabled or stage unknown)"""
+        if not CAPS_ENABLED:
+            return None
+        with self._lock:
+            state = self._stage(stage)
+            if state is None:
+                return None
+            return min(state["cap"], SHORT_CAP) if short else state["cap"]
+
+    def observe(self, stage, output_tokens, cap_hits=0):
+        """
+        Record one stage output; cap_hits is how many of its LLM calls were cut off at the cap
+        (see llm_runtime). Returns the tokens saved against the uncapped baseline, which is
+        only counted when the cap actually cut a call short.
+        """
+        with self._lock:
+            state = self._stage(stage)
+            if state is None:
+                return 0
+            state["samples"] += 1
+            state["ewma"] = output_tokens if state["ewma"] is None else (
+                EWMA_ALPHA * output_tokens + (1 - EWMA_ALPHA) * state["ewma"]
+            )
+            state["recent_hits"].append(cap_hits > 0)
+            self._adjust(stage, state)
+
+        self._save(stage, state)
+        if not CAPS_ENABLED or not cap_hits:
+            return 0
+        return max(0, UNCAPPED_BASELINE_TOKENS.get(stage, output_tokens) - output_tokens)
+
+    def _adjust(self, stage, state):
+        if state["samples"] < MIN_SAMPLES:
+            return
+        target = TARGET_TOKENS[stage]
+        hits = state["recent_hits"]
+        hit_rate = sum(hits) / len(hits) if hits else 0.0
+        if hit_rate > 0.5:
+            # Most answers are being cut off mid-sentence: give a little more room
+            new_cap = min(MAX_CAP, int(state["cap"] * 1.15))
+        elif state["ewma"] < 0.6 * state["cap"]:
+            new_cap = max(target, int(state["ewma"] * 1.3))
+        else:
+            return
+        if new_cap != state["cap"]:
+            print(f"🎚️ Output cap for {stage}: {state['cap']} -> {new_cap} tokens")
+            state["cap"] = new_cap
+            hits.clear()
+
+    def _save(self, stage, state):
+        try:
+            conn = get_connection()
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO output_caps (stage, cap, ewma_tokens, samples) VALUES (?, ?, ?, ?)",
+                    (stage, state["cap"], state["ewma"], state["samples"])
+                )
+                conn.commit()
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"⚠️ Could not save output cap: {str(e)[:100]}")
+
+    def report(self):
+        with self._lock:
+            if self._state is None:
+                self._state = self._load()
+            return [
+                {
+                    "stage": stage,
+                    "cap": state["cap"],
+                    "target": TARGET_TOKENS[stage],
+                    "avg_output": round(state["ewma"] or 0),
+                    "samples": state["samples"]
+                }
+                for stage, state in self._state.items()
+            ]
+
+
+controller = OutputCapController()
+
+
+def variant_batch_cap(count):
+    """max_tokens for one batch of count ad variants (None when caps are disabled)"""
+    return count * TOKENS_PER_VARIANT + 100 if CAPS_ENABLED else None
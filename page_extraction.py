@@ -0,0 +1,253 @@
+import os
+import re
+import codecs
+from html.parser import HTMLParser
+
+
+# Rough bytes-per-token ratio used to turn a token cap into a byte cap
+BYTES_PER_TOKEN = 4
+
+DEFAULT_MAX_TOKENS = int(os.getenv("SCRAPE_MAX_TOKENS", "1500"))
+DEFAULT_MAX_DOWNLOAD_BYTES = int(os.getenv("SCRAPE_MAX_DOWNLOAD_BYTES", "2000000"))
+
+# Elements that never carry useful page copy
+SKIP_TAGS = {
+    "script", "style", "noscript", "template", "svg", "canvas", "iframe",
+    "nav", "footer", "aside", "form", "button", "select", "head"
+}
+
+# Page chrome whose headings are still kept (site headers and hero banners often hold the h1)
+HEADING_ONLY_TAGS = {"header"}
+
+# Words in class/id tokens ("cookie-consent", "main_nav") that mark navigation, cookie banners and similar chrome
+BOILERPLATE_HINTS = {
+    "nav", "navbar", "menu", "footer", "sidebar", "cookie", "cookies", "consent", "breadcrumb",
+    "breadcrumbs", "popup", "modal", "newsletter", "subscribe"
+}
+# Only whole tokens: "section-header", "hero-banner" or "share-price" are page copy
+BOILERPLATE_TOKENS = {"header", "site-header", "banner", "social", "share", "social-share", "share-buttons"}
+
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link",
+    "meta", "param", "source", "track", "wbr"
+}
+
+HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+
+BLOCK_TAGS = HEADING_TAGS | {
+    "p", "li", "div", "section", "article", "main", "td", "th", "tr",
+    "dt", "dd", "blockquote", "pre", "table", "ul", "ol", "dl", "br"
+}
+
+PRICING_PATTERN = re.compile(
+    r"[$€£¥]\s?\d|\d\s?(usd|eur|gbp)|per (month|year|user|seat)|/\s?(mo|month|yr|year|user)\b"
+    r"|\bpric(e|ing)\b|\bfree trial\b|\bplans?\b",
+    re.IGNORECASE
+)
+
+# Blocks shorter than this are usually link labels or UI fragments
+MIN_BLOCK_CHARS = 40
+
+
+class StreamingTextExtractor(HTMLParser):
+    """Incremental HTML-to-text extractor that keeps headings, pricing and feature copy"""
+
+    def __init__(self, max_bytes):
+        super().__init__(convert_charrefs=True)
+        self.max_bytes = max_bytes
+        self.parts = []
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.blocks_kept = 0
+        self.blocks_dropped = 0
+        self.truncated = False
+        self.done = False
+        self._skip_tag = None
+        self._skip_depth = 0
+        self._skip_keeps_headings = False
+        self._skip_heading = None
+        self._block = []
+        self._block_tag = None
+        self._last_block = None
+
+    def feed_chunk(self, chunk):
+        """Feed one decoded chunk; returns False once the output cap is reached"""
+        if self.done:
+            return False
+        self.bytes_in += len(chunk.encode("utf-8"))
+        self.feed(chunk)
+        return not self.done
+
+    def finish(self):
+        """Flush parser state and return the extracted text"""
+        if not self.done:
+            self.close()
+            self._flush_block()
+        return "\n".join(self.parts)
+
+    def stats(self):
+        return {
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "blocks_kept": self.blocks_kept,
+            "blocks_dropped": self.blocks_dropped,
+            "truncated": self.truncated
+        }
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if self._skip_tag:
+            if tag == self._skip_tag:
+                self._skip_depth += 1
+            elif self._skip_keeps_headings and tag in HEADING_TAGS and not self._skip_heading:
+                self._flush_block()
+                self._skip_heading = tag
+                self._block_tag = tag
+            return
+        boilerplate = tag not in VOID_TAGS and self._boilerplate(attrs)
+        if tag in SKIP_TAGS or tag in HEADING_ONLY_TAGS or boilerplate:
+            self._flush_block()
+            self._skip_tag = tag
+            self._skip_depth = 1
+            self._skip_keeps_headings = tag in HEADING_ONLY_TAGS or boilerplate == "heading-only"
+            if tag in HEADING_TAGS:
+                # A heading that is itself marked as a banner or header
+                self._skip_heading = tag if self._skip_keeps_headings else None
+                self._block_tag = self._skip_heading
+            return
+        if tag in BLOCK_TAGS:
+            self._flush_block()
+            self._block_tag = tag
+
+    def handle_endtag(self, tag):
+        if self.done:
+            return
+        if self._skip_tag:
+            if tag == self._skip_heading:
+                self._flush_block()
+                self._skip_heading = None
+            if tag == self._skip_tag:
+                self._skip_depth -= 1
+                if self._skip_depth == 0:
+                    self._skip_tag = None
+            return
+        if tag in BLOCK_TAGS:
+            self._flush_block()
+
+    def handle_data(self, data):
+        if self.done or (self._skip_tag and not self._skip_heading):
+            return
+        if data.strip() or self._block:
+            self._block.append(data)
+
+    def _boilerplate(self, attrs):
+        """
+        "drop" for navigation/cookie/popup chrome, "heading-only" for header and banner
+        containers (their headings are kept), None for page copy. Class and id values are
+        matched per whitespace-separated token, never as substrings of the whole value.
+        """
+        verdict = None
+        for name, value in attrs:
+            if name not in ("class", "id", "role") or not value:
+                continue
+            for token in value.lower().split():
+                if BOILERPLATE_HINTS.intersection(re.split(r"[-_]", token)):
+                    return "drop"
+                if token in BOILERPLATE_TOKENS:
+                    verdict = "heading-only"
+        return verdict
+
+    def _flush_block(self):
+        text = " ".join("".join(self._block).split())
+        tag = self._block_tag
+        self._block = []
+        self._block_tag = None
+        if not text:
+            return
+        if tag in HEADING_TAGS:
+            line = "## " + text
+        elif tag == "li" and len(text) >= 15:
+            line = "- " + text
+        elif len(text) >= MIN_BLOCK_CHARS or PRICING_PATTERN.search(text):
+            line = text
+        else:
+            self.blocks_dropped += 1
+            return
+        # Repeated blocks (sticky CTAs, duplicated menus) add nothing
+        if line == self._last_block:
+            self.blocks_dropped += 1
+            return
+        self._emit(line)
+
+    def _emit(self, line):
+        size = len(line.encode("utf-8")) + 1
+        if self.bytes_out + size > self.max_bytes:
+            remaining = self.max_bytes - self.bytes_out
+            if remaining > MIN_BLOCK_CHARS:
+                line = line.encode("utf-8")[:remaining - 1].decode("utf-8", "ignore")
+                self.parts.append(line)
+                self.bytes_out += len(line.encode("utf-8")) + 1
+                self.blocks_kept += 1
+            self.truncated = True
+            self.done = True
+            return
+        self.parts.append(line)
+        self.bytes_out += size
+        self.blocks_kept += 1
+        self._last_block = line
+
+
+def resolve_max_bytes(max_bytes=None, max_tokens=None):
+    """Turn an optional byte or token cap into a byte cap"""
+    if max_bytes:
+        return max_bytes
+    return (max_tokens or DEFAULT_MAX_TOKENS) * BYTES_PER_TOKEN
+
+
+def extract_text(chunks, max_bytes=None, max_tokens=None):
+    """Extract page text from an iterable of decoded HTML chunks, stopping at the cap"""
+    extractor = StreamingTextExtractor(resolve_max_bytes(max_bytes, max_tokens))
+    for chunk in chunks:
+        if not extractor.feed_chunk(chunk):
+            break
+    text = extractor.finish()
+    return text, extractor.stats()
+
+
+def iter_decoded_chunks(response, chunk_size=16384, max_download_bytes=DEFAULT_MAX_DOWNLOAD_BYTES, counter=None):
+    """
+    Yield decoded text from a streaming requests response without buffering the body.
+    counter["bytes"] tracks the raw bytes downloaded so far.
+    """
+    decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+    downloaded = 0
+    for raw in response.iter_content(chunk_size=chunk_size):
+        if not raw:
+            continue
+        downloaded += len(raw)
+        if counter is not None:
+            counter["bytes"] = downloaded
+        yield decoder.decode(raw)
+        if downloaded >= max_download_bytes:
+            break
+    yield decoder.decode(b"", final=True)
+
+
+def fetch_page_text(url, headers=None, cookies=None, timeout=15, max_bytes=None, max_tokens=None,
+                    max_download_bytes=DEFAULT_MAX_DOWNLOAD_BYTES):
+    """Stream a page and return (text, stats) with boilerplate removed and output capped"""
+    import requests
+
+    downloaded = {"bytes": 0}
+    with requests.get(url, headers=headers, cookies=cookies or {}, timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        text, stats = extract_text(
+            iter_decoded_chunks(response, max_download_bytes=max_download_bytes, counter=downloaded),
+            max_bytes=max_bytes,
+            max_tokens=max_tokens
+        )
+    # The extractor only sees decoded text; report what actually came over the wire
+    stats["bytes_in"] = downloaded["bytes"]
+    stats["url"] = url
+    return text, stats
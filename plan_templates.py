@@ -0,0 +1,156 @@
+import re
+import copy
+import functools
+from datetime import datetime
+
+from budget_optimizer import optimize_allocation, format_allocation, funded_channels
+from schedule_solver import solve_schedule, format_schedule, calendar_to_json
+
+
+# Plan section filled by each agent stage
+STAGE_SECTIONS = {
+    "research": "research_insights",
+    "content": "content_strategy",
+    "channel": "channel_recommendations",
+    "schedule": "posting_schedule"
+}
+
+INDUSTRY_PROFILES = {
+    "Technology": {
+        "audience": "Tech-savvy early adopters and professionals (25-45) who compare features and read reviews",
+        "trends": "AI-assisted products, privacy expectations, product-led growth and free trials",
+        "competitors": "Established platforms with large ad budgets; differentiate on a specific workflow",
+        "angles": ["Save hours every week", "Built for how you actually work", "Try it free today"]
+    },
+    "Healthcare": {
+        "audience": "Health-conscious consumers and caregivers who value trust, credentials and evidence",
+        "trends": "Preventive care, wearables, telehealth and personalised wellness",
+        "competitors": "Trusted incumbent brands; compete on clarity, outcomes and endorsements",
+        "angles": ["Feel the difference", "Backed by experts", "Your health, simplified"]
+    },
+    "Finance": {
+        "audience": "Financially active adults (28-55) weighing security, fees and long-term value",
+        "trends": "Mobile-first money management, transparency on fees, automation",
+        "competitors": "Banks and fintechs with strong brands; win on transparency and ease",
+        "angles": ["No hidden fees", "Your money, working harder", "Security you can see"]
+    },
+    "E-commerce": {
+        "audience": "Online shoppers (18-44) who respond to social proof, offers and fast delivery",
+        "trends": "Social commerce, short-form video, UGC and loyalty programmes",
+        "competitors": "Marketplaces and DTC brands; stand out with story, reviews and bundles",
+        "angles": ["Loved by thousands", "Limited-time offer", "Free shipping on your first order"]
+    },
+    "Education": {
+        "audience": "Learners and parents seeking career outcomes, flexibility and credibility",
+        "trends": "Online and hybrid learning, micro-credentials, community-based courses",
+        "competitors": "Universities and MOOC platforms; differentiate on outcomes and support",
+        "angles": ["Learn at your own pace", "Skills employers want", "Start learning today"]
+    },
+    "Other": {
+        "audience": "Adults in the product's core niche who are actively looking for a better solution",
+        "trends": "Short-form video, creator partnerships and personalised messaging",
+        "competitors": "Category leaders and substitutes; lead with one clear differentiator",
+        "angles": ["A better way to get it done", "See why people are switching", "Get started today"]
+    }
+}
+
+BUDGET_RULES = {
+    "startup": "Concentrate spend on the top one or two channels and lean on organic content and email.",
+    "smb": "Fund a core paid mix, test creatives weekly and move budget to the best performer by week 2.",
+    "enterprise": "Run a full-funnel mix with dedicated awareness and retargeting budgets and brand lift tracking."
+}
+
+CHANNEL_TIPS = {
+    "Google Ads": "capture high-intent searches; tightly themed ad groups and negative keywords",
+    "Meta": "short video and carousel creatives with lookalike audiences and retargeting",
+    "LinkedIn": "thought-leadership posts and lead-gen forms targeted by job title",
+    "YouTube": "15-30s pre-roll and shorts with a clear hook in the first 5 seconds",
+    "Email": "welcome and nurture sequences with one call-to-action per email"
+}
+
+
+def short_name(product_description):
+    """First clause of the product description, for use in headlines"""
+    first = re.split(r"[.,;:\n]| with | that | for ", str(product_description or "").strip(), maxsplit=1)[0]
+    return first.strip()[:60] or "your product"
+
+
+@functools.lru_cache(maxsize=256)
+def _structured_sections(budget_range, campaign_duration, industry, competition_level, geo_target):
+    """Allocation and calendar for a brief shape; only these keys matter, so they're memoised"""
+    allocation = optimize_allocation(budget_range, industry, competition_level)
+    schedule = solve_schedule(campaign_duration, funded_channels(allocation), geo_target)
+    return allocation, schedule
+
+
+def structured_sections(budget_range, campaign_duration, industry="Other", competition_level=3, geo_target=""):
+    allocation, schedule = _structured_sections(
+        str(budget_range), str(campaign_duration), industry or "Other", int(competition_level or 3), geo_target or ""
+    )
+    # Callers may mutate the plan, so hand out copies of the memoised results
+    return copy.deepcopy(allocation), {**schedule, "calendar": schedule["calendar"].copy()}
+
+
+def build_skeleton_plan(product_description, marketing_goal, budget_range="SMB", campaign_duration="4 weeks",
+                        industry="Other", competition_level=3, geo_target=""):
+    """
+    Complete draft plan from local templates and rules (no LLM calls, a few milliseconds),
+    keyed on industry, budget tier and duration. Agent stages later replace each section.
+    """
+    profile = INDUSTRY_PROFILES.get(industry, INDUSTRY_PROFILES["Other"])
+    name = short_name(product_description)
+    tier = str(budget_range).split()[0].lower() if budget_range else "smb"
+    allocation, schedule = structured_sections(budget_range, campaign_duration, industry, competition_level, geo_target)
+
+    research = "\n".join([
+        f"**Target audience:** {profile['audience']}.",
+        f"**Market trends:** {profile['trends']}.",
+        f"**Competitive landscape:** {profile['competitors']} "
+        f"(competition level {int(competition_level or 3)}/5).",
+        f"**Opportunity:** Tie every message to the goal: {marketing_goal}."
+    ])
+
+    content = "\n".join(
+        ["**Headlines:**"]
+        + [f"{i}. {angle}: {name}" for i, angle in enumerate(profile["angles"], 1)]
+        + [
+            "",
+            "**Messaging themes:** the core benefit, proof (reviews, numbers), and a low-friction first step.",
+            "**Calls to action:** Start free · See how it works · Claim your offer"
+        ]
+    )
+
+    channels = "\n".join(
+        [format_allocation(allocation), "", f"**Approach:** {BUDGET_RULES.get(tier, BUDGET_RULES['smb'])}"]
+        + [f"- **{ch}:** {CHANNEL_TIPS[ch]}" for ch in funded_channels(allocation) if ch in CHANNEL_TIPS]
+    )
+
+    return {
+        "status": "draft",
+        "enriched_sections": [],
+        "campaign_overview": {
+            "product": product_description,
+            "goal": marketing_goal,
+            "budget": budget_range,
+            "duration": campaign_duration,
+            "industry": industry,
+            "competition_level": competition_level,
+            "geo_target": geo_target,
+            "created_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        },
+        "research_insights": research,
+        "content_strategy": content,
+        "channel_recommendations": channels,
+        "budget_allocation": allocation,
+        "posting_schedule": format_schedule(schedule),
+        "posting_calendar": calendar_to_json(schedule),
+        "cached_stages": [],
+        "degraded_stages": [],
+        "next_steps": [
+            "Review and approve content variations",
+            "Set up accounts on recommended platforms",
+            "Configure targeting and budgets",
+            "Launch campaign according to schedule",
+            "Monitor performance and optimize"
+        ]
+    }
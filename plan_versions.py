@@ -0,0 +1,266 @@
+import os
+import json
+import time
+import zlib
+import difflib
+import hashlib
+import argparse
+import functools
+
+from campaign_store import get_connection
+
+try:
+    import zstandard
+    has_zstd = True
+except ImportError:
+    has_zstd = False
+
+
+# Every Nth version of a lineage is stored whole; the rest are deltas against the latest keyframe,
+# so any version is rebuilt from at most two blobs
+KEYFRAME_EVERY = int(os.getenv("PLAN_KEYFRAME_EVERY", "10"))
+DICT_SIZE = 32 * 1024  # zlib's zdict only uses the last 32 KB anyway
+DICT_MAX_SAMPLES = 500
+ZSTD_LEVEL = 19
+
+PLAN_SECTIONS = ["research_insights", "content_strategy", "channel_recommendations", "posting_schedule"]
+
+
+def lineage_key(plan, tenant=None):
+    """
+    The lineage a plan already carries (plan["plan_version"]), else the one shared by iterations
+    of the same product and goal from the same tenant (the session, see llm_runtime.run_context),
+    so different users' plans never end up in one lineage
+    """
+    from stage_cache import normalize
+    from llm_runtime import current_run
+
+    lineage = (plan.get("plan_version") or {}).get("lineage")
+    if lineage:
+        return lineage
+    overview = plan.get("campaign_overview", {})
+    raw = json.dumps([tenant or current_run().tenant, normalize(overview.get("product")),
+                      normalize(overview.get("goal"))])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def encode(data, base=None, dictionary=None):
+    """(codec, blob) for data, as a delta against base if given, else with the trained dictionary"""
+    prefix = base if base is not None else dictionary
+    if has_zstd:
+        params = {"level": ZSTD_LEVEL}
+        if prefix:
+            params["dict_data"] = zstandard.ZstdCompressionDict(
+                prefix, dict_type=zstandard.DICT_TYPE_RAWCONTENT if base is not None else zstandard.DICT_TYPE_AUTO
+            )
+        return "zstd", zstandard.ZstdCompressor(**params).compress(data)
+    compressor = zlib.compressobj(9, zdict=prefix[-DICT_SIZE:]) if prefix else zlib.compressobj(9)
+    return "zlib", compressor.compress(data) + compressor.flush()
+
+
+def decode(codec, blob, base=None, dictionary=None):
+    prefix = base if base is not None else dictionary
+    if codec == "zstd":
+        if not has_zstd:
+            raise RuntimeError("This plan version was stored with zstd: pip install zstandard")
+        params = {}
+        if prefix:
+            params["dict_data"] = zstandard.ZstdCompressionDict(
+                prefix, dict_type=zstandard.DICT_TYPE_RAWCONTENT if base is not None else zstandard.DICT_TYPE_AUTO
+            )
+        return zstandard.ZstdDecompressor(**params).decompress(blob)
+    decompressor = zlib.decompressobj(zdict=prefix[-DICT_SIZE:]) if prefix else zlib.decompressobj()
+    return decompressor.decompress(blob) + decompressor.flush()
+
+
+@functools.lru_cache(maxsize=8)
+def load_dictionary(dict_id, db_path=None):
+    conn = get_connection(db_path)
+    try:
+        row = conn.execute("SELECT data FROM plan_dictionaries WHERE id = ?", (dict_id,)).fetchone()
+        return bytes(row["data"]) if row else None
+    finally:
+        conn.close()
+
+
+def latest_dictionary(conn, codec):
+    row = conn.execute("SELECT id FROM plan_dictionaries WHERE codec = ? ORDER BY id DESC LIMIT 1",
+                       (codec,)).fetchone()
+    return row["id"] if row else None
+
+
+def train_dictionary(max_samples=DICT_MAX_SAMPLES, db_path=None):
+    """
+    Build a compression dictionary from the most recent plan versions and store it for new keyframes:
+    a trained zstd dictionary, or for zlib the most recent plan text as a raw prefix.
+    Returns the dictionary id (None if there are too few plans).
+    """
+    conn = get_connection(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT * FROM plan_versions ORDER BY created_at DESC LIMIT ?", (max_samples,)
+        ).fetchall()
+    finally:
+        conn.close()
+    # Oldest first, so the zlib prefix ends with the most recent plans
+    samples = [_plan_bytes(row, db_path) for row in reversed(rows)]
+    if len(samples) < 10:
+        return None
+    if has_zstd:
+        codec, data = "zstd", zstandard.train_dictionary(DICT_SIZE, samples).as_bytes()
+    else:
+        codec, data = "zlib", b"".join(samples)[-DICT_SIZE:]
+    conn = get_connection(db_path)
+    try:
+        cursor = conn.execute(
+            "INSERT INTO plan_dictionaries (codec, data, samples, created_at) VALUES (?, ?, ?, ?)",
+            (codec, data, len(samples), time.time())
+        )
+        conn.commit()
+        return cursor.lastrowid
+    finally:
+        conn.close()
+
+
+def _row(conn, lineage, version):
+    return conn.execute("SELECT * FROM plan_versions WHERE lineage = ? AND version = ?",
+                        (lineage, version)).fetchone()
+
+
+@functools.lru_cache(maxsize=64)
+def _keyframe_bytes(lineage, version, db_path=None):
+    """Decoded keyframe (versions are immutable, so these are safe to cache)"""
+    conn = get_connection(db_path)
+    try:
+        row = _row(conn, lineage, version)
+    finally:
+        conn.close()
+    dictionary = load_dictionary(row["dict_id"], db_path) if row["dict_id"] else None
+    return decode(row["codec"], bytes(row["blob"]), dictionary=dictionary)
+
+
+def _plan_bytes(row, db_path=None):
+    if row["base_version"] is None:
+        return _keyframe_bytes(row["lineage"], row["version"], db_path)
+    base = _keyframe_bytes(row["lineage"], row["base_version"], db_path)
+    return decode(row["codec"], bytes(row["blob"]), base=base)
+
+
+def save_version(conn, plan, db_path=None):
+    """
+    Store plan as the next version of its lineage (in conn's transaction, which must hold the
+    write lock, see save_campaign) and return (lineage, version). Sets plan["plan_version"].
+    A plan identical to the latest version is not stored again.
+    """
+    lineage = lineage_key(plan)
+    latest = conn.execute(
+        "SELECT version, base_version, sha FROM plan_versions WHERE lineage = ? ORDER BY version DESC LIMIT 1",
+        (lineage,)
+    ).fetchone()
+
+    unversioned = {k: v for k, v in plan.items() if k not in ("plan_version", "campaign_id")}
+    sha = hashlib.sha256(json.dumps(unversioned, sort_keys=True).encode("utf-8")).hexdigest()
+    if latest and latest["sha"] == sha:
+        plan["plan_version"] = {"lineage": lineage, "version": latest["version"]}
+        return lineage, latest["version"]
+
+    version = latest["version"] + 1 if latest else 1
+    plan["plan_version"] = {"lineage": lineage, "version": version}
+    data = json.dumps(plan, sort_keys=True).encode("utf-8")
+
+    dict_id = latest_dictionary(conn, "zstd" if has_zstd else "zlib")
+    codec, blob = encode(data, dictionary=load_dictionary(dict_id, db_path) if dict_id else None)
+    base_version = None
+    if latest:
+        keyframe = latest["base_version"] or latest["version"]
+        if version - keyframe < KEYFRAME_EVERY:
+            delta_codec, delta = encode(data, base=_keyframe_bytes(lineage, keyframe, db_path))
+            # A rewrite can make the delta bigger than a fresh keyframe
+            if len(delta) < len(blob):
+                codec, blob, base_version, dict_id = delta_codec, delta, keyframe, None
+
+    conn.execute(
+        "INSERT INTO plan_versions (lineage, version, base_version, codec, dict_id, blob, sha, raw_bytes, "
+        "stored_bytes, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (lineage, version, base_version, codec, dict_id, blob, sha, len(data), len(blob), time.time())
+    )
+    return lineage, version
+
+
+def load_version(lineage, version, db_path=None):
+    """Rebuild one version of a plan (None if missing)"""
+    conn = get_connection(db_path)
+    try:
+        row = _row(conn, lineage, version)
+    finally:
+        conn.close()
+    return json.loads(_plan_bytes(row, db_path)) if row else None
+
+
+def list_versions(lineage, db_path=None):
+    conn = get_connection(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT version, base_version, raw_bytes, stored_bytes, created_at FROM plan_versions "
+            "WHERE lineage = ? ORDER BY version", (lineage,)
+        ).fetchall()
+        return [dict(row) for row in rows]
+    finally:
+        conn.close()
+
+
+def diff_versions(lineage, version_a, version_b, db_path=None):
+    """Per-section comparison of two versions: both texts plus a unified diff of changed lines"""
+    plan_a, plan_b = load_version(lineage, version_a, db_path), load_version(lineage, version_b, db_path)
+    sections = []
+    for section in PLAN_SECTIONS:
+        text_a, text_b = str(plan_a.get(section, "")), str(plan_b.get(section, ""))
+        unified = "\n".join(difflib.unified_diff(
+            text_a.splitlines(), text_b.splitlines(),
+            f"v{version_a}", f"v{version_b}", lineterm=""
+        ))
+        sections.append({"section": section, "changed": text_a != text_b, "a": text_a, "b": text_b,
+                         "unified": unified})
+    return sections
+
+
+def storage_stats(db_path=None):
+    """Raw plan bytes vs. bytes stored, for keyframes and deltas"""
+    conn = get_connection(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT base_version IS NULL AS keyframe, COUNT(*) AS versions, SUM(raw_bytes) AS raw_bytes, "
+            "SUM(stored_bytes) AS stored_bytes, COUNT(DISTINCT lineage) AS lineages "
+            "FROM plan_versions GROUP BY keyframe"
+        ).fetchall()
+    finally:
+        conn.close()
+    stats = {"versions": 0, "lineages": 0, "raw_bytes": 0, "stored_bytes": 0, "deltas": 0}
+    for row in rows:
+        stats["versions"] += row["versions"]
+        stats["raw_bytes"] += row["raw_bytes"] or 0
+        stats["stored_bytes"] += row["stored_bytes"] or 0
+        stats["lineages"] = max(stats["lineages"], row["lineages"])
+        if not row["keyframe"]:
+            stats["deltas"] = row["versions"]
+    stats["ratio"] = round(stats["raw_bytes"] / stats["stored_bytes"], 1) if stats["stored_bytes"] else None
+    stats["codec"] = "zstd" if has_zstd else "zlib"
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Plan version storage: dictionary training and stats")
+    parser.add_argument("--train-dict", action="store_true", help="Train a compression dictionary on recent plans")
+    parser.add_argument("--diff", nargs=3, metavar=("LINEAGE", "A", "B"), help="Unified diff of two versions")
+    args = parser.parse_args()
+
+    if args.train_dict:
+        dict_id = train_dictionary()
+        print(f"📚 Dictionary {dict_id} stored" if dict_id else "⚠️ Need at least 10 stored plans to train")
+    if args.diff:
+        for section in diff_versions(args.diff[0], int(args.diff[1]), int(args.diff[2])):
+            if section["changed"]:
+                print(section["unified"])
+    stats = storage_stats()
+    print(f"🗜️ {stats['versions']} versions in {stats['lineages']} lineages ({stats['deltas']} deltas, {stats['codec']}): "
+          f"{stats['raw_bytes']} → {stats['stored_bytes']} bytes" + (f" ({stats['ratio']}x)" if stats["ratio"] else ""))
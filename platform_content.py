@@ -0,0 +1,219 @@
+import re
+import json
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from content_variants import VARIANT_LINE
+
+
+# Per-platform ad format: ordered (field, max characters) plus prompt notes and local format rules
+PLATFORM_SPECS = {
+    "Google Ads": {
+        "format": "responsive search ad",
+        "fields": [("headline", 30), ("description", 90)],
+        "notes": ["No exclamation marks in headlines, no emoji, no words in ALL CAPS."],
+        "no_exclamation": ("headline",),
+        "no_emoji": True,
+        "no_all_caps": True
+    },
+    "Meta": {
+        "format": "feed ad",
+        "fields": [("primary_text", 125), ("headline", 40), ("description", 30)],
+        "notes": ["Lead with the hook; the primary text is cut off after 125 characters."]
+    },
+    "LinkedIn": {
+        "format": "sponsored content",
+        "fields": [("intro_text", 150), ("headline", 70)],
+        "notes": ["Professional tone, no emoji."],
+        "no_emoji": True
+    },
+    "YouTube": {
+        "format": "video ad",
+        "fields": [("headline", 15), ("long_headline", 90), ("description", 70)],
+        "notes": ["The headline is the call-to-action overlay: a short verb phrase."]
+    },
+    "Email": {
+        "format": "email",
+        "fields": [("subject", 60), ("preheader", 100), ("body", 600)],
+        "notes": ["One call-to-action per email; no words in ALL CAPS in the subject."],
+        "no_all_caps": True
+    }
+}
+DEFAULT_SPEC = {"format": "ad", "fields": [("headline", 60), ("copy", 300)], "notes": []}
+
+VARIANTS_PER_PLATFORM = 3
+MAX_REPAIR_ROUNDS = 2
+MAX_WORKERS = 5
+
+EMOJI = re.compile("[\U0001F300-\U0001FAFF☀-➿]")
+ALL_CAPS_WORD = re.compile(r"\b[A-Z]{4,}\b")
+
+
+def spec_for(platform):
+    return PLATFORM_SPECS.get(platform, DEFAULT_SPEC)
+
+
+def parse_platform_variants(text, spec):
+    """Numbered '<field> || <field> ...' lines as dicts keyed by the spec's fields (missing fields empty)"""
+    names = [name for name, _ in spec["fields"]]
+    variants = []
+    for line in str(text).splitlines():
+        match = VARIANT_LINE.match(line)
+        if not match:
+            continue
+        parts = [part.strip().strip('"') for part in match.group(1).split("||")]
+        if any(parts):
+            variants.append({name: parts[i] if i < len(parts) else "" for i, name in enumerate(names)})
+    return variants
+
+
+def validate_variant(variant, spec):
+    """Problems with one variant against the platform's limits and format rules (empty when valid)"""
+    problems = []
+    for name, limit in spec["fields"]:
+        value = variant.get(name, "")
+        if not value:
+            problems.append(f"{name} missing")
+        elif len(value) > limit:
+            problems.append(f"{name} {len(value)}/{limit} chars")
+        if name in spec.get("no_exclamation", ()) and "!" in value:
+            problems.append(f"{name} has '!'")
+        if spec.get("no_emoji") and EMOJI.search(value):
+            problems.append(f"{name} has emoji")
+        if spec.get("no_all_caps") and ALL_CAPS_WORD.search(value):
+            problems.append(f"{name} has ALL CAPS")
+    return problems
+
+
+def enforce_spec(variant, spec):
+    """
+    Fix a variant locally (rules stripped, fields cut at a word boundary within their limit);
+    None if a required field is missing, since that can't be fixed without the LLM
+    """
+    fixed = {}
+    for name, limit in spec["fields"]:
+        value = variant.get(name, "")
+        if name in spec.get("no_exclamation", ()):
+            value = value.replace("!", ".").replace("..", ".")
+        if spec.get("no_emoji"):
+            value = EMOJI.sub("", value)
+        if spec.get("no_all_caps"):
+            value = ALL_CAPS_WORD.sub(lambda m: m.group(0).title(), value)
+        value = " ".join(value.split())
+        if len(value) > limit:
+            value = value[:limit + 1].rsplit(" ", 1)[0] if " " in value[:limit + 1] else value[:limit]
+            value = value.rstrip(" ,;:-")
+        if not value:
+            return None
+        fixed[name] = value
+    return fixed
+
+
+def _generate(agent, product_description, marketing_goal, platform, count, fix=None):
+    from agents import create_platform_task
+    from crew_executor import run_task
+    from llm_runtime import run_context
+    from output_caps import variant_batch_cap
+
+    spec = spec_for(platform)
+    task = create_platform_task(product_description, marketing_goal, platform, spec, count, fix=fix)
+    with run_context(max_tokens=variant_batch_cap(count)):
+        return parse_platform_variants(run_task(agent, task, verbose=False), spec)[:count]
+
+
+def platform_variants(agent, product_description, marketing_goal, platform, count=VARIANTS_PER_PLATFORM,
+                      max_rounds=MAX_REPAIR_ROUNDS, use_cache=True):
+    """
+    count validated variants for one platform. Variants failing validation (or missing from
+    the answer) are regenerated on their own, up to max_rounds times, with their problems
+    spelled out; anything still failing is fixed locally (enforce_spec).
+    """
+    from stage_cache import get_cached, put_cached
+
+    spec = spec_for(platform)
+    brief = {"product": product_description, "goal": marketing_goal, "platform": platform}
+    if use_cache:
+        cached = get_cached("content", brief)
+        if cached is not None:
+            return {**json.loads(cached), "cached": True}
+
+    variants = _generate(agent, product_description, marketing_goal, platform, count)
+    stats = {"generated": len(variants), "regenerated": 0, "rounds": 0, "fixed_locally": 0, "dropped": 0}
+    variants += [{}] * (count - len(variants))
+
+    for _ in range(max_rounds):
+        failing = [(i, validate_variant(v, spec)) for i, v in enumerate(variants)]
+        failing = [(i, problems) for i, problems in failing if problems]
+        if not failing:
+            break
+        fix = [(variants[i], problems) for i, problems in failing if variants[i]]
+        replacements = _generate(agent, product_description, marketing_goal, platform, len(failing), fix=fix)
+        stats["rounds"] += 1
+        stats["regenerated"] += len(failing)
+        for (i, _), replacement in zip(failing, replacements):
+            variants[i] = replacement
+
+    valid = []
+    for variant in variants:
+        if validate_variant(variant, spec):
+            variant = enforce_spec(variant, spec)
+            stats["fixed_locally" if variant else "dropped"] += 1
+        if variant:
+            valid.append(variant)
+
+    result = {"format": spec["format"], "limits": dict(spec["fields"]), "variants": valid, "stats": stats}
+    if use_cache and valid:
+        put_cached("content", brief, json.dumps(result))
+    return {**result, "cached": False}
+
+
+def generate_platform_content(product_description, marketing_goal, platforms, count=VARIANTS_PER_PLATFORM,
+                              use_cache=True):
+    """
+    One lightweight content generation per platform, run in parallel; {platform: result}.
+    Each generation runs on its own pooled copy of the content agent (crew_executor).
+    """
+    from agents import get_agents
+
+    content_agent = get_agents()[1]
+    results = {}
+    lock = threading.Lock()
+
+    def run(platform):
+        result = platform_variants(content_agent, product_description, marketing_goal, platform, count,
+                                   use_cache=use_cache)
+        with lock:
+            results[platform] = result
+
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_WORKERS, len(platforms)))) as pool:
+        futures = [pool.submit(contextvars.copy_context().run, run, platform) for platform in platforms]
+        for future in futures:
+            future.result()
+    # Keep the channel order (largest budget first)
+    return {platform: results[platform] for platform in platforms}
+
+
+def format_platform_content(results):
+    """Content strategy section: each platform's variants with their fields"""
+    lines = []
+    for platform, result in results.items():
+        lines.append(f"### {platform} ({result['format']})")
+        for i, variant in enumerate(result["variants"], 1):
+            first, *rest = variant.items()
+            lines.append(f"{i}. **{first[1]}**" + "".join(f" · {value}" for _, value in rest))
+        lines.append("")
+    return "\n".join(lines).strip()
+
+
+def summarize(results):
+    """Totals across platforms for the plan"""
+    totals = {"platforms": len(results), "variants": 0, "regenerated": 0, "fixed_locally": 0, "cached": 0}
+    for result in results.values():
+        totals["variants"] += len(result["variants"])
+        if result["cached"]:
+            totals["cached"] += 1
+            continue
+        totals["regenerated"] += result["stats"]["regenerated"]
+        totals["fixed_locally"] += result["stats"]["fixed_locally"]
+    return totals
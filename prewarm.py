@@ -0,0 +1,118 @@
+import time
+import argparse
+from collections import Counter
+from datetime import datetime, timedelta
+
+from campaign_store import iter_campaigns
+from stage_cache import STAGE_FIELDS, cache_key, is_fresh, put_cached, hit_rate_report
+
+
+STAGE_ORDER = ["research", "content", "channel", "schedule"]
+
+
+def mine_brief_shapes(days=30, min_count=2):
+    """Most frequent per-stage brief shapes in recent campaign history, most frequent first"""
+    since = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+    counts = Counter()
+    examples = {}
+
+    for _, plan in iter_campaigns(since=since):
+        overview = plan.get("campaign_overview", {})
+        brief = {field: overview.get(field) for field in ("product", "goal", "budget", "duration", "industry")}
+        brief["competition"] = overview.get("competition_level")
+        brief["geo"] = overview.get("geo_target")
+        for stage in STAGE_FIELDS:
+            key = cache_key(stage, brief)
+            counts[(stage, key)] += 1
+            examples.setdefault((stage, key), brief)
+
+    return [
+        {"stage": stage, "key": key, "count": count, "brief": examples[(stage, key)]}
+        for (stage, key), count in counts.most_common()
+        if count >= min_count
+    ]
+
+
+def in_window(hour, window):
+    """True if hour falls in an 'start-end' hour window (wrapping past midnight allowed)"""
+    start, end = [int(x) for x in window.split("-")]
+    return start <= hour < end if start <= end else hour >= start or hour < end
+
+
+def prewarm(days=30, min_count=2, max_calls=20, max_tokens=100000, fresh_for_s=6 * 3600):
+    """Generate and cache the most frequent stage outputs within a call/token quota"""
+    from campaign_assistant import run_stage, setup_llm
+    from agents import create_tasks, get_agents
+    from llm_runtime import run_context, estimate_tokens
+    from budget_optimizer import optimize_allocation, funded_channels
+    from schedule_solver import solve_schedule
+
+    shapes = mine_brief_shapes(days, min_count)
+    setup_llm()
+    agents = dict(zip(STAGE_ORDER, get_agents()))
+    summary = {"candidates": len(shapes), "warmed": 0, "skipped_fresh": 0, "failed": 0, "tokens": 0}
+
+    with run_context(tenant="prewarm", priority="batch"):
+        for shape in shapes:
+            if summary["warmed"] >= max_calls or summary["tokens"] >= max_tokens:
+                print("⏹️ Pre-warm quota exhausted")
+                break
+
+            stage, brief = shape["stage"], shape["brief"]
+            if is_fresh(stage, brief, min_remaining_s=fresh_for_s):
+                summary["skipped_fresh"] += 1
+                continue
+
+            allocation = optimize_allocation(brief["budget"], brief["industry"] or "Other", brief["competition"] or 3)
+            schedule = solve_schedule(brief["duration"], funded_channels(allocation), brief["geo"] or "")
+            task = dict(zip(STAGE_ORDER, create_tasks(
+                brief["product"], brief["goal"], brief["budget"], brief["duration"],
+                budget_allocation=allocation, posting_schedule=schedule
+            )))[stage]
+
+            print(f"🔥 Warming {stage} (seen {shape['count']}x)")
+            try:
+                output = run_stage(stage, agents[stage], task, brief, use_cache=False)
+            except Exception as e:
+                print(f"⚠️ {stage} pre-warm failed: {str(e)[:100]}")
+                summary["failed"] += 1
+                continue
+
+            put_cached(stage, brief, output, source="prewarm")
+            summary["warmed"] += 1
+            summary["tokens"] += estimate_tokens(task.description) + estimate_tokens(output)
+
+    return summary
+
+
+def print_hit_rates(title, report):
+    print(f"\n📊 {title}")
+    if not report:
+        print("   (no cache lookups in window)")
+    for stage, values in report.items():
+        print(f"   {stage:<10} lookups={values['lookups']:<6} hit rate={values['hit_rate']:.0%} "
+              f"pre-warm uplift={values['prewarm_uplift']:.0%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-warm the stage cache from campaign history")
+    parser.add_argument("--days", type=int, default=30, help="History window to mine")
+    parser.add_argument("--min-count", type=int, default=2, help="Only warm shapes seen at least this often")
+    parser.add_argument("--max-calls", type=int, default=20, help="Maximum stage generations per run")
+    parser.add_argument("--max-tokens", type=int, default=100000, help="Approximate token budget per run")
+    parser.add_argument("--window", default="1-6", help="Off-peak hours (local), e.g. 1-6 or 22-4")
+    parser.add_argument("--force", action="store_true", help="Run even outside the off-peak window")
+    parser.add_argument("--report", type=float, metavar="HOURS",
+                        help="Only print cache hit rates for the last HOURS and exit")
+    args = parser.parse_args()
+
+    if args.report:
+        print_hit_rates(f"Cache hit rates, last {args.report:g}h", hit_rate_report(time.time() - args.report * 3600))
+    elif not args.force and not in_window(datetime.now().hour, args.window):
+        print(f"🌙 Outside off-peak window {args.window}; use --force to run anyway")
+    else:
+        print_hit_rates(f"Cache hit rates before pre-warm, last {args.days}d",
+                        hit_rate_report(time.time() - args.days * 86400))
+        summary = prewarm(args.days, args.min_count, args.max_calls, args.max_tokens)
+        print(f"\n✅ Pre-warm done: {summary}")
+        print("Run with --report HOURS after peak traffic to see the hit-rate uplift")
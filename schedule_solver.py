@@ -0,0 +1,208 @@
+import re
+
+import numpy as np
+
+
+DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+# UTC offsets (whole hours) of the main audience timezones per geo_target keyword
+REGION_OFFSETS = {
+    "north america": [-5, -8],
+    "usa": [-5, -8],
+    "us": [-5, -8],
+    "canada": [-5, -8],
+    "latin america": [-3, -6],
+    "uk": [0],
+    "europe": [1],
+    "middle east": [3],
+    "africa": [1, 3],
+    "india": [5],
+    "asia": [8, 9],
+    "australia": [10],
+    "global": [-5, 1, 8]
+}
+DEFAULT_OFFSETS = [-5]
+AMBIGUOUS_CODES = {"us"}
+
+
+def _hours(peaks, shoulders=(), daytime=0.1):
+    """24-hour local activity weights: peaks 1.0, shoulders 0.5, other daytime hours low"""
+    weights = np.zeros(24)
+    weights[7:23] = daytime
+    weights[list(shoulders)] = 0.5
+    weights[list(peaks)] = 1.0
+    return weights
+
+
+# Per-channel posting rules: weekly target and caps, minimum hours between posts,
+# audience activity by local weekday (Mon..Sun) and local hour
+CHANNEL_RULES = {
+    "Meta": {"per_week": 5, "max_per_week": 7, "max_per_day": 2, "min_gap_h": 4,
+             "days": [1, 1, 1, 1, 1, 0.8, 0.8], "hours": _hours([12, 13, 19, 20], [11, 14, 18, 21])},
+    "LinkedIn": {"per_week": 3, "max_per_week": 5, "max_per_day": 1, "min_gap_h": 24,
+                 "days": [0.8, 1, 1, 1, 0.6, 0.1, 0.1], "hours": _hours([8, 9, 12], [7, 10, 17])},
+    "YouTube": {"per_week": 1, "max_per_week": 2, "max_per_day": 1, "min_gap_h": 48,
+                "days": [0.6, 0.6, 0.7, 1, 1, 1, 0.9], "hours": _hours([15, 16, 17], [14, 18, 19])},
+    "Email": {"per_week": 1, "max_per_week": 2, "max_per_day": 1, "min_gap_h": 72,
+              "days": [0.7, 1, 1, 1, 0.6, 0, 0], "hours": _hours([10], [9, 11, 14])},
+    # Paid search: "posts" are creative/bid refreshes
+    "Google Ads": {"per_week": 1, "max_per_week": 2, "max_per_day": 1, "min_gap_h": 72,
+                   "days": [1, 0.8, 0.8, 0.6, 0.4, 0, 0], "hours": _hours([9], [10])}
+}
+DEFAULT_RULE = {"per_week": 2, "max_per_week": 4, "max_per_day": 1, "min_gap_h": 24,
+                "days": [1, 1, 1, 1, 1, 0.5, 0.5], "hours": _hours([12, 18], [11, 13, 17, 19])}
+
+# Campaign phases as (name, share of the campaign's weeks, posting intensity)
+PHASES = [("launch", 0.25, 1.3), ("sustain", 0.6, 1.0), ("close", 0.15, 1.2)]
+
+
+def parse_weeks(campaign_duration, default=4):
+    """Campaign length in weeks from "4 weeks", "Quarter (12" or "12" """
+    match = re.search(r"(\d+)", str(campaign_duration or ""))
+    return max(1, int(match.group(1))) if match else default
+
+
+def _list_item(text, start, end):
+    """True if text[start:end] is a whole item of a list like "us, uk and india" """
+    return bool(re.search(r"(^|[,;/&\n]|\band)\s*$", text[:start])
+                and re.match(r"\s*($|[,;/&\n]|and\b)", text[end:]))
+
+
+def parse_regions(geo_target):
+    """(region names, UTC offsets) for a free-text geo target like "North America, Europe" """
+    text = str(geo_target or "")
+    lowered = text.lower()
+    names, offsets, taken = [], [], []
+    # Longest keywords first so "north america" claims its words before any shorter keyword
+    for name in sorted(REGION_OFFSETS, key=len, reverse=True):
+        for match in re.finditer(rf"\b{re.escape(name)}\b", lowered):
+            start, end = match.span()
+            # Codes that are also English words ("us") count in capitals or as a list item of their own
+            if name in AMBIGUOUS_CODES and text[start:end] != name.upper() and not _list_item(lowered, start, end):
+                continue
+            if any(start < taken_end and taken_start < end for taken_start, taken_end in taken):
+                continue
+            taken.append((start, end))
+            if name not in names:
+                names.append(name)
+                offsets.extend(REGION_OFFSETS[name])
+    if not offsets:
+        return ["default"], list(DEFAULT_OFFSETS)
+    return names, sorted(set(offsets))
+
+
+def phase_plan(weeks):
+    """Phase name and intensity for each week"""
+    plan = []
+    for name, share, intensity in PHASES:
+        count = max(1, round(weeks * share)) if weeks >= len(PHASES) else 0
+        plan.extend([(name, intensity)] * count)
+    if weeks < len(PHASES):
+        plan = [("launch", PHASES[0][2])] + [("close", PHASES[-1][2])] * (weeks - 1)
+    # Rounding can over/undershoot; sustain absorbs the difference
+    while len(plan) > weeks:
+        plan.remove(("sustain", 1.0) if ("sustain", 1.0) in plan else plan[-1])
+    while len(plan) < weeks:
+        plan.insert(len(plan) - 1, ("sustain", 1.0))
+    return plan
+
+
+def slot_scores(rule, offsets):
+    """Audience activity for each UTC weekday-hour slot (168), summed over timezones"""
+    slots = np.arange(168)
+    days = np.asarray(rule["days"], dtype=float)
+    scores = np.zeros(168)
+    for offset in offsets:
+        local = (slots + offset) % 168
+        scores += days[local // 24] * rule["hours"][local % 24]
+    return scores / len(offsets)
+
+
+def solve_schedule(campaign_duration, channels, geo_target=""):
+    """
+    Posting calendar for every week, UTC hour and channel.
+    Each week a channel gets its weekly target scaled by the phase intensity (within its caps),
+    placed greedily in the highest-activity slots that respect per-day caps and minimum gaps.
+    Returns calendar (uint8 array, days x 24 x channels) plus the inputs needed to read it.
+    """
+    weeks = parse_weeks(campaign_duration)
+    region_names, offsets = parse_regions(geo_target)
+    phases = phase_plan(weeks)
+    calendar = np.zeros((weeks * 7, 24, len(channels)), dtype=np.uint8)
+
+    for c, channel in enumerate(channels):
+        rule = CHANNEL_RULES.get(channel, DEFAULT_RULE)
+        scores = slot_scores(rule, offsets)
+        order = np.argsort(-scores, kind="stable")
+        order = order[scores[order] > 0]
+
+        for week, (_, intensity) in enumerate(phases):
+            target = min(rule["max_per_week"], round(rule["per_week"] * intensity))
+            chosen = []
+            per_day = np.zeros(7, dtype=int)
+            for slot in order:
+                if len(chosen) >= target:
+                    break
+                day = slot // 24
+                if per_day[day] >= rule["max_per_day"]:
+                    continue
+                if any(min(abs(slot - s), 168 - abs(slot - s)) < rule["min_gap_h"] for s in chosen):
+                    continue
+                chosen.append(slot)
+                per_day[day] += 1
+            for slot in chosen:
+                calendar[week * 7 + slot // 24, slot % 24, c] += 1
+
+    return {
+        "calendar": calendar,
+        "channels": list(channels),
+        "weeks": weeks,
+        "phases": [name for name, _ in phases],
+        "regions": region_names,
+        "utc_offsets": offsets
+    }
+
+
+def calendar_to_json(solution):
+    """Compact JSON form: [day, utc_hour, channel index, posts] for every non-empty slot"""
+    days, hours, channels = np.nonzero(solution["calendar"])
+    return {
+        "channels": solution["channels"],
+        "weeks": solution["weeks"],
+        "phases": solution["phases"],
+        "regions": solution["regions"],
+        "utc_offsets": solution["utc_offsets"],
+        "slots": [
+            [int(d), int(h), int(c), int(solution["calendar"][d, h, c])]
+            for d, h, c in zip(days, hours, channels)
+        ]
+    }
+
+
+def calendar_from_json(data):
+    """Rebuild the calendar array from calendar_to_json output"""
+    calendar = np.zeros((data["weeks"] * 7, 24, len(data["channels"])), dtype=np.uint8)
+    for day, hour, channel, posts in data["slots"]:
+        calendar[day, hour, channel] = posts
+    return calendar
+
+
+def format_schedule(solution):
+    """Readable summary of the calendar for the schedule agent to review"""
+    calendar = solution["calendar"]
+    lines = [f"{solution['weeks']} weeks, audience timezones UTC{', UTC'.join(f'{o:+d}' for o in solution['utc_offsets'])}"]
+
+    week = 0
+    for name in dict.fromkeys(solution["phases"]):
+        count = solution["phases"].count(name)
+        per_week = calendar[week * 7:(week + count) * 7].sum(axis=(0, 1)) / count
+        mix = ", ".join(f"{ch} {n:g}/wk" for ch, n in zip(solution["channels"], per_week.round(1)) if n)
+        lines.append(f"- Weeks {week + 1}-{week + count} ({name}): {mix}")
+        week += count
+
+    for c, channel in enumerate(solution["channels"]):
+        first_week = calendar[:7, :, c]
+        slots = [f"{DAYS[d]} {h:02d}:00" for d, h in zip(*np.nonzero(first_week))]
+        if slots:
+            lines.append(f"- {channel} week 1 slots (UTC): {', '.join(slots)}")
+    return "\n".join(lines)
@@ -0,0 +1,294 @@
+import os
+import json
+import time
+import zlib
+import pickle
+import threading
+
+from campaign_store import save_campaign, load_campaign
+
+
+# Thresholds (seconds / bytes) for idle plan compression, offload and the global cap
+COMPRESS_AFTER_S = float(os.getenv("SESSION_COMPRESS_AFTER_S", "300"))
+OFFLOAD_AFTER_S = float(os.getenv("SESSION_OFFLOAD_AFTER_S", "1800"))
+DROP_AFTER_S = float(os.getenv("SESSION_DROP_AFTER_S", "86400"))
+MAX_TOTAL_BYTES = int(os.getenv("SESSION_STATE_MAX_BYTES", str(200 * 1024 * 1024)))
+# Widget state values are re-pickled when replaced; in-place edits are caught by a full re-measure this often
+RESIZE_ALL_AFTER_S = float(os.getenv("SESSION_RESIZE_ALL_AFTER_S", "60"))
+
+# Plan storage states
+LIVE = "live"
+COMPRESSED = "compressed"
+OFFLOADED = "offloaded"
+
+
+class SessionRecord:
+    """Memory bookkeeping for one browser session"""
+
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.last_active = time.time()
+        self.plan = None
+        self.plan_blob = None
+        self.campaign_id = None
+        self.plan_state = None
+        self.plan_bytes = 0
+        self.widget_bytes = 0
+        # key -> (id of the value when measured, pickled size)
+        self.key_sizes = {}
+        self.sized_all_at = 0.0
+        self.persisting = False
+
+    @property
+    def total_bytes(self):
+        return self.plan_bytes + self.widget_bytes
+
+
+_sessions = {}
+_lock = threading.Lock()
+eviction_stats = {"compressed": 0, "offloaded": 0, "dropped": 0, "rehydrated": 0}
+
+
+def current_session_id():
+    """Streamlit session id of the running script (or 'local' outside Streamlit)"""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+        return ctx.session_id if ctx else "local"
+    except ImportError:
+        return "local"
+
+
+def _plan_size(plan):
+    return len(json.dumps(plan).encode("utf-8"))
+
+
+def _value_size(value):
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return len(repr(value))
+
+
+def _state_size(state, key_sizes=None, full=True):
+    """
+    Pickled size of a session state. With key_sizes (updated in place), only keys whose
+    value object changed since they were last measured are pickled again, unless full.
+    """
+    if key_sizes is None:
+        return sum(_value_size(value) for value in state.values())
+    items = dict(state.items())
+    for key in list(key_sizes):
+        if key not in items:
+            del key_sizes[key]
+    for key, value in items.items():
+        known = key_sizes.get(key)
+        if full or known is None or known[0] != id(value):
+            key_sizes[key] = (id(value), _value_size(value))
+    return sum(size for _, size in key_sizes.values())
+
+
+def _get_record(session_id):
+    record = _sessions.get(session_id)
+    if record is None:
+        record = SessionRecord(session_id)
+        _sessions[session_id] = record
+    return record
+
+
+def put_plan(plan, session_id=None):
+    """Keep a session's current campaign plan under memory accounting"""
+    session_id = session_id or current_session_id()
+    with _lock:
+        record = _get_record(session_id)
+        record.plan = plan
+        record.plan_blob = None
+        record.campaign_id = plan.get("campaign_id")
+        record.plan_state = LIVE
+        record.plan_bytes = _plan_size(plan)
+        record.last_active = time.time()
+    enforce_limits()
+
+
+def get_plan(default=None, session_id=None):
+    """Return the session's plan, rehydrating it if it was compressed or offloaded"""
+    session_id = session_id or current_session_id()
+    with _lock:
+        record = _sessions.get(session_id)
+        if record is None or record.plan_state is None:
+            return default
+        record.last_active = time.time()
+        if record.plan_state == LIVE:
+            return record.plan
+        if record.plan_state == COMPRESSED:
+            return _rehydrate(record, json.loads(zlib.decompress(record.plan_blob)))
+        campaign_id = record.campaign_id
+    
+    # Store reads don't hold the lock, so other sessions aren't blocked behind them
+    plan = load_campaign(campaign_id)
+    if plan is None:
+        return default
+    with _lock:
+        if record.plan_state == LIVE:
+            # Rehydrated or replaced by put_plan meanwhile
+            return record.plan
+        if record.plan_state == OFFLOADED and record.campaign_id == campaign_id:
+            return _rehydrate(record, plan)
+        return plan
+
+
+def _rehydrate(record, plan):
+    record.plan = plan
+    record.plan_blob = None
+    record.plan_state = LIVE
+    record.plan_bytes = _plan_size(plan)
+    eviction_stats["rehydrated"] += 1
+    return plan
+
+
+def touch(state=None, session_id=None):
+    """
+    Mark a session active and re-measure its widget state (call once per rerun).
+    Only replaced values are pickled again, plus a full pass every RESIZE_ALL_AFTER_S.
+    """
+    session_id = session_id or current_session_id()
+    now = time.time()
+    with _lock:
+        record = _get_record(session_id)
+        record.last_active = now
+        key_sizes = dict(record.key_sizes)
+        full = now - record.sized_all_at > RESIZE_ALL_AFTER_S
+    if state is not None:
+        # Pickling happens outside the lock; reruns of one session don't overlap
+        widget_bytes = _state_size(state, key_sizes, full=full)
+        with _lock:
+            record.key_sizes = key_sizes
+            record.widget_bytes = widget_bytes
+            if full:
+                record.sized_all_at = now
+    enforce_limits()
+
+
+def _compress(record):
+    record.plan_blob = zlib.compress(json.dumps(record.plan).encode("utf-8"), 6)
+    record.plan = None
+    record.plan_state = COMPRESSED
+    record.plan_bytes = len(record.plan_blob)
+    eviction_stats["compressed"] += 1
+
+
+def _offload(record):
+    """Drop an already stored plan from memory (plans not yet in the store go through _persist)"""
+    record.plan = None
+    record.plan_blob = None
+    record.plan_state = OFFLOADED
+    record.plan_bytes = 0
+    eviction_stats["offloaded"] += 1
+
+
+def _is_session_active(session_id):
+    try:
+        from streamlit.runtime import Runtime
+        if Runtime.exists():
+            return Runtime.instance().is_active_session(session_id)
+    except Exception:
+        pass
+    return True
+
+
+def _offload_or_defer(record, pending):
+    """Offload now if the plan is already stored, else queue it for _persist (returns bytes freed)"""
+    if record.campaign_id is not None:
+        freed = record.plan_bytes
+        _offload(record)
+        return freed
+    if record.persisting:
+        return 0
+    record.persisting = True
+    pending.append((record, record.plan if record.plan_state == LIVE else record.plan_blob))
+    return record.plan_bytes
+
+
+def _persist(pending):
+    """
+    Save queued plans to the campaign store without holding the lock, then offload each
+    one unless put_plan or get_plan replaced it in the meantime
+    """
+    for record, held in pending:
+        try:
+            plan = held if isinstance(held, dict) else json.loads(zlib.decompress(held))
+            campaign_id = save_campaign(plan)
+        except Exception as e:
+            # Keep the plan in memory; the next pass tries again
+            print(f"⚠️ Could not offload session plan: {str(e)[:100]}")
+            with _lock:
+                record.persisting = False
+            continue
+        with _lock:
+            record.persisting = False
+            if record.plan is held or record.plan_blob is held:
+                record.campaign_id = campaign_id
+                _offload(record)
+
+
+def enforce_limits(now=None):
+    """
+    Compress/offload idle plans and keep total session bytes under the global cap.
+    Plans that must be saved before they can be offloaded are written after the lock is released.
+    """
+    now = now or time.time()
+    pending = []
+    with _lock:
+        for session_id, record in list(_sessions.items()):
+            idle = now - record.last_active
+            if idle > DROP_AFTER_S or (idle > COMPRESS_AFTER_S and not _is_session_active(session_id)):
+                del _sessions[session_id]
+                eviction_stats["dropped"] += 1
+            elif idle > OFFLOAD_AFTER_S and record.plan_state in (LIVE, COMPRESSED):
+                _offload_or_defer(record, pending)
+            elif idle > COMPRESS_AFTER_S and record.plan_state == LIVE:
+                _compress(record)
+
+        total = sum(r.total_bytes for r in _sessions.values())
+        queued = {id(record) for record, _ in pending}
+        # Over the cap: squeeze least recently used sessions first (queued offloads count as freed)
+        total -= sum(record.plan_bytes for record, _ in pending)
+        for record in sorted(_sessions.values(), key=lambda r: r.last_active):
+            if total <= MAX_TOTAL_BYTES:
+                break
+            if id(record) in queued:
+                continue
+            if record.plan_state == LIVE:
+                before = record.plan_bytes
+                _compress(record)
+                total -= before - record.plan_bytes
+            elif record.plan_state == COMPRESSED:
+                total -= _offload_or_defer(record, pending)
+    
+    if pending:
+        _persist(pending)
+
+
+def memory_report():
+    """Per-session and total memory figures for the admin panel"""
+    now = time.time()
+    with _lock:
+        sessions = [
+            {
+                "session": record.session_id[:8],
+                "plan_state": record.plan_state or "-",
+                "plan_kb": round(record.plan_bytes / 1024, 1),
+                "widget_kb": round(record.widget_bytes / 1024, 1),
+                "total_kb": round(record.total_bytes / 1024, 1),
+                "idle_s": int(now - record.last_active)
+            }
+            for record in sorted(_sessions.values(), key=lambda r: -r.total_bytes)
+        ]
+        total = sum(r.total_bytes for r in _sessions.values())
+    return {
+        "sessions": sessions,
+        "session_count": len(sessions),
+        "total_bytes": total,
+        "max_total_bytes": MAX_TOTAL_BYTES,
+        "eviction_stats": dict(eviction_stats)
+    }
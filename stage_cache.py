@@ -0,0 +1,127 @@
+import os
+import re
+import json
+import time
+import hashlib
+
+from campaign_store import get_connection
+
+
+CACHE_TTL_S = float(os.getenv("STAGE_CACHE_TTL_S", str(7 * 24 * 3600)))
+CACHE_ENABLED = os.getenv("STAGE_CACHE", "on").lower() not in ("0", "off", "false")
+
+# Brief fields each stage's prompt depends on (see agents.create_tasks; every task opens with product + goal)
+STAGE_FIELDS = {
+    "research": ("product", "goal"),
+    "content": ("product", "goal"),
+    "channel": ("product", "budget", "goal", "duration", "industry", "competition"),
+    # The solved calendar depends on the funded channels (budget, industry, competition) and geo
+    "schedule": ("product", "duration", "goal", "budget", "industry", "competition", "geo")
+}
+OPTIONAL_FIELDS = ("region", "platform")
+
+
+def normalize(value):
+    """Lowercase and collapse whitespace/punctuation so trivially different briefs share a key"""
+    return re.sub(r"[\s.,;:!?]+", " ", str(value or "").lower()).strip()
+
+
+def stage_inputs(stage, brief):
+    """The normalised subset of the brief that determines a stage's output"""
+    inputs = {field: normalize(brief.get(field)) for field in STAGE_FIELDS[stage]}
+    # Set only by multi-geo runs (a region or market cluster, see multi_geo) and per-platform
+    # content (see platform_content), so other keys are unchanged
+    for field in OPTIONAL_FIELDS:
+        if brief.get(field):
+            inputs[field] = normalize(brief[field])
+    return inputs
+
+
+def cache_key(stage, brief):
+    raw = json.dumps({"stage": stage, **stage_inputs(stage, brief)}, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+def get_cached(stage, brief, now=None, allow_stale=False):
+    """
+    Cached stage output for this brief (None on miss); every lookup is logged for hit rates.
+    allow_stale returns expired entries too (used as a fallback when a campaign runs out of time);
+    those fallback lookups are not logged, since the stage already counted its own lookup.
+    """
+    if not CACHE_ENABLED:
+        return None
+    now = now or time.time()
+    conn = get_connection()
+    try:
+        row = conn.execute(
+            "SELECT output, source, created_at FROM stage_cache WHERE key = ?",
+            (cache_key(stage, brief),)
+        ).fetchone()
+        if allow_stale:
+            return row["output"] if row is not None else None
+        hit = row is not None and now - row["created_at"] <= CACHE_TTL_S
+        conn.execute(
+            "INSERT INTO cache_events (ts, stage, hit, source) VALUES (?, ?, ?, ?)",
+            (now, stage, int(hit), row["source"] if hit else None)
+        )
+        if hit:
+            conn.execute("UPDATE stage_cache SET hits = hits + 1 WHERE key = ?", (cache_key(stage, brief),))
+        conn.commit()
+        return row["output"] if hit else None
+    finally:
+        conn.close()
+
+
+def put_cached(stage, brief, output, source="live"):
+    """Store a stage output (source is 'live' or 'prewarm')"""
+    if not CACHE_ENABLED:
+        return
+    conn = get_connection()
+    try:
+        conn.execute(
+            "INSERT OR REPLACE INTO stage_cache (key, stage, inputs_json, output, source, created_at, hits) "
+            "VALUES (?, ?, ?, ?, ?, ?, 0)",
+            (cache_key(stage, brief), stage, json.dumps(stage_inputs(stage, brief)), str(output), source, time.time())
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def is_fresh(stage, brief, min_remaining_s=0, now=None):
+    """True if a cache entry exists and stays valid for at least min_remaining_s"""
+    now = now or time.time()
+    conn = get_connection()
+    try:
+        row = conn.execute("SELECT created_at FROM stage_cache WHERE key = ?", (cache_key(stage, brief),)).fetchone()
+        return row is not None and row["created_at"] + CACHE_TTL_S - now >= min_remaining_s
+    finally:
+        conn.close()
+
+
+def hit_rate_report(since, until=None):
+    """Hit rate per stage in a time window, split by live vs pre-warmed entries"""
+    until = until or time.time()
+    conn = get_connection()
+    try:
+        rows = conn.execute(
+            "SELECT stage, COUNT(*) AS lookups, SUM(hit) AS hits, "
+            "SUM(CASE WHEN source = 'prewarm' THEN 1 ELSE 0 END) AS prewarm_hits "
+            "FROM cache_events WHERE ts >= ? AND ts <= ? GROUP BY stage ORDER BY stage",
+            (since, until)
+        ).fetchall()
+    finally:
+        conn.close()
+
+    report = {}
+    for row in rows:
+        lookups = row["lookups"] or 0
+        hits = row["hits"] or 0
+        prewarm_hits = row["prewarm_hits"] or 0
+        report[row["stage"]] = {
+            "lookups": lookups,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            # Hits that would have been misses without pre-warming
+            "prewarm_uplift": round(prewarm_hits / lookups, 3) if lookups else 0.0
+        }
+    return report
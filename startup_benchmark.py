@@ -0,0 +1,136 @@
+import os
+import ast
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+
+APP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "streamlit_app.py")
+
+# Cold-start budgets in seconds; override with STARTUP_BUDGET_<NAME>, e.g. STARTUP_BUDGET_FIRST_RENDER_S=3
+BUDGETS = {
+    "app_imports_s": 1.5,
+    "cli_imports_s": 0.3,
+    "first_render_s": 3.0
+}
+
+# Modules that must stay out of the app's and CLI's import-time path
+DEFERRED_MODULES = ["crewai", "litellm", "crewai_tools", "plotly", "pandas", "scipy", "pyarrow"]
+
+
+def budgets():
+    return {name: float(os.getenv(f"STARTUP_BUDGET_{name.upper()}", default)) for name, default in BUDGETS.items()}
+
+
+def top_level_imports(path):
+    """Source of a script's module-level import statements (what runs before its first line of UI)"""
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+    tree = ast.parse(source)
+    return "\n".join(ast.get_source_segment(source, node) for node in tree.body
+                     if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def importtime(code, cwd=None, exclude=()):
+    """
+    Run code in a fresh interpreter under -X importtime.
+    Returns (total seconds, {top-level module: cumulative seconds}, every module imported),
+    leaving out the top-level modules in exclude (e.g. the interpreter's own startup imports).
+    """
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=cwd,
+                          capture_output=True, text=True, env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"})
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import failed")
+
+    top, modules = {}, []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules.append(name.strip())
+        # Nesting is shown by indentation; only top-level entries add up to the total
+        if not name[1:].startswith(" ") and name.strip() not in exclude:
+            top[name.strip()] = int(cumulative) / 1e6
+    return sum(top.values()), top, modules
+
+
+def first_render_time(script=APP_FILE, timeout=60):
+    """Seconds from a fresh interpreter to the app's first completed run (includes imports)"""
+    code = (
+        "import time; start = time.perf_counter()\n"
+        "from streamlit.testing.v1 import AppTest\n"
+        f"at = AppTest.from_file({script!r}, default_timeout={timeout})\n"
+        "at.run()\n"
+        "print(time.perf_counter() - start)\n"
+        "print(len(at.exception))"
+    )
+    proc = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(script),
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "render failed")
+    seconds, exceptions = proc.stdout.strip().splitlines()[-2:]
+    return float(seconds), int(exceptions)
+
+
+def run_benchmark(script=APP_FILE, render=True):
+    root = os.path.dirname(script)
+    report = {"ts": time.time(), "python": sys.version.split()[0]}
+
+    startup = set(importtime("pass", cwd=root)[1])
+    app_total, app_top, app_modules = importtime(top_level_imports(script), cwd=root, exclude=startup)
+    cli_total, cli_top, cli_modules = importtime("import campaign_assistant", cwd=root, exclude=startup)
+    report["app_imports_s"] = round(app_total, 3)
+    report["cli_imports_s"] = round(cli_total, 3)
+    report["slowest_app_imports"] = sorted(app_top.items(), key=lambda kv: kv[1], reverse=True)[:10]
+    report["eager_heavy_modules"] = sorted({m.split(".")[0] for m in app_modules + cli_modules} & set(DEFERRED_MODULES))
+
+    if render:
+        try:
+            report["first_render_s"], report["render_exceptions"] = first_render_time(script)
+            report["first_render_s"] = round(report["first_render_s"], 3)
+        except (RuntimeError, ValueError) as e:
+            report["first_render_error"] = str(e)[:200]
+    return report
+
+
+def check_budgets(report):
+    """List of budget violations (empty when within budget)"""
+    failures = []
+    for name, limit in budgets().items():
+        if name in report and report[name] > limit:
+            failures.append(f"{name} {report[name]:.2f}s > {limit:.2f}s budget")
+    if report["eager_heavy_modules"]:
+        failures.append(f"imported at startup: {', '.join(report['eager_heavy_modules'])}")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure import-time and first-render cost of the app and CLI")
+    parser.add_argument("--script", default=APP_FILE)
+    parser.add_argument("--no-render", action="store_true", help="Skip the AppTest first-render measurement")
+    parser.add_argument("--output", default=None, help="Append the report as a JSON line to this file")
+    parser.add_argument("--check", action="store_true", help="Exit non-zero if any budget is exceeded")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.script, render=not args.no_render)
+    print(f"📦 App imports: {report['app_imports_s']:.3f}s · CLI imports: {report['cli_imports_s']:.3f}s")
+    for name, seconds in report["slowest_app_imports"]:
+        print(f"   {seconds:7.3f}s  {name}")
+    if "first_render_s" in report:
+        print(f"🖼️ First render (fresh process): {report['first_render_s']:.3f}s")
+    elif "first_render_error" in report:
+        print(f"⚠️ First render not measured: {report['first_render_error']}")
+
+    if args.output:
+        with open(args.output, "a", encoding="utf-8") as f:
+            f.write(json.dumps(report) + "\n")
+
+    failures = check_budgets(report)
+    for failure in failures:
+        print(f"❌ {failure}")
+    if args.check and failures:
+        sys.exit(1)
+    if not failures:
+        print("✅ Within startup budget")
@@ -2,12 +2,26 @@
 import streamlit as st
 import json
 import os
-import plotly.express as px
-import plotly.graph_objects as go
+import time
+import functools
+import threading
+import contextvars
 from datetime import datetime, timedelta
-import pandas as pd
-from campaign_assistant import generate_campaign_plan
-from agents import test_research_agent, test_content_agent, test_channel_agent, test_schedule_agent
+from campaign_export import create_text_summary
+from session_memory import put_plan, get_plan, touch, enforce_limits, memory_report, current_session_id
+from llm_runtime import run_context, start_generation, finish_generation
+from llm_scheduler import scheduler
+from output_caps import controller as output_caps
+from context_cache import context_cache
+from job_queue import enqueue, get_job, request_cancel, queue_stats, FINAL_STATUSES
+from token_budget import usage_report
+from frontend_assets import stylesheet_markup, minify_html
+
+# Plotly, pandas, numpy and CrewAI/LiteLLM are imported where first used so the first
+# render doesn't wait on them (python startup_benchmark.py checks the budget)
+
+# "queue": the web tier only enqueues jobs and worker.py nodes run them
+QUEUE_MODE = os.getenv("CAMPAIGN_EXECUTION", "inline").lower() == "queue"
 
 
 st.set_page_config(
@@ -23,746 +37,48 @@ st.set_page_config(
 )
 
 def load_modern_css():
-    """Load modern CSS design system inspired by React apps"""
-    st.markdown("""
-    <style>
-    /* Import Modern Fonts */
-    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700;800;900&display=swap');
-    @import url('https://fonts.googleapis.com/css2?family=JetBrains+Mono:wght@400;500;600&display=swap');
-    
-    /* Reset and Base Styles */
-    * {
-        margin: 0;
-        padding: 0;
-        box-sizing: border-box;
-    }
-    
-    html, body, [class*="css"] {
-        font-family: 'Inter', -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif;
-    }
-    
-    /* Root Variables */
-    :root {
-        --primary-50: #eff6ff;
-        --primary-100: #dbeafe;
-        --primary-500: #3b82f6;
-        --primary-600: #2563eb;
-        --primary-700: #1d4ed8;
-        --primary-900: #1e3a8a;
-        
-        --gray-50: #f9fafb;
-        --gray-100: #f3f4f6;
-        --gray-200: #e5e7eb;
-        --gray-300: #d1d5db;
-        --gray-400: #9ca3af;
-        --gray-500: #6b7280;
-        --gray-600: #4b5563;
-        --gray-700: #374151;
-        --gray-800: #1f2937;
-        --gray-900: #111827;
-        
-        --success-50: #ecfdf5;
-        --success-500: #10b981;
-        --success-600: #059669;
-        
-        --warning-50: #fffbeb;
-        --warning-500: #f59e0b;
-        --warning-600: #d97706;
-        
-        --error-50: #fef2f2;
-        --error-500: #ef4444;
-        --error-600: #dc2626;
-        
-        --shadow-sm: 0 1px 2px 0 rgb(0 0 0 / 0.05);
-        --shadow-md: 0 4px 6px -1px rgb(0 0 0 / 0.1), 0 2px 4px -2px rgb(0 0 0 / 0.1);
-        --shadow-lg: 0 10px 15px -3px rgb(0 0 0 / 0.1), 0 4px 6px -4px rgb(0 0 0 / 0.1);
-        --shadow-xl: 0 20px 25px -5px rgb(0 0 0 / 0.1), 0 8px 10px -6px rgb(0 0 0 / 0.1);
-        
-        --radius-sm: 0.375rem;
-        --radius-md: 0.5rem;
-        --radius-lg: 0.75rem;
-        --radius-xl: 1rem;
-    }
-    
-    /* Main App Layout */
-    .main .block-container {
-        padding: 0;
-        max-width: none;
-    }
-    
-    .main {
-        background: linear-gradient(135deg, #f0f9ff 0%, #e0f2fe 25%, #fef7ff 50%, #fff7ed 75%, #f0fdf4 100%);
-        min-height: 100vh;
-    }
-    
-    /* Hero Section */
-    .hero-section {
-        background: linear-gradient(135deg, var(--primary-600) 0%, var(--primary-700) 50%, var(--primary-900) 100%);
-        padding: 4rem 2rem;
-        text-align: center;
-        position: relative;
-        overflow: hidden;
-    }
-    
-    .hero-section::before {
-        content: '';
-        position: absolute;
-        top: 0;
-        left: 0;
-        right: 0;
-        bottom: 0;
-        background: url("data:image/svg+xml,%3Csvg width='60' height='60' viewBox='0 0 60 60' xmlns='http://www.w3.org/2000/svg'%3E%3Cg fill='none' fill-rule='evenodd'%3E%3Cg fill='%23ffffff' fill-opacity='0.05'%3E%3Ccircle cx='30' cy='30' r='2'/%3E%3C/g%3E%3C/g%3E%3C/svg%3E");
-        opacity: 0.3;
-    }
-    
-    .hero-content {
-        position: relative;
-        z-index: 1;
-        max-width: 800px;
-        margin: 0 auto;
-    }
-    
-    .hero-title {
-        font-size: 3.5rem;
-        font-weight: 800;
-        color: white;
-        margin-bottom: 1.5rem;
-        line-height: 1.1;
-        letter-spacing: -0.02em;
-    }
-    
-    .hero-subtitle {
-        font-size: 1.25rem;
-        color: rgba(255, 255, 255, 0.9);
-        margin-bottom: 2rem;
-        font-weight: 400;
-        line-height: 1.6;
-    }
-    
-    .hero-stats {
-        display: flex;
-        justify-content: center;
-        gap: 3rem;
-        margin-top: 3rem;
-        flex-wrap: wrap;
-    }
-    
-    .stat-item {
-        text-align: center;
-        color: white;
-    }
-    
-    .stat-number {
-        font-size: 2rem;
-        font-weight: 700;
-        display: block;
-    }
-    
-    .stat-label {
-        font-size: 0.875rem;
-        opacity: 0.8;
-        text-transform: uppercase;
-        letter-spacing: 0.5px;
-        margin-top: 0.25rem;
-    }
-    
-    /* Navigation */
-    .nav-container {
-        background: white;
-        padding: 1rem 2rem;
-        box-shadow: var(--shadow-sm);
-        border-bottom: 1px solid var(--gray-200);
-        position: sticky;
-        top: 0;
-        z-index: 50;
-    }
-    
-    .nav-content {
-        max-width: 1200px;
-        margin: 0 auto;
-        display: flex;
-        align-items: center;
-        justify-content: space-between;
-    }
-    
-    .nav-logo {
-        font-size: 1.5rem;
-        font-weight: 700;
-        color: var(--primary-600);
-        text-decoration: none;
-    }
-    
-    .nav-menu {
-        display: flex;
-        gap: 2rem;
-        list-style: none;
-    }
-    
-    .nav-item {
-        color: var(--gray-600);
-        font-weight: 500;
-        cursor: pointer;
-        padding: 0.5rem 1rem;
-        border-radius: var(--radius-md);
-        transition: all 0.2s;
-    }
-    
-    .nav-item:hover, .nav-item.active {
-        color: var(--primary-600);
-        background: var(--primary-50);
-    }
-    
-    /* Section Container */
-    .section {
-        max-width: 1200px;
-        margin: 0 auto;
-        padding: 4rem 2rem;
-    }
-    
-    .section-header {
-        text-align: center;
-        margin-bottom: 3rem;
-    }
-    
-    .section-title {
-        font-size: 2.5rem;
-        font-weight: 700;
-        color: var(--gray-900);
-        margin-bottom: 1rem;
-        line-height: 1.2;
-    }
-    
-    .section-subtitle {
-        font-size: 1.125rem;
-        color: var(--gray-600);
-        max-width: 600px;
-        margin: 0 auto;
-        line-height: 1.6;
-    }
-    
-    /* Modern Cards */
-    .card {
-        background: linear-gradient(135deg, #f8fafc 0%, #e2e8f0 100%);
-        border-radius: var(--radius-xl);
-        padding: 2rem;
-        box-shadow: var(--shadow-lg);
-        border: 2px solid var(--primary-200);
-        transition: all 0.3s ease;
-        height: 100%;
-    }
-    
-    .card:hover {
-        transform: translateY(-4px);
-        box-shadow: var(--shadow-xl);
-        border-color: var(--primary-300);
-        background: linear-gradient(135deg, #f1f5f9 0%, #ddd6fe 100%);
-    }
-    
-    .card-header {
-        margin-bottom: 1.5rem;
-    }
-    
-    .card-title {
-        font-size: 1.5rem;
-        font-weight: 600;
-        color: var(--gray-900);
-        margin-bottom: 0.5rem;
-    }
-    
-    .card-description {
-        color: var(--gray-600);
-        line-height: 1.5;
-    }
-    
-    /* Feature Cards */
-    .feature-grid {
-        display: grid;
-        grid-template-columns: repeat(auto-fit, minmax(300px, 1fr));
-        gap: 2rem;
-        margin-top: 3rem;
-    }
-    
-    .feature-card {
-        background: linear-gradient(135deg, #eff6ff 0%, #dbeafe 100%);
-        border-radius: var(--radius-lg);
-        padding: 2rem;
-        text-align: center;
-        box-shadow: var(--shadow-md);
-        border: 2px solid #93c5fd;
-        transition: all 0.3s ease;
-    }
-    
-    .feature-card:hover {
-        transform: translateY(-4px);
-        box-shadow: var(--shadow-lg);
-        border-color: #3b82f6;
-        background: linear-gradient(135deg, #dbeafe 0%, #bfdbfe 100%);
-    }
-    
-    .feature-icon {
-        font-size: 3rem;
-        margin-bottom: 1rem;
-        display: block;
-    }
-    
-    .feature-title {
-        font-size: 1.25rem;
-        font-weight: 600;
-        color: var(--gray-900);
-        margin-bottom: 0.75rem;
-    }
-    
-    .feature-description {
-        color: var(--gray-600);
-        line-height: 1.5;
-    }
-    
-    /* Modern Buttons */
-    .btn {
-        display: inline-flex;
-        align-items: center;
-        justify-content: center;
-        padding: 0.75rem 1.5rem;
-        font-size: 1rem;
-        font-weight: 600;
-        border-radius: var(--radius-md);
-        border: none;
-        cursor: pointer;
-        transition: all 0.2s;
-        text-decoration: none;
-        line-height: 1;
-    }
-    
-    .btn-primary {
-        background: var(--primary-600);
-        color: white;
-    }
-    
-    .btn-primary:hover {
-        background: var(--primary-700);
-        transform: translateY(-1px);
-        box-shadow: var(--shadow-lg);
-    }
-    
-    .btn-secondary {
-        background: white;
-        color: var(--gray-700);
-        border: 1px solid var(--gray-300);
-    }
-    
-    .btn-secondary:hover {
-        background: var(--gray-50);
-        border-color: var(--gray-400);
-    }
-    
-    .btn-lg {
-        padding: 1rem 2rem;
-        font-size: 1.125rem;
-    }
-    
-    /* Form Styles */
-    .form-group {
-        margin-bottom: 1.5rem;
-    }
-    
-    .form-label {
-        display: block;
-        font-size: 0.875rem;
-        font-weight: 600;
-        color: var(--gray-700);
-        margin-bottom: 0.5rem;
-        text-transform: uppercase;
-        letter-spacing: 0.5px;
-    }
-    
-    /* Streamlit Override Styles */
-    .stButton > button {
-        background: linear-gradient(135deg, #3b82f6 0%, #1d4ed8 100%) !important;
-        color: white !important;
-        border: none !important;
-        border-radius: var(--radius-md) !important;
-        padding: 0.85rem 2rem !important;
-        font-weight: 700 !important;
-        font-size: 1.05rem !important;
-        transition: all 0.3s !important;
-        box-shadow: 0 4px 15px rgba(59, 130, 246, 0.4) !important;
-        width: 100%;
-        text-transform: uppercase;
-        letter-spacing: 0.5px;
-    }
-    
-    .stButton > button:hover {
-        background: linear-gradient(135deg, #1d4ed8 0%, #1e3a8a 100%) !important;
-        transform: translateY(-2px) !important;
-        box-shadow: 0 8px 25px rgba(59, 130, 246, 0.5) !important;
-    }
-    
-    .stTextInput > div > div > input {
-        border: 2px solid #93c5fd !important;
-        border-radius: var(--radius-md) !important;
-        padding: 0.75rem !important;
-        font-size: 1rem !important;
-        background: linear-gradient(135deg, #eff6ff 0%, #dbeafe 100%) !important;
-        color: #1a202c !important;
-        font-weight: 500 !important;
-        box-shadow: 0 4px 6px -1px rgb(0 0 0 / 0.1) !important;
-    }
-    
-    .stTextInput > div > div > input:focus {
-        border-color: var(--primary-500) !important;
-        box-shadow: 0 0 0 4px rgba(59, 130, 246, 0.15) !important;
-        background: linear-gradient(135deg, #dbeafe 0%, #bfdbfe 100%) !important;
-    }
-    
-    .stTextArea > div > div > textarea {
-        border: 2px solid #93c5fd !important;
-        border-radius: var(--radius-md) !important;
-        padding: 0.75rem !important;
-        font-size: 1rem !important;
-        background: linear-gradient(135deg, #eff6ff 0%, #dbeafe 100%) !important;
-        color: #1a202c !important;
-        font-weight: 500 !important;
-        box-shadow: 0 4px 6px -1px rgb(0 0 0 / 0.1) !important;
-    }
-    
-    .stTextArea > div > div > textarea:focus {
-        border-color: var(--primary-500) !important;
-        box-shadow: 0 0 0 4px rgba(59, 130, 246, 0.15) !important;
-        background: linear-gradient(135deg, #dbeafe 0%, #bfdbfe 100%) !important;
-    }
-
-    /* Fix placeholder text visibility */
-    .stTextArea > div > div > textarea::placeholder {
-        color: #6b7280 !important;
-        opacity: 0.7 !important;
-        font-weight: 400 !important;
-    }
-
-    .stTextInput > div > div > input::placeholder {
-        color: #6b7280 !important;
-        opacity: 0.7 !important;
-        font-weight: 400 !important;
-    }
-    
-    .stSelectbox > div > div {
-        border: 2px solid #93c5fd !important;
-        border-radius: var(--radius-md) !important;
-        background: linear-gradient(135deg, #eff6ff 0%, #dbeafe 100%) !important;
-        box-shadow: 0 4px 6px -1px rgb(0 0 0 / 0.1) !important;
-    }
-
-    /* Selectbox text and options visibility */
-    .stSelectbox > div > div > div {
-        color: #1a202c !important;
-        font-weight: 500 !important;
-    }
-
-    .stSelectbox div[data-baseweb="select"] > div {
-        color: #1a202c !important;
-        font-weight: 500 !important;
-    }
+    """
+    Load modern CSS design system inspired by React apps.
+    The stylesheet is a content-hashed static asset the browser caches, so each rerun
+    only sends a one-line @import (the CSS is inlined if static serving is off).
+    """
+    st.markdown(stylesheet_markup(st.get_option("server.enableStaticServing")), unsafe_allow_html=True)
 
-    /* Dropdown menu styling */
-    .stSelectbox ul {
-        background: #ffffff !important;
-        border: 2px solid #93c5fd !important;
-        border-radius: var(--radius-md) !important;
-        box-shadow: 0 10px 15px -3px rgb(0 0 0 / 0.1) !important;
-    }
+def render_html(markup):
+    """Render raw HTML minified (indentation and inter-tag whitespace are sent on every rerun)"""
+    st.markdown(minify_html(markup), unsafe_allow_html=True)
 
-    .stSelectbox ul li {
-        color: #1a202c !important;
-        font-weight: 500 !important;
-        padding: 0.75rem !important;
-    }
+@functools.lru_cache(maxsize=1)
+def plotly_express():
+    """plotly.express, imported on the first chart"""
+    import plotly.express as px
+    import plotly.io as pio
+    
+    # st.plotly_chart's Streamlit theme restyles figures anyway, so don't ship plotly's default template per chart
+    pio.templates.default = "none"
+    return px
 
-    .stSelectbox ul li:hover {
-        background: linear-gradient(135deg, #eff6ff 0%, #dbeafe 100%) !important;
-        color: #1a202c !important;
-    }
-    
-    .stSelectbox label {
-        font-size: 0.875rem !important;
-        font-weight: 600 !important;
-        color: #ffffff !important;
-        text-transform: uppercase;
-        letter-spacing: 0.5px;
-    }
-    
-    .stTextInput label, .stTextArea label {
-        font-size: 0.875rem !important;
-        font-weight: 600 !important;
-        color: #ffffff !important;
-        text-transform: uppercase;
-        letter-spacing: 0.5px;
-    }
-    
-    /* Progress Bar */
-    .stProgress .st-bp {
-        background: var(--primary-600) !important;
-        border-radius: var(--radius-sm) !important;
-    }
-    
-    .stProgress {
-        background: var(--gray-200) !important;
-        border-radius: var(--radius-sm) !important;
-    }
-    
-    /* Tabs */
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 0.5rem;
-        background: transparent;
-    }
-    
-    .stTabs [data-baseweb="tab"] {
-        background: linear-gradient(135deg, #f1f5f9 0%, #e2e8f0 100%) !important;
-        border: 2px solid #cbd5e0 !important;
-        border-radius: var(--radius-md) !important;
-        padding: 0.75rem 1.5rem !important;
-        color: #374151 !important;
-        font-weight: 600 !important;
-    }
-    
-    .stTabs [aria-selected="true"] {
-        background: linear-gradient(135deg, var(--primary-600) 0%, var(--primary-700) 100%) !important;
-        color: white !important;
-        border-color: var(--primary-600) !important;
-        box-shadow: 0 4px 12px rgba(59, 130, 246, 0.3) !important;
-    }
-    
-    /* Status Indicators */
-    .status-badge {
-        display: inline-flex;
-        align-items: center;
-        padding: 0.5rem 1rem;
-        border-radius: var(--radius-md);
-        font-size: 0.875rem;
-        font-weight: 600;
-        margin: 0.25rem;
-    }
-    
-    .status-success {
-        background: var(--success-50);
-        color: var(--success-600);
-        border: 1px solid var(--success-500);
-    }
-    
-    .status-warning {
-        background: var(--warning-50);
-        color: var(--warning-600);
-        border: 1px solid var(--warning-500);
-    }
-    
-    .status-error {
-        background: var(--error-50);
-        color: var(--error-600);
-        border: 1px solid var(--error-500);
-    }
-    
-    /* Metrics Grid */
-    .metrics-grid {
-        display: grid;
-        grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-        gap: 1.5rem;
-        margin: 2rem 0;
-    }
-    
-    .metric-card {
-        background: linear-gradient(135deg, #ecfeff 0%, #cffafe 100%);
-        border-radius: var(--radius-lg);
-        padding: 1.5rem;
-        text-align: center;
-        box-shadow: var(--shadow-md);
-        border: 2px solid #a7f3d0;
-    }
+def agent_tests():
+    """The agents module with its test functions, setting up the LLM and agents on first use"""
+    from campaign_assistant import setup_llm
+    import agents
     
-    .metric-value {
-        font-size: 2rem;
-        font-weight: 700;
-        color: var(--gray-900);
-        display: block;
-        margin-bottom: 0.5rem;
-    }
-    
-    .metric-label {
-        font-size: 0.875rem;
-        color: var(--gray-600);
-        text-transform: uppercase;
-        letter-spacing: 0.5px;
-        font-weight: 500;
-    }
-    
-    /* Smart Text Visibility - Context-aware colors */
-    
-    /* Main content area - Dark text on light gradient background */
-    .main .stMarkdown, .main .stMarkdown p, .main .stMarkdown div, .main .stMarkdown span {
-        color: #1a202c !important;
-        font-weight: 600 !important;
-    }
-    
-    .main .stMarkdown h1, .main .stMarkdown h2, .main .stMarkdown h3, .main .stMarkdown h4 {
-        color: #000000 !important;
-        font-weight: 800 !important;
-    }
-    
-    /* Section headers and content - dark text on light background */
-    .section-title {
-        color: #000000 !important;
-        font-weight: 800 !important;
-    }
-    
-    .section-subtitle {
-        color: #374151 !important;
-        font-weight: 600 !important;
-    }
-    
-    /* Feature cards - dark text on light backgrounds */
-    .feature-title {
-        color: #1a202c !important;
-        font-weight: 800 !important;
-    }
-    
-    .feature-description {
-        color: #4b5563 !important;
-        font-weight: 600 !important;
-    }
-    
-    /* Agent cards - dark text on light backgrounds */
-    .agent-name {
-        color: #1a202c !important;
-        font-weight: 800 !important;
-    }
-    
-    .agent-description {
-        color: #4b5563 !important;
-        font-weight: 600 !important;
-    }
-    
-    /* Form elements - white labels for dark backgrounds */
-    .stTextInput label, .stTextArea label, .stSelectbox label {
-        color: #ffffff !important;
-        font-weight: 700 !important;
-    }
-    
-    /* Cards with light backgrounds - dark text */
-    .card-title {
-        color: #1a202c !important;
-        font-weight: 800 !important;
-    }
-    
-    .card-description {
-        color: #4b5563 !important;
-        font-weight: 600 !important;
-    }
-    
-    /* Status and metrics - dark text */
-    .metric-label {
-        color: #374151 !important;
-        font-weight: 700 !important;
-    }
-    
-    /* General text improvements */
-    .stMarkdown p {
-        font-size: 1rem !important;
-        line-height: 1.6 !important;
-    }
+    setup_llm()
+    return agents
 
-    /* Agent Grid */
-    .agent-grid {
-        display: grid;
-        grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
-        gap: 1.5rem;
-        margin: 2rem 0;
-    }
-    
-    .agent-card {
-        background: linear-gradient(135deg, #fef3c7 0%, #fde68a 100%);
-        border-radius: var(--radius-lg);
-        padding: 1.5rem;
-        text-align: center;
-        box-shadow: var(--shadow-md);
-        border: 2px solid #fbbf24;
-        transition: all 0.3s ease;
-    }
-    
-    .agent-card:hover {
-        transform: translateY(-3px);
-        box-shadow: var(--shadow-lg);
-        border-color: #f59e0b;
-        background: linear-gradient(135deg, #fef3c7 0%, #fed7aa 100%);
-    }
-    
-    .agent-icon {
-        font-size: 2.5rem;
-        margin-bottom: 1rem;
-        display: block;
-    }
-    
-    .agent-name {
-        font-size: 1.125rem;
-        font-weight: 600;
-        color: var(--gray-900);
-        margin-bottom: 0.5rem;
-    }
-    
-    .agent-description {
-        color: var(--gray-600);
-        font-size: 0.875rem;
-        line-height: 1.4;
-    }
-    
-    /* Results Section */
-    .results-container {
-        background: linear-gradient(135deg, #f0f9ff 0%, #e0f2fe 100%);
-        border-radius: var(--radius-xl);
-        padding: 2rem;
-        margin: 2rem 0;
-        box-shadow: var(--shadow-lg);
-        border: 2px solid #7dd3fc;
-    }
-    
-    /* Hide Streamlit Elements */
-    #MainMenu {visibility: hidden;}
-    footer {visibility: hidden;}
-    header {visibility: hidden;}
-    .stDeployButton {display: none;}
-    
-    /* Responsive Design */
-    @media (max-width: 768px) {
-        .hero-title {
-            font-size: 2.5rem;
-        }
-        
-        .hero-stats {
-            gap: 1.5rem;
-        }
-        
-        .section {
-            padding: 2rem 1rem;
-        }
-        
-        .section-title {
-            font-size: 2rem;
-        }
-        
-        .nav-content {
-            flex-direction: column;
-            gap: 1rem;
-        }
-        
-        .feature-grid {
-            grid-template-columns: 1fr;
-        }
-    }
-    </style>
-    """, unsafe_allow_html=True)
+def render_section_intro(title, subtitle, compact=False):
+    """Centered section heading with a short description"""
+    if compact:
+        render_html(f'<div class="section-intro compact"><h3>{title}</h3><p>{subtitle}</p></div>')
+    else:
+        render_html(f'<div class="section-intro"><h2>{title}</h2><p>{subtitle}</p></div>')
 
 # COMPONENT FUNCTIONS
 
 
 def render_hero_section():
     """Render the hero section like a modern React component"""
-    st.markdown("""
+    render_html("""
     <div class="hero-section">
         <div class="hero-content">
             <h1 class="hero-title">AI Campaign Assistant Pro</h1>
@@ -790,7 +106,7 @@ def render_hero_section():
             </div>
         </div>
     </div>
-    """, unsafe_allow_html=True)
+    """)
 
 def render_navigation():
     """Render navigation component"""
@@ -807,114 +123,35 @@ def render_navigation():
     </div>
     """, unsafe_allow_html=True)
 
+FEATURES = [
+    ("🔍", "Market Research", "Deep analysis of target audience, competitive landscape, and market trends using advanced AI algorithms."),
+    ("✨", "Content Generation", "Create compelling, conversion-focused content optimized for different platforms and audience segments."),
+    ("📱", "Channel Selection", "Intelligent platform recommendations based on your audience, budget, and campaign objectives."),
+    ("📅", "Schedule Optimization", "Data-driven timing strategies to maximize reach and engagement across all channels.")
+]
+
 def render_features_section():
     """Render features section with Streamlit components"""
     
     # Section header
-    st.markdown("""
-    <div style="text-align: center; margin: 4rem 0 3rem 0;">
-        <h2 style="font-size: 2.5rem; font-weight: 700; color: #000000; margin-bottom: 1rem; line-height: 1.2;">
-            Powered by Advanced AI
-        </h2>
-        <p style="font-size: 1.125rem; color: #000000; max-width: 600px; margin: 0 auto; line-height: 1.6;">
-            Our multi-agent system combines specialized AI experts to deliver 
-            comprehensive marketing campaigns tailored to your needs.
-        </p>
-    </div>
-    """, unsafe_allow_html=True)
+    render_section_intro(
+        "Powered by Advanced AI",
+        "Our multi-agent system combines specialized AI experts to deliver "
+        "comprehensive marketing campaigns tailored to your needs."
+    )
     
     # Feature cards using Streamlit columns
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        st.markdown("""
-                <div style="background: linear-gradient(135deg, #eff6ff 0%, #dbeafe 100%);
-                    border-radius: 0.75rem; padding: 2rem; text-align: center;
-                    box-shadow: 0 4px 6px -1px rgb(0 0 0 / 0.1);
-                    border: 2px solid #93c5fd; transition: all 0.3s ease; height: 280px;
-                    display: flex; flex-direction: column; justify-content: center;">
-            <span style="font-size: 3rem; margin-bottom: 1rem; display: block;">🔍</span>
-                                <h3 style="font-size: 1.25rem; font-weight: 800; color: #1a202c; margin-bottom: 0.75rem;">
-                        Market Research
-                    </h3>
-                    <p style="color: #374151; line-height: 1.5; font-size: 0.95rem; font-weight: 600;">
-                        Deep analysis of target audience, competitive landscape,
-                        and market trends using advanced AI algorithms.
-                    </p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col2:
-        st.markdown("""
-        <div style="background: linear-gradient(135deg, #eff6ff 0%, #dbeafe 100%); 
-                    border-radius: 0.75rem; padding: 2rem; text-align: center; 
-                    box-shadow: 0 4px 6px -1px rgb(0 0 0 / 0.1); 
-                    border: 2px solid #93c5fd; transition: all 0.3s ease; height: 280px;
-                    display: flex; flex-direction: column; justify-content: center;">
-            <span style="font-size: 3rem; margin-bottom: 1rem; display: block;">✨</span>
-            <h3 style="font-size: 1.25rem; font-weight: 800; color: #1a202c; margin-bottom: 0.75rem;">
-                Content Generation
-            </h3>
-            <p style="color: #374151; line-height: 1.5; font-size: 0.95rem; font-weight: 600;">
-                Create compelling, conversion-focused content optimized 
-                for different platforms and audience segments.
-            </p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col3:
-        st.markdown("""
-        <div style="background: linear-gradient(135deg, #eff6ff 0%, #dbeafe 100%); 
-                    border-radius: 0.75rem; padding: 2rem; text-align: center; 
-                    box-shadow: 0 4px 6px -1px rgb(0 0 0 / 0.1); 
-                    border: 2px solid #93c5fd; transition: all 0.3s ease; height: 280px;
-                    display: flex; flex-direction: column; justify-content: center;">
-            <span style="font-size: 3rem; margin-bottom: 1rem; display: block;">📱</span>
-            <h3 style="font-size: 1.25rem; font-weight: 800; color: #1a202c; margin-bottom: 0.75rem;">
-                Channel Selection
-            </h3>
-            <p style="color: #374151; line-height: 1.5; font-size: 0.95rem; font-weight: 600;">
-                Intelligent platform recommendations based on your 
-                audience, budget, and campaign objectives.
-            </p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col4:
-        st.markdown("""
-        <div style="background: linear-gradient(135deg, #eff6ff 0%, #dbeafe 100%); 
-                    border-radius: 0.75rem; padding: 2rem; text-align: center; 
-                    box-shadow: 0 4px 6px -1px rgb(0 0 0 / 0.1); 
-                    border: 2px solid #93c5fd; transition: all 0.3s ease; height: 280px;
-                    display: flex; flex-direction: column; justify-content: center;">
-            <span style="font-size: 3rem; margin-bottom: 1rem; display: block;">📅</span>
-            <h3 style="font-size: 1.25rem; font-weight: 800; color: #1a202c; margin-bottom: 0.75rem;">
-                Schedule Optimization
-            </h3>
-            <p style="color: #374151; line-height: 1.5; font-size: 0.95rem; font-weight: 600;">
-                Data-driven timing strategies to maximize reach 
-                and engagement across all channels.
-            </p>
-        </div>
-        """, unsafe_allow_html=True)
+    for col, (icon, title, text) in zip(st.columns(len(FEATURES)), FEATURES):
+        with col:
+            render_html(f'<div class="feature-card"><span class="icon">{icon}</span><h3>{title}</h3><p>{text}</p></div>')
 
 def render_campaign_builder():
     """Render the main campaign builder component"""
-    st.markdown("""
-    <div class="section" id="campaign">
-        <div class="section-header">
-            <h2 style="font-size: 2.5rem; font-weight: 700; color: #000000; margin-bottom: 1rem; line-height: 1.2;">
-            Build Your Campaign
-        </h2>
-             <p style="font-size: 1.125rem; color: #000000; max-width: 600px; margin: 0 auto; line-height: 1.6;">
-             Describe your product and goals. Our AI agents will create a comprehensive 
-             marketing strategy tailored to your specific needs.
-        </p>
-               
-            
-        
-    </div>
-    """, unsafe_allow_html=True)
+    render_section_intro(
+        "Build Your Campaign",
+        "Describe your product and goals. Our AI agents will create a comprehensive "
+        "marketing strategy tailored to your specific needs."
+    )
     
     # Campaign Builder Form
     with st.container():
@@ -966,6 +203,32 @@ def render_campaign_builder():
                 with col_y:
                     geo_target = st.text_input("Geographic Target", placeholder="e.g., North America, Global")
                     competition_level = st.slider("Competition Level", 1, 5, 3, help="How competitive is your market?")
+                multi_geo = st.checkbox(
+                    "🌍 Localise per region",
+                    help="With several regions (e.g. USA, UK, India): shared research per market cluster, "
+                         "then content, channels and schedule for each region in parallel"
+                )
+                platform_content = st.checkbox(
+                    "📐 Platform-formatted content",
+                    help="Ad variants for each recommended platform in its own format, checked against "
+                         "its character limits (only failing variants are regenerated; single-region plans only)"
+                )
+                ad_variants = st.number_input(
+                    "A/B Ad Variants",
+                    min_value=0,
+                    max_value=50,
+                    value=0,
+                    step=5,
+                    help="Generate this many distinct ad variants for A/B testing (0 = off)"
+                )
+                time_limit = st.number_input(
+                    "Time Limit (seconds)",
+                    min_value=0,
+                    max_value=600,
+                    value=int(os.getenv("CAMPAIGN_DEADLINE_S", "0") or 0),
+                    step=15,
+                    help="Later stages return shorter or cached answers to finish in time (0 = no limit)"
+                )
             
             st.markdown('</div>', unsafe_allow_html=True)
             
@@ -974,7 +237,10 @@ def render_campaign_builder():
                 if not product or not goal:
                     st.error("❌ Please provide both product description and marketing objectives")
                 else:
-                    generate_campaign_with_ui(product, goal, budget, duration)
+                    generate_campaign_with_ui(product, goal, budget, duration, ad_variants=int(ad_variants),
+                                             time_limit=int(time_limit), industry=industry,
+                                             competition_level=int(competition_level), geo_target=geo_target,
+                                             multi_geo=multi_geo, platform_content=platform_content)
         
         with col2:
             render_agent_status_panel()
@@ -996,36 +262,112 @@ def render_agent_status_panel():
     
     # Agent grid
     agents = [
-        {"icon": "🔍", "name": "Research Agent", "desc": "Market analysis & insights"},
-        {"icon": "✨", "name": "Content Agent", "desc": "Creative content generation"},  
-        {"icon": "📱", "name": "Channel Agent", "desc": "Platform optimization"},
-        {"icon": "📅", "name": "Schedule Agent", "desc": "Timing strategies"}
+        {"icon": "🔍", "name": "Research Agent", "desc": "Market analysis & insights", "kind": "research"},
+        {"icon": "✨", "name": "Content Agent", "desc": "Creative content generation", "kind": "content"},  
+        {"icon": "📱", "name": "Channel Agent", "desc": "Platform optimization", "kind": "channel"},
+        {"icon": "📅", "name": "Schedule Agent", "desc": "Timing strategies", "kind": "schedule"}
     ]
     
-    # Different colors for each agent
-    agent_colors = [
-        {"bg": "linear-gradient(135deg, #fef2f2 0%, #fecaca 100%)", "border": "#f87171"},
-        {"bg": "linear-gradient(135deg, #f0fdf4 0%, #bbf7d0 100%)", "border": "#4ade80"},
-        {"bg": "linear-gradient(135deg, #fffbeb 0%, #fed7aa 100%)", "border": "#fb923c"},
-        {"bg": "linear-gradient(135deg, #f3e8ff 0%, #d8b4fe 100%)", "border": "#a855f7"}
+    # One markdown element for the whole grid; colours come from the agent-* classes
+    render_html("".join(
+        f'<div class="agent-status-card agent-{agent["kind"]}"><span class="icon">{agent["icon"]}</span>'
+        f'<div><strong>{agent["name"]}</strong><br/><small>{agent["desc"]}</small></div></div>'
+        for agent in agents
+    ))
+
+def run_inline_generation(request, status_text, on_update=None):
+    """
+    Run generation in a background thread so this script stays interruptible:
+    a Stop click, any other rerun or a disconnect interrupts the wait below
+    and the finally block cancels the in-flight generation.
+    on_update(plan) is called from this thread whenever a section has been enriched.
+    """
+    from campaign_assistant import generate_campaign_plan
+    
+    session_id = current_session_id()
+    cancel_token = start_generation(session_id)
+    outcome = {}
+    drafts = []
+    run_ctx = contextvars.copy_context()
+    
+    def run_generation():
+        outcome["result"] = run_ctx.run(generate_campaign_plan, cancel_token=cancel_token,
+                                        on_update=drafts.append, **request)
+    
+    worker = threading.Thread(target=run_generation, daemon=True)
+    worker.start()
+    
+    st.button("⏹️ Stop Generation", key="stop_generation")
+    
+    started = time.time()
+    shown = 0
+    try:
+        while worker.is_alive():
+            status_text.markdown(f"**🤖 AI agents working...** {int(time.time() - started)}s elapsed")
+            # Streamlit elements can only be updated from the script thread
+            if on_update is not None and len(drafts) > shown:
+                shown = len(drafts)
+                on_update(drafts[-1])
+            time.sleep(0.5)
+    finally:
+        if worker.is_alive():
+            cancel_token.cancel("stopped by user")
+        finish_generation(session_id, cancel_token)
+    
+    return outcome.get("result", {"success": False, "error": "Generation did not complete"})
+
+def render_plan_preview(placeholder, plan):
+    """Read-only view of a draft plan (no widgets, so it can be redrawn in place)"""
+    from plan_templates import STAGE_SECTIONS
+    
+    enriched = plan.get("enriched_sections", [])
+    sections = [
+        ("research", "🔍 Market Research"),
+        ("content", "✨ Content Strategy"),
+        ("channel", "📱 Channels"),
+        ("schedule", "📅 Schedule")
     ]
-    
-    for i, agent in enumerate(agents):
-        color = agent_colors[i]
-        st.markdown(f"""
-        <div style="padding: 1rem; margin: 0.75rem 0; background: {color['bg']}; border-radius: var(--radius-md); border: 2px solid {color['border']}; transition: all 0.3s ease;">
-            <div style="display: flex; align-items: center; gap: 0.75rem;">
-                <span style="font-size: 1.75rem;">{agent['icon']}</span>
-                <div>
-                    <strong style="color: #1a202c; font-size: 0.95rem; font-weight: 700;">{agent['name']}</strong><br/>
-                    <small style="color: #374151; font-weight: 500;">{agent['desc']}</small>
-                </div>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
+    with placeholder.container():
+        st.markdown(f"#### 📝 Draft Plan · {len(enriched)}/{len(sections)} sections enriched by AI agents")
+        for stage, title in sections:
+            badge = "✅ AI-enriched" if stage in enriched else "📝 Template draft"
+            with st.expander(f"{title} · {badge}"):
+                st.markdown(plan[STAGE_SECTIONS[stage]])
 
-def generate_campaign_with_ui(product, goal, budget, duration):
+def run_queued_generation(request, status_text):
+    """
+    Enqueue generation for the worker nodes (worker.py) and poll for the result.
+    As with inline runs, an interrupted wait cancels the job.
+    """
+    job_id = enqueue({**request, "tenant": current_session_id(), "priority": "interactive"})
+    
+    st.button("⏹️ Stop Generation", key="stop_generation")
+    
+    started = time.time()
+    job = None
+    try:
+        while True:
+            job = get_job(job_id)
+            if job["status"] in FINAL_STATUSES:
+                break
+            state = "queued" if job["status"] == "queued" else f"running on {job['lease_owner']}"
+            status_text.markdown(f"**🤖 Campaign job {state}...** {int(time.time() - started)}s elapsed")
+            time.sleep(1)
+    finally:
+        if job is None or job["status"] not in FINAL_STATUSES:
+            request_cancel(job_id)
+    
+    if job["status"] == "done":
+        return job["result"]
+    if job["status"] == "cancelled":
+        return {"success": False, "cancelled": True, "error": "Campaign generation cancelled"}
+    return {"success": False, "error": job.get("error") or "Campaign job failed"}
+
+def generate_campaign_with_ui(product, goal, budget, duration, ad_variants=0, time_limit=0,
+                              industry="Other", competition_level=3, geo_target="", multi_geo=False,
+                              platform_content=False):
     """Generate campaign with beautiful UI feedback"""
+    from plan_templates import build_skeleton_plan
     
     # Progress container
     progress_container = st.container()
@@ -1054,63 +396,91 @@ def generate_campaign_with_ui(product, goal, budget, duration):
         budget_clean = budget.split()[0]
         duration_clean = duration.split()[0] + " " + duration.split()[1]
         
-       
-        result = generate_campaign_plan(
-            product_description=product,
-            marketing_goal=goal,
-            budget_range=budget_clean,
-            campaign_duration=duration_clean
-        )
+        request = {
+            "product_description": product,
+            "marketing_goal": goal,
+            "budget_range": budget_clean,
+            "campaign_duration": duration_clean,
+            "ad_variants": ad_variants,
+            "deadline_s": time_limit,
+            "industry": industry,
+            "competition_level": competition_level,
+            "geo_target": geo_target,
+            "multi_geo": multi_geo,
+            "platform_content": platform_content
+        }
+        
+        # Fast path: a template draft is shown right away and redrawn as agents enrich it
+        preview = st.empty()
+        
+        def show_draft(draft):
+            render_plan_preview(preview, draft)
+            progress_bar.progress(25 * len(draft["enriched_sections"]))
+        
+        show_draft(build_skeleton_plan(
+            product, goal, budget_clean, duration_clean, industry, competition_level, geo_target
+        ))
+        
+        if QUEUE_MODE:
+            result = run_queued_generation(request, status_text)
+        else:
+            result = run_inline_generation(request, status_text, on_update=show_draft)
         
         # Clear progress
         progress_bar.empty()
         status_text.empty()
         
-        # Display results
+        # Display results (the draft stays visible if generation didn't finish)
         if result["success"]:
+            preview.empty()
             render_campaign_results(result["campaign_plan"])
+        elif result.get("cancelled"):
+            st.info(f"🛑 {result['error']} - the draft above is built from templates only")
         else:
             render_error_message(result.get('error', 'Unknown error occurred'))
 
 def render_campaign_results(plan):
     """Render campaign results with modern UI"""
     
-    # Store campaign results in session state to prevent data loss
-    st.session_state.campaign_plan = plan
+    # Store campaign results under per-session memory accounting to prevent data loss
+    put_plan(plan)
     
     st.success("🎉 **Your AI-Generated Campaign Plan is Ready!**")
     
+    if plan.get("status") == "draft":
+        st.info("📝 Some sections are still template drafts: the AI agents did not enrich them in this run")
+    
+    budget_stages = [d for d in plan.get("degraded_stages", []) if d["mode"] == "budget"]
+    time_stages = [d for d in plan.get("degraded_stages", []) if d["mode"] != "budget"]
+    if time_stages:
+        degraded = ", ".join(f"{d['stage']} ({d['mode']})" for d in time_stages)
+        st.warning(f"⏱️ Time limit reached - shortened or cached sections: {degraded}")
+    if budget_stages:
+        exceeded = (plan.get("token_budget") or {}).get("exceeded") or "token"
+        st.warning(f"💰 {exceeded.title()} budget used up - sections kept as drafts: "
+                   f"{', '.join(d['stage'] for d in budget_stages)}")
+    
+    geo = plan.get("multi_geo")
+    if geo:
+        st.info(f"🌍 Localised for {len(geo['regions'])} regions: {', '.join(geo['regions'])} · "
+                f"{geo['research_runs']} shared research run(s) · {geo['parallel_speedup']}x parallel speed-up" +
+                (f" · not generated for multi-geo plans: {', '.join(geo['not_generated'])}"
+                 if geo.get("not_generated") else ""))
+    
     # Campaign overview metrics
     overview = plan["campaign_overview"]
     
-    st.markdown("""
-    <div class="metrics-grid">
-        <div class="metric-card">
-            <span class="metric-value">💰</span>
-            <span class="metric-label">Investment</span>
-            <div style="margin-top: 0.5rem; font-weight: 600; color: var(--gray-900);">{}</div>
-        </div>
-        <div class="metric-card">
-            <span class="metric-value">⏰</span>
-            <span class="metric-label">Duration</span>
-            <div style="margin-top: 0.5rem; font-weight: 600; color: var(--gray-900);">{}</div>
-        </div>
-        <div class="metric-card">
-            <span class="metric-value">📅</span>
-            <span class="metric-label">Created</span>
-            <div style="margin-top: 0.5rem; font-weight: 600; color: var(--gray-900);">{}</div>
-        </div>
-        <div class="metric-card">
-            <span class="metric-value">🤖</span>
-            <span class="metric-label">AI Agents</span>
-            <div style="margin-top: 0.5rem; font-weight: 600; color: var(--gray-900);">4 Experts</div>
-        </div>
-    </div>
-    """.format(
-        overview['budget'],
-        overview['duration'], 
-        overview['created_date'].split()[0],
-    ), unsafe_allow_html=True)
+    metrics = [
+        ("💰", "Investment", overview['budget']),
+        ("⏰", "Duration", overview['duration']),
+        ("📅", "Created", overview['created_date'].split()[0]),
+        ("🤖", "AI Agents", "4 Experts")
+    ]
+    render_html('<div class="metrics-grid">' + "".join(
+        f'<div class="metric-card"><span class="metric-value">{icon}</span>'
+        f'<span class="metric-label">{label}</span><div class="metric-detail">{value}</div></div>'
+        for icon, label, value in metrics
+    ) + '</div>')
     
     # Results in tabs
     tab1, tab2, tab3, tab4, tab5 = st.tabs([
@@ -1120,42 +490,68 @@ def render_campaign_results(plan):
     with tab1:
         st.markdown('<div class="results-container">', unsafe_allow_html=True)
         st.markdown("### 🔍 Market Research & Audience Analysis")
-        # Use session state to prevent data loss on interactions
-        current_plan = st.session_state.get('campaign_plan', plan)
+        # Use the session plan to prevent data loss on interactions
+        current_plan = get_plan(plan)
         st.markdown(current_plan["research_insights"])
         st.markdown('</div>', unsafe_allow_html=True)
     
     with tab2:
         st.markdown('<div class="results-container">', unsafe_allow_html=True)
         st.markdown("### ✨ Content Strategy & Creative Direction")
-        # Use session state to prevent data loss on interactions
-        current_plan = st.session_state.get('campaign_plan', plan)
+        # Use the session plan to prevent data loss on interactions
+        current_plan = get_plan(plan)
         st.markdown(current_plan["content_strategy"])
+        
+        if current_plan.get("platform_content"):
+            platform_stats = current_plan.get("platform_content_stats", {})
+            st.caption(
+                f"{platform_stats.get('variants', 0)} variants for {platform_stats.get('platforms', 0)} platforms · "
+                f"{platform_stats.get('regenerated', 0)} regenerated, {platform_stats.get('fixed_locally', 0)} "
+                f"trimmed to fit limits"
+            )
+            if st.checkbox("📏 Show Character Counts"):
+                st.dataframe(
+                    [
+                        {"Platform": platform, "Variant": i, "Field": field,
+                         "Chars": f"{len(value)}/{result['limits'][field]}", "Text": value}
+                        for platform, result in current_plan["platform_content"].items()
+                        for i, variant in enumerate(result["variants"], 1)
+                        for field, value in variant.items()
+                    ],
+                    use_container_width=True
+                )
+        
+        if current_plan.get("ad_variants"):
+            variant_stats = current_plan.get("ad_variant_stats", {})
+            st.markdown(f"### 🧪 A/B Ad Variants ({len(current_plan['ad_variants'])})")
+            st.caption(
+                f"{variant_stats.get('received', 0)} generated in {variant_stats.get('batches', 0)} batches, "
+                f"{variant_stats.get('duplicates_pruned', 0)} near-duplicates pruned"
+            )
+            st.dataframe(current_plan["ad_variants"], use_container_width=True)
         st.markdown('</div>', unsafe_allow_html=True)
     
     with tab3:
         st.markdown('<div class="results-container">', unsafe_allow_html=True)
         st.markdown("### 📱 Recommended Marketing Channels")
-        # Use session state to prevent data loss on checkbox interaction
-        current_plan = st.session_state.get('campaign_plan', plan)
+        # Use the session plan to prevent data loss on checkbox interaction
+        current_plan = get_plan(plan)
         st.markdown(current_plan["channel_recommendations"])
         
-        # Add sample visualization
         if st.checkbox("📊 Show Channel Allocation Chart"):
-            create_channel_chart()
+            create_channel_chart(current_plan.get("budget_allocation"))
         
         st.markdown('</div>', unsafe_allow_html=True)
     
     with tab4:
         st.markdown('<div class="results-container">', unsafe_allow_html=True)
         st.markdown("### 📅 Optimal Posting Schedule")
-        # Use session state to prevent data loss on checkbox interaction
-        current_plan = st.session_state.get('campaign_plan', plan)
+        # Use the session plan to prevent data loss on checkbox interaction
+        current_plan = get_plan(plan)
         st.markdown(current_plan["posting_schedule"])
         
-        # Add sample schedule visualization
         if st.checkbox("📊 Show Weekly Schedule"):
-            create_schedule_chart()
+            create_schedule_chart(current_plan.get("posting_calendar"))
         
         st.markdown('</div>', unsafe_allow_html=True)
     
@@ -1163,17 +559,13 @@ def render_campaign_results(plan):
         st.markdown('<div class="results-container">', unsafe_allow_html=True)
         st.markdown("### 🎯 Implementation Roadmap")
         
-        # Use session state to prevent data loss on interactions
-        current_plan = st.session_state.get('campaign_plan', plan)
-        for i, step in enumerate(current_plan["next_steps"], 1):
-            st.markdown(f"""
-            <div style="background: linear-gradient(135deg, #f0fdf4 0%, #dcfce7 100%); padding: 1.5rem; margin: 1rem 0; border-radius: var(--radius-lg); border-left: 5px solid #16a34a; box-shadow: var(--shadow-md); border: 2px solid #86efac;">
-                <h4 style="color: #1a202c; margin-bottom: 0.5rem; font-weight: 700;">Step {i}: {step}</h4>
-                <div style="background: linear-gradient(135deg, #ecfdf5 0%, #d1fae5 100%); padding: 0.75rem; border-radius: var(--radius-md); margin-top: 0.75rem; border: 2px solid #22c55e;">
-                    <small style="color: #15803d; font-weight: 600;">💡 Ready for implementation</small>
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
+        # Use the session plan to prevent data loss on interactions
+        current_plan = get_plan(plan)
+        render_html("".join(
+            f'<div class="step-card"><h4>Step {i}: {step}</h4>'
+            f'<div class="step-status"><small>💡 Ready for implementation</small></div></div>'
+            for i, step in enumerate(current_plan["next_steps"], 1)
+        ))
         
         # Export options
         st.markdown("### 💾 Export Your Campaign")
@@ -1205,6 +597,40 @@ def render_campaign_results(plan):
                 st.info("📧 Sharing functionality ready for integration")
         
         st.markdown('</div>', unsafe_allow_html=True)
+    
+    plan_version = get_plan(plan).get("plan_version")
+    if plan_version and plan_version["version"] > 1:
+        render_version_history(plan_version)
+
+def render_version_history(plan_version):
+    """Side-by-side comparison of two stored iterations of this campaign"""
+    from plan_versions import list_versions, diff_versions
+
+    lineage = plan_version["lineage"]
+    versions = [v["version"] for v in list_versions(lineage)]
+    with st.expander(f"🕘 Version History ({len(versions)} iterations)"):
+        col1, col2 = st.columns(2)
+        with col1:
+            version_a = st.selectbox("Compare", versions, index=max(len(versions) - 2, 0), key="version_a")
+        with col2:
+            version_b = st.selectbox("With", versions, index=versions.index(plan_version["version"]),
+                                     key="version_b")
+        
+        sections = diff_versions(lineage, version_a, version_b)
+        changed = [s for s in sections if s["changed"]]
+        if not changed:
+            st.info("No differences between these versions")
+        for section in changed:
+            st.markdown(f"#### {section['section'].replace('_', ' ').title()}")
+            col1, col2 = st.columns(2)
+            with col1:
+                st.caption(f"v{version_a}")
+                st.markdown(section["a"])
+            with col2:
+                st.caption(f"v{version_b}")
+                st.markdown(section["b"])
+            if st.checkbox("Show line diff", key=f"diff_{section['section']}"):
+                st.code(section["unified"], language="diff")
 
 def render_error_message(error_msg):
     """Render error message with helpful guidance"""
@@ -1237,20 +663,30 @@ def render_error_message(error_msg):
         </div>
         """, unsafe_allow_html=True)
 
-def create_channel_chart():
-    """Create sample channel allocation chart"""
-    data = {
-        'Channel': ['Google Ads', 'Meta', 'LinkedIn', 'YouTube', 'Email'],
-        'Budget_%': [35, 30, 20, 10, 5],
-        'Expected_Reach': [50000, 45000, 25000, 30000, 15000]
-    }
+def create_channel_chart(allocation=None):
+    """Budget allocation chart from the optimizer (a sample split for older plans)"""
+    if allocation:
+        funded = [c for c in allocation["channels"] if c["spend"] >= 1]
+        data = {
+            'Channel': [c["channel"] for c in funded],
+            'Budget_%': [c["share_pct"] for c in funded],
+            'Expected_Reach': [c["expected_reach"] for c in funded]
+        }
+    else:
+        data = {
+            'Channel': ['Google Ads', 'Meta', 'LinkedIn', 'YouTube', 'Email'],
+            'Budget_%': [35, 30, 20, 10, 5],
+            'Expected_Reach': [50000, 45000, 25000, 30000, 15000]
+        }
     
+    px = plotly_express()
     fig = px.bar(
         x=data['Channel'],
         y=data['Budget_%'],
         title="Recommended Budget Allocation by Channel",
         color=data['Budget_%'],
-        color_continuous_scale=['#3b82f6', '#1d4ed8', '#1e3a8a']
+        color_continuous_scale=['#3b82f6', '#1d4ed8', '#1e3a8a'],
+        hover_data={'Expected reach': data['Expected_Reach']}
     )
     
     fig.update_layout(
@@ -1261,19 +697,44 @@ def create_channel_chart():
     )
     
     st.plotly_chart(fig, use_container_width=True)
+    
+    if allocation:
+        st.caption(f"Optimised for {allocation['industry']} at competition level {allocation['competition_level']}: "
+                   f"${allocation['budget']:,.0f} total, ~{allocation['expected_reach']:,} expected reach")
 
-def create_schedule_chart():
-    """Create sample weekly schedule chart"""
+def create_schedule_chart(posting_calendar=None):
+    """Average posts per weekday by channel from the solved calendar (a sample week for older plans)"""
+    import pandas as pd
+    from schedule_solver import calendar_from_json
+    
+    px = plotly_express()
     days = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
-    posts = [3, 2, 4, 3, 5, 2, 1]
     
-    fig = px.bar(
-        x=days, 
-        y=posts, 
-        title="Recommended Posts Per Day",
-        color=posts,
-        color_continuous_scale=['#3b82f6', '#1d4ed8']
-    )
+    if posting_calendar:
+        calendar = calendar_from_json(posting_calendar)
+        weeks = posting_calendar["weeks"]
+        per_day = calendar.sum(axis=1).reshape(weeks, 7, -1).mean(axis=0)
+        data = pd.DataFrame([
+            {"Day": day, "Channel": channel, "Posts": round(float(per_day[d, c]), 2)}
+            for d, day in enumerate(days)
+            for c, channel in enumerate(posting_calendar["channels"])
+        ])
+        fig = px.bar(
+            data,
+            x="Day",
+            y="Posts",
+            color="Channel",
+            title=f"Average Posts Per Day (UTC) over {weeks} Weeks"
+        )
+    else:
+        posts = [3, 2, 4, 3, 5, 2, 1]
+        fig = px.bar(
+            x=days, 
+            y=posts, 
+            title="Recommended Posts Per Day",
+            color=posts,
+            color_continuous_scale=['#3b82f6', '#1d4ed8']
+        )
     
     fig.update_layout(
         plot_bgcolor='rgba(0,0,0,0)',
@@ -1283,72 +744,31 @@ def create_schedule_chart():
     )
     
     st.plotly_chart(fig, use_container_width=True)
-
-def create_text_summary(plan):
-    """Create executive summary"""
-    overview = plan["campaign_overview"]
     
-    return f"""
-AI CAMPAIGN PLAN - EXECUTIVE SUMMARY
-{'='*50}
-
-CAMPAIGN OVERVIEW
-Product: {overview['product']}
-Objective: {overview['goal']}
-Investment: {overview['budget']}
-Timeline: {overview['duration']}
-Generated: {overview['created_date']}
-
-RESEARCH INSIGHTS
-{plan['research_insights'][:500]}...
+    if posting_calendar:
+        st.caption(f"Phases: {' → '.join(dict.fromkeys(posting_calendar['phases']))} · "
+                   f"regions: {', '.join(posting_calendar['regions'])} · "
+                   f"{sum(slot[3] for slot in posting_calendar['slots'])} posts scheduled")
 
-CONTENT STRATEGY
-{plan['content_strategy'][:500]}...
-
-CHANNEL RECOMMENDATIONS
-{plan['channel_recommendations'][:500]}...
-
-IMPLEMENTATION ROADMAP
-{chr(10).join([f"{i}. {step}" for i, step in enumerate(plan['next_steps'], 1)])}
-
-Generated by AI Campaign Assistant Pro
-{overview['created_date']}
-    """
+def render_agent_test_card(kind, icon, title, description):
+    """Coloured header card above each agent's test expander"""
+    render_html(f'<div class="agent-test-card agent-{kind}"><span class="icon">{icon}</span>'
+                f'<h3>{title}</h3><p>{description}</p></div>')
 
 def render_agent_testing_section():
     """Render individual agent testing section"""
     
-    st.markdown("""
-    <div style="text-align: center; margin: 4rem 0 3rem 0;">
-        <h2 style="font-size: 2.5rem; font-weight: 700; color: #000000; margin-bottom: 1rem; line-height: 1.2;">
-            🔬 Test Individual AI Agents
-        </h2>
-        <p style="font-size: 1.125rem; color: #000000; max-width: 600px; margin: 0 auto; line-height: 1.6;">
-            Test each AI agent separately to understand their specialized capabilities and see how they work.
-        </p>
-    </div>
-    """, unsafe_allow_html=True)
+    render_section_intro(
+        "🔬 Test Individual AI Agents",
+        "Test each AI agent separately to understand their specialized capabilities and see how they work."
+    )
     
     # Agent testing grid
     col1, col2 = st.columns(2)
     
     with col1:
         # Research Agent Testing
-        st.markdown("""
-        <div style="background: linear-gradient(135deg, #fef2f2 0%, #fecaca 100%); 
-                    border-radius: 1rem; padding: 2rem; margin-bottom: 2rem;
-                    border: 2px solid #f87171; box-shadow: 0 4px 6px -1px rgb(0 0 0 / 0.1);">
-            <div style="text-align: center; margin-bottom: 1.5rem;">
-                <span style="font-size: 3rem; display: block; margin-bottom: 1rem;">🔍</span>
-                <h3 style="font-size: 1.5rem; font-weight: 700; color: #1a202c; margin-bottom: 0.5rem;">
-                    Research Agent
-                </h3>
-                <p style="color: #4b5563; font-size: 0.9rem;">
-                    Market analysis and audience research specialist
-                </p>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
+        render_agent_test_card("research", "🔍", "Research Agent", "Market analysis and audience research specialist")
         
         with st.expander("🔍 Test Research Agent", expanded=False):
             st.markdown("**Test market research and audience analysis capabilities**")
@@ -1367,7 +787,7 @@ def render_agent_testing_section():
             if st.button("🔍 Analyze Market & Audience", key="test_research", use_container_width=True):
                 with st.spinner("🔍 Research agent analyzing..."):
                     try:
-                        result = test_research_agent(research_product, research_goal)
+                        result = agent_tests().test_research_agent(research_product, research_goal)
                         st.markdown("### 📊 Research Results")
                         st.success("✅ Analysis Complete!")
                         st.markdown(result)
@@ -1375,21 +795,7 @@ def render_agent_testing_section():
                         st.error(f"❌ Error: {str(e)}")
         
         # Channel Agent Testing  
-        st.markdown("""
-        <div style="background: linear-gradient(135deg, #fff7ed 0%, #fed7aa 100%); 
-                    border-radius: 1rem; padding: 2rem; margin-bottom: 2rem;
-                    border: 2px solid #fb923c; box-shadow: 0 4px 6px -1px rgb(0 0 0 / 0.1);">
-            <div style="text-align: center; margin-bottom: 1.5rem;">
-                <span style="font-size: 3rem; display: block; margin-bottom: 1rem;">📱</span>
-                <h3 style="font-size: 1.5rem; font-weight: 700; color: #1a202c; margin-bottom: 0.5rem;">
-                    Channel Agent
-                </h3>
-                <p style="color: #4b5563; font-size: 0.9rem;">
-                    Platform selection and optimization expert
-                </p>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
+        render_agent_test_card("channel", "📱", "Channel Agent", "Platform selection and optimization expert")
         
         with st.expander("📱 Test Channel Agent", expanded=False):
             st.markdown("**Test platform selection and channel recommendations**")
@@ -1405,7 +811,7 @@ def render_agent_testing_section():
             if st.button("📱 Recommend Channels", key="test_channel", use_container_width=True):
                 with st.spinner("📱 Channel agent analyzing platforms..."):
                     try:
-                        result = test_channel_agent(channel_product, channel_budget, channel_goal)
+                        result = agent_tests().test_channel_agent(channel_product, channel_budget, channel_goal)
                         st.markdown("### 📊 Channel Recommendations")
                         st.success("✅ Platforms Analyzed!")
                         st.markdown(result)
@@ -1414,21 +820,7 @@ def render_agent_testing_section():
     
     with col2:
         # Content Agent Testing
-        st.markdown("""
-        <div style="background: linear-gradient(135deg, #f0fdf4 0%, #bbf7d0 100%); 
-                    border-radius: 1rem; padding: 2rem; margin-bottom: 2rem;
-                    border: 2px solid #4ade80; box-shadow: 0 4px 6px -1px rgb(0 0 0 / 0.1);">
-            <div style="text-align: center; margin-bottom: 1.5rem;">
-                <span style="font-size: 3rem; display: block; margin-bottom: 1rem;">✨</span>
-                <h3 style="font-size: 1.5rem; font-weight: 700; color: #1a202c; margin-bottom: 0.5rem;">
-                    Content Agent
-                </h3>
-                <p style="color: #4b5563; font-size: 0.9rem;">
-                    Creative content generation specialist
-                </p>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
+        render_agent_test_card("content", "✨", "Content Agent", "Creative content generation specialist")
         
         with st.expander("✨ Test Content Agent", expanded=False):
             st.markdown("**Test creative content generation and copywriting**")
@@ -1449,7 +841,7 @@ def render_agent_testing_section():
             if st.button("✨ Generate Content Variations", key="test_content", use_container_width=True):
                 with st.spinner("✨ Content agent creating variations..."):
                     try:
-                        result = test_content_agent(content_product, content_audience)
+                        result = agent_tests().test_content_agent(content_product, content_audience)
                         st.markdown("### 📝 Content Results")
                         st.success("✅ Content Created!")
                         st.markdown(result)
@@ -1457,21 +849,7 @@ def render_agent_testing_section():
                         st.error(f"❌ Error: {str(e)}")
         
         # Schedule Agent Testing
-        st.markdown("""
-        <div style="background: linear-gradient(135deg, #f3e8ff 0%, #d8b4fe 100%); 
-                    border-radius: 1rem; padding: 2rem; margin-bottom: 2rem;
-                    border: 2px solid #a855f7; box-shadow: 0 4px 6px -1px rgb(0 0 0 / 0.1);">
-            <div style="text-align: center; margin-bottom: 1.5rem;">
-                <span style="font-size: 3rem; display: block; margin-bottom: 1rem;">📅</span>
-                <h3 style="font-size: 1.5rem; font-weight: 700; color: #1a202c; margin-bottom: 0.5rem;">
-                    Schedule Agent
-                </h3>
-                <p style="color: #4b5563; font-size: 0.9rem;">
-                    Timing optimization and scheduling expert
-                </p>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
+        render_agent_test_card("schedule", "📅", "Schedule Agent", "Timing optimization and scheduling expert")
         
         with st.expander("📅 Test Schedule Agent", expanded=False):
             st.markdown("**Test timing optimization and posting schedules**")
@@ -1493,7 +871,7 @@ def render_agent_testing_section():
             if st.button("📅 Create Optimal Schedule", key="test_schedule", use_container_width=True):
                 with st.spinner("📅 Schedule agent optimizing timing..."):
                     try:
-                        result = test_schedule_agent(schedule_channels, schedule_duration)
+                        result = agent_tests().test_schedule_agent(schedule_channels, schedule_duration)
                         st.markdown("### 📋 Posting Schedule")
                         st.success("✅ Schedule Optimized!")
                         st.markdown(result)
@@ -1502,77 +880,176 @@ def render_agent_testing_section():
     
     # Quick test all agents
     st.markdown("---")
-    st.markdown("""
-    <div style="text-align: center; margin: 2rem 0;">
-        <h3 style="font-size: 1.5rem; font-weight: 600; color: #1a202c;">
-            🚀 Quick Test All Agents
-        </h3>
-        <p style="color: #4b5563;">
-            Test all four agents with sample data to see the complete workflow
-        </p>
-    </div>
-    """, unsafe_allow_html=True)
+    render_section_intro(
+        "🚀 Quick Test All Agents",
+        "Test all four agents with sample data to see the complete workflow",
+        compact=True
+    )
     
     if st.button("🚀 Test All Agents with Sample Data", type="primary", use_container_width=True):
-        st.markdown("### 🤖 Testing All AI Agents...")
-        
-        # Test all agents with sample data
-        sample_product = "AI-powered fitness tracker with personalized coaching"
-        sample_goal = "Launch product and acquire 50,000 users in 6 months"
-        
-        col1, col2, col3, col4 = st.columns(4)
+        from agent_benchmark import run_benchmark
         
-        with col1:
-            st.markdown("#### 🔍 Research Agent")
-            with st.spinner("Analyzing..."):
-                try:
-                    research_result = test_research_agent(sample_product, sample_goal)
-                    st.success("✅ Complete")
-                    with st.expander("View Results"):
-                        st.markdown(research_result[:300] + "...")
-                except Exception as e:
-                    st.error(f"❌ Failed: {str(e)[:50]}...")
-        
-        with col2:
-            st.markdown("#### ✨ Content Agent")
-            with st.spinner("Creating..."):
-                try:
-                    content_result = test_content_agent(sample_product, "Tech-savvy fitness enthusiasts")
-                    st.success("✅ Complete")
-                    with st.expander("View Results"):
-                        st.markdown(content_result[:300] + "...")
-                except Exception as e:
-                    st.error(f"❌ Failed: {str(e)[:50]}...")
+        with st.spinner("🤖 Running all four agents concurrently..."):
+            rows = run_benchmark()
         
-        with col3:
-            st.markdown("#### 📱 Channel Agent")
-            with st.spinner("Selecting..."):
-                try:
-                    channel_result = test_channel_agent(sample_product, "Medium", sample_goal)
-                    st.success("✅ Complete")
-                    with st.expander("View Results"):
-                        st.markdown(channel_result[:300] + "...")
-                except Exception as e:
-                    st.error(f"❌ Failed: {str(e)[:50]}...")
+        st.markdown("### ⏱️ Benchmark Results")
+        st.dataframe(
+            [
+                {
+                    "Agent": row["agent"].title(),
+                    "Model": row["model"],
+                    "Latency (s)": round(row["latency_s"], 2),
+                    "Prompt Tokens": row["prompt_tokens"],
+                    "Completion Tokens": row["completion_tokens"],
+                    "Status": "✅ Complete" if row["ok"] else f"❌ {row['error'][:50]}"
+                }
+                for row in rows
+            ],
+            use_container_width=True
+        )
         
-        with col4:
-            st.markdown("#### 📅 Schedule Agent")
-            with st.spinner("Optimizing..."):
-                try:
-                    schedule_result = test_schedule_agent("Google Ads, Meta, LinkedIn", "6 weeks")
-                    st.success("✅ Complete")
-                    with st.expander("View Results"):
-                        st.markdown(schedule_result[:300] + "...")
-                except Exception as e:
-                    st.error(f"❌ Failed: {str(e)[:50]}...")
+        for col, row in zip(st.columns(len(rows)), rows):
+            with col:
+                with st.expander(f"View {row['agent'].title()} Results"):
+                    st.markdown(row["output"][:300] + "..." if row["ok"] else row["error"])
+    
+    render_benchmark_history()
+
+def render_benchmark_history():
+    """Daily p50/p95 agent latency from past benchmark runs, with regressions flagged"""
+    from agent_benchmark import latency_history, regressions
+    
+    history = latency_history(days=30)
+    if not history:
+        return
+    
+    st.markdown("### 📈 Agent Latency History")
+    for row in regressions():
+        if row["regressed"]:
+            st.warning(f"⚠️ {row['agent'].title()} on {row['model']}: p95 {row['p95_s']}s in the last 24h "
+                       f"vs {row['baseline_p95_s']}s over the previous week")
+    
+    import pandas as pd
+    
+    px = plotly_express()
+    df = pd.DataFrame(history)
+    df["series"] = df["agent"].str.title() + " · " + df["model"].fillna("-")
+    df = df.melt(id_vars=["day", "series"], value_vars=["p50_s", "p95_s"], var_name="percentile", value_name="seconds")
+    fig = px.line(df, x="day", y="seconds", color="series", line_dash="percentile", markers=True,
+                  title="Latency per Agent and Model (p50 solid, p95 dashed)")
+    st.plotly_chart(fig, use_container_width=True)
+
+def render_admin_panel():
+    """Render admin panel with per-session memory accounting"""
+    st.markdown("### 🛠️ Session Memory")
+    
+    report = memory_report()
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Sessions", report["session_count"])
+    with col2:
+        st.metric("Session State", f"{report['total_bytes'] / 1024 / 1024:.1f} MB")
+    with col3:
+        st.metric("Global Cap", f"{report['max_total_bytes'] / 1024 / 1024:.0f} MB")
+    with col4:
+        stats = report["eviction_stats"]
+        st.metric("Compressed / Offloaded", f"{stats['compressed']} / {stats['offloaded']}")
+    
+    if report["sessions"]:
+        st.dataframe(report["sessions"], use_container_width=True)
+    else:
+        st.info("No active sessions with tracked state")
+    
+    if st.button("🧹 Run Eviction Now", key="admin_evict"):
+        enforce_limits()
+        st.success("✅ Idle plans compressed or offloaded")
+    
+    st.markdown("### 🚦 LLM Scheduler")
+    
+    metrics = scheduler.metrics()
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Active Calls", f"{metrics['active']} / {metrics['max_concurrent']}")
+    with col2:
+        st.metric("Queued (interactive / batch)",
+                  f"{metrics['queue_depth']['interactive']} / {metrics['queue_depth']['batch']}")
+    with col3:
+        st.metric("Waiting Users", metrics["queued_tenants"])
+    
+    st.dataframe(
+        [{"class": name, **values} for name, values in metrics["classes"].items()],
+        use_container_width=True
+    )
+    
+    st.markdown("### 🎚️ Output Token Caps")
+    st.dataframe(output_caps.report(), use_container_width=True)
+    
+    st.markdown("### 📬 Job Queue")
+    stats = queue_stats()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Queued", stats["counts"].get("queued", 0))
+    with col2:
+        st.metric("Running", stats["counts"].get("running", 0))
+    with col3:
+        st.metric("Active Workers", stats["active_workers"])
+    with col4:
+        st.metric("Failed", stats["counts"].get("failed", 0))
+    
+    st.markdown("### 🧩 Prompt Prefix Cache")
+    stats = context_cache.stats()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Cached Prefixes", stats["prefixes"])
+    with col2:
+        st.metric("Prefix Bytes Saved", f"{stats['prefix_bytes_saved'] / 1024:.1f} KB")
+    with col3:
+        st.metric("Saved Ratio", f"{stats['saved_ratio']:.0%}")
+    st.caption(f"Mode: {stats['mode']} (set CONTEXT_CACHE=provider to use provider-side caching)")
+    
+    st.markdown("### 💰 Token Budgets")
+    report = usage_report()
+    st.dataframe(
+        [
+            {"Scope": scope, "Token Limit": lim["tokens"] or "∞", "Cost Limit ($)": lim["cost_usd"] or "∞"}
+            for scope, lim in report["limits"].items()
+        ],
+        use_container_width=True
+    )
+    if report["usage"]:
+        st.dataframe(report["usage"], use_container_width=True)
+    else:
+        st.caption("No usage recorded today (session and daily usage is tracked once those budgets are set)")
+    
+    st.markdown("### 🗜️ Plan Storage")
+    from plan_versions import storage_stats
+    stats = storage_stats()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Plan Versions", f"{stats['versions']} ({stats['deltas']} deltas)")
+    with col2:
+        st.metric("Stored", f"{stats['stored_bytes'] / 1024:.1f} KB of {stats['raw_bytes'] / 1024:.1f} KB")
+    with col3:
+        st.metric("Compression", f"{stats['ratio']}x" if stats["ratio"] else "–")
+    st.caption(f"Codec: {stats['codec']} (train a dictionary with python plan_versions.py --train-dict)")
 
 # =============================================================================
 # MAIN APPLICATION
 # =============================================================================
 
 def main():
+    """Main application; LLM calls made during this rerun are queued under this session"""
+    with run_context(tenant=current_session_id(), priority="interactive"):
+        render_app()
+
+def render_app():
     """Main application with modern React-like structure and tabbed interface"""
     
+    # Track this session's memory footprint
+    touch(st.session_state.to_dict())
+    
     # Load modern CSS
     load_modern_css()
     
@@ -1583,7 +1060,7 @@ def main():
     gemini_key = os.getenv("GEMINI_API_KEY")
     
     if not gemini_key:
-        st.markdown("""
+        render_html("""
         <div class="section">
             <div class="card" style="text-align: center; max-width: 600px; margin: 0 auto;">
                 <h3 style="color: var(--error-600); margin-bottom: 1rem;">🔑 API Configuration Required</h3>
@@ -1599,11 +1076,16 @@ def main():
                 </div>
             </div>
         </div>
-        """, unsafe_allow_html=True)
+        """)
         return
     
-    # Main application tabs
-    main_tab1, main_tab2 = st.tabs(["🚀 Campaign Builder", "🔬 Test AI Agents"])
+    # Main application tabs (admin tab only when CAMPAIGN_ADMIN is set)
+    show_admin = os.getenv("CAMPAIGN_ADMIN", "").lower() in ("1", "true", "yes")
+    tab_names = ["🚀 Campaign Builder", "🔬 Test AI Agents"]
+    if show_admin:
+        tab_names.append("🛠️ Admin")
+    main_tabs = st.tabs(tab_names)
+    main_tab1, main_tab2 = main_tabs[0], main_tabs[1]
     
     with main_tab1:
         # Render features section
@@ -1616,13 +1098,13 @@ def main():
         # Render agent testing section  
         render_agent_testing_section()
     
+    if show_admin:
+        with main_tabs[2]:
+            render_admin_panel()
+    
     # Footer (outside tabs)
-    st.markdown("""
-    <div style="text-align: center; padding: 3rem 2rem; background: var(--gray-800); color: white; margin-top: 4rem;">
-        <p style="font-size: 1.125rem; margin-bottom: 1rem;">🚀 <strong>AI Campaign Assistant Pro</strong></p>
-        <p style="color: #ffffff; font-weight: 600;">Powered by advanced multi-agent AI technology</p>
-    </div>
-    """, unsafe_allow_html=True)
+    render_html('<div class="app-footer"><p>🚀 <strong>AI Campaign Assistant Pro</strong></p>'
+                '<p class="tagline">Powered by advanced multi-agent AI technology</p></div>')
 
 # =============================================================================
 # RUN APPLICATION
@@ -0,0 +1,49 @@
+import time
+
+import pytest
+
+from llm_scheduler import FairScheduler
+
+
+def run_sessions(scheduler, count, tokens_used=0):
+    for i in range(count):
+        with scheduler.slot(f"session-{i}") as slot:
+            slot.tokens_used = tokens_used
+
+
+@pytest.mark.parametrize("tokens_used", [0, 500])
+def test_single_call_sessions_are_forgotten(tokens_used):
+    scheduler = FairScheduler(max_concurrent=2)
+    run_sessions(scheduler, 50, tokens_used)
+    assert len(scheduler._tenants) == 0
+
+
+def test_quota_tenants_are_forgotten_once_their_window_expires():
+    scheduler = FairScheduler(max_concurrent=2, tokens_per_min=1000, quota_window_s=0.05)
+    run_sessions(scheduler, 50, tokens_used=100)
+    assert len(scheduler._tenants) == 50
+    time.sleep(0.1)
+    scheduler._swept_at = 0.0
+    assert scheduler.metrics()["tracked_tenants"] == 0
+
+
+def test_aborted_request_forgets_its_tenant():
+    scheduler = FairScheduler(max_concurrent=1)
+    holder = scheduler.acquire("busy")
+
+    def abort():
+        raise TimeoutError("gave up")
+
+    with pytest.raises(TimeoutError):
+        scheduler.acquire("impatient", abort_check=abort)
+    scheduler.release(holder)
+    assert len(scheduler._tenants) == 0
+
+
+def test_returning_tenant_starts_at_virtual_time():
+    scheduler = FairScheduler(max_concurrent=1)
+    holder = scheduler.acquire("busy", cost=10)
+    scheduler.release(holder)
+    request = scheduler.acquire("returning")
+    assert request.start_tag == scheduler._virtual_time
+    scheduler.release(request)
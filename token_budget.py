@@ -0,0 +1,201 @@
+import os
+import time
+import threading
+from datetime import datetime
+
+from campaign_store import get_connection
+
+
+# USD per million (prompt, completion) tokens
+MODEL_PRICES = {
+    "gemini/gemini-1.5-flash": (0.075, 0.30),
+    "gemini/gemini-pro": (0.50, 1.50),
+    "gemini/gemini-1.5-pro": (1.25, 5.00)
+}
+DEFAULT_PRICE = (0.50, 1.50)
+
+
+def _limit(name):
+    return float(os.getenv(name, "0") or 0)
+
+
+# (tokens, USD) per scope; 0 = unlimited
+LIMITS = {
+    "campaign": (_limit("CAMPAIGN_TOKEN_BUDGET"), _limit("CAMPAIGN_COST_BUDGET_USD")),
+    "session": (_limit("SESSION_TOKEN_BUDGET"), _limit("SESSION_COST_BUDGET_USD")),
+    "day": (_limit("DAILY_TOKEN_BUDGET"), _limit("DAILY_COST_BUDGET_USD"))
+}
+
+# Share of a budget (including the next call) at which calls go to a cheaper model, then get shorter
+DOWNGRADE_AT = float(os.getenv("BUDGET_DOWNGRADE_AT", "0.8"))
+SHORTEN_AT = float(os.getenv("BUDGET_SHORTEN_AT", "0.95"))
+SHORT_MAX_TOKENS = 200
+# Completion tokens assumed for a call without a max_tokens cap
+EXPECTED_COMPLETION_TOKENS = 500
+
+
+class BudgetExceeded(Exception):
+    """Raised before an LLM call once a campaign, session or daily budget is used up"""
+
+    def __init__(self, scope, used, limit):
+        super().__init__(f"{scope.title()} budget exhausted ({used} of {limit})")
+        self.scope = scope
+
+
+def cost_usd(model, prompt_tokens, completion_tokens):
+    prompt_price, completion_price = MODEL_PRICES.get(model, DEFAULT_PRICE)
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1e6
+
+
+def cheaper_model(model, candidates):
+    """Cheapest candidate priced below model (None if model isn't one of them or is already cheapest)"""
+    if model not in candidates:
+        return None
+    price = sum(MODEL_PRICES.get(model, DEFAULT_PRICE))
+    cheaper = [m for m in candidates if sum(MODEL_PRICES.get(m, DEFAULT_PRICE)) < price]
+    return min(cheaper, key=lambda m: sum(MODEL_PRICES.get(m, DEFAULT_PRICE))) if cheaper else None
+
+
+def fallback_models():
+    # campaign_assistant owns the model list; imported lazily to avoid an import cycle
+    from campaign_assistant import model_options
+    return model_options
+
+
+def today():
+    return datetime.now().strftime("%Y-%m-%d")
+
+
+def stored_usage(scope, key, day=None):
+    """(tokens, cost) charged to a session or day scope, shared by every process on this store"""
+    conn = get_connection()
+    try:
+        row = conn.execute(
+            "SELECT tokens, cost_usd FROM token_usage WHERE day = ? AND scope = ? AND key = ?",
+            (day or today(), scope, key)
+        ).fetchone()
+        return (row["tokens"], row["cost_usd"]) if row else (0, 0.0)
+    finally:
+        conn.close()
+
+
+def _charge_stored(scopes, tokens, cost):
+    conn = get_connection()
+    try:
+        for scope, key in scopes:
+            conn.execute(
+                "INSERT INTO token_usage (day, scope, key, tokens, cost_usd, updated_at) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (day, scope, key) DO UPDATE SET tokens = tokens + excluded.tokens, "
+                "cost_usd = cost_usd + excluded.cost_usd, updated_at = excluded.updated_at",
+                (today(), scope, key, tokens, cost, time.time())
+            )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+class Budget:
+    """
+    Token and cost limits for one campaign plus its session's and today's totals.
+    plan_call runs before each LLM call: it raises BudgetExceeded when a scope is used up and
+    otherwise returns overrides that downgrade the model or shorten the output as a scope
+    nears its limit. charge records what the call used.
+    """
+
+    def __init__(self, session="default", limits=None, models=None, campaign=True):
+        limits = dict(limits or LIMITS)
+        if not campaign:
+            limits.pop("campaign", None)
+        self.limits = {scope: lim for scope, lim in limits.items() if lim[0] or lim[1]}
+        self.session = session
+        self._models = models
+        self._lock = threading.Lock()
+        self.tokens = 0
+        self.cost_usd = 0.0
+        self.downgraded_calls = 0
+        self.shortened_calls = 0
+        self.exceeded = None
+
+    @property
+    def enabled(self):
+        return bool(self.limits)
+
+    def _used(self, scope):
+        if scope == "campaign":
+            return self.tokens, self.cost_usd
+        return stored_usage(scope, self.session if scope == "session" else "all")
+
+    def plan_call(self, model, prompt_tokens, max_tokens=None):
+        """Overrides for the next call ({} when comfortably within budget)"""
+        if not self.enabled:
+            return {}
+        completion = max_tokens or EXPECTED_COMPLETION_TOKENS
+        next_cost = cost_usd(model, prompt_tokens, completion)
+        pressure = 0.0
+        for scope, (token_limit, cost_limit) in self.limits.items():
+            tokens, cost = self._used(scope)
+            if (token_limit and tokens >= token_limit) or (cost_limit and cost >= cost_limit):
+                self.exceeded = scope
+                raise BudgetExceeded(scope, f"{tokens} tokens, ${cost:.4f}",
+                                     f"{token_limit:g} tokens" if token_limit else f"${cost_limit:g}")
+            if token_limit:
+                pressure = max(pressure, (tokens + prompt_tokens + completion) / token_limit)
+            if cost_limit:
+                pressure = max(pressure, (cost + next_cost) / cost_limit)
+
+        overrides = {}
+        if pressure >= DOWNGRADE_AT:
+            cheaper = cheaper_model(model, self._models if self._models is not None else fallback_models())
+            if cheaper:
+                overrides["model"] = cheaper
+        if pressure >= SHORTEN_AT or (pressure >= DOWNGRADE_AT and "model" not in overrides):
+            overrides["max_tokens"] = min(max_tokens or SHORT_MAX_TOKENS, SHORT_MAX_TOKENS)
+        with self._lock:
+            self.downgraded_calls += int("model" in overrides)
+            self.shortened_calls += int("max_tokens" in overrides)
+        return overrides
+
+    def charge(self, model, prompt_tokens, completion_tokens):
+        if not self.enabled:
+            return
+        tokens = prompt_tokens + completion_tokens
+        cost = cost_usd(model, prompt_tokens, completion_tokens)
+        with self._lock:
+            self.tokens += tokens
+            self.cost_usd += cost
+        scopes = [(scope, self.session if scope == "session" else "all")
+                  for scope in ("session", "day") if scope in self.limits]
+        if scopes:
+            _charge_stored(scopes, tokens, cost)
+
+    def report(self):
+        with self._lock:
+            return {
+                "tokens": self.tokens,
+                "cost_usd": round(self.cost_usd, 6),
+                "limits": {scope: {"tokens": lim[0], "cost_usd": lim[1]} for scope, lim in self.limits.items()},
+                "downgraded_calls": self.downgraded_calls,
+                "shortened_calls": self.shortened_calls,
+                "exceeded": self.exceeded
+            }
+
+
+def session_budget(session):
+    """Budget for an LLM call outside a campaign (agent tests, benchmarks): session and day scopes only"""
+    return Budget(session, campaign=False)
+
+
+def usage_report(day=None):
+    """Today's daily total and per-session usage against the configured limits"""
+    conn = get_connection()
+    try:
+        rows = conn.execute(
+            "SELECT scope, key, tokens, cost_usd FROM token_usage WHERE day = ? ORDER BY tokens DESC",
+            (day or today(),)
+        ).fetchall()
+    finally:
+        conn.close()
+    return {
+        "limits": {scope: {"tokens": lim[0], "cost_usd": lim[1]} for scope, lim in LIMITS.items()},
+        "usage": [dict(row) for row in rows]
+    }
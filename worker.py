@@ -0,0 +1,113 @@
+import os
+import signal
+import socket
+import argparse
+import threading
+import contextvars
+
+from job_queue import (claim, heartbeat, complete, fail, release, mark_cancelled, reclaim_expired,
+                       DEFAULT_LEASE_S)
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class Worker:
+    """
+    Pulls campaign jobs from the shared queue and runs generate_campaign_plan.
+    The lease is renewed every lease_s / 3 while a job runs; if the lease is lost or
+    cancellation is requested, the generation is cancelled at its next checkpoint.
+    """
+
+    def __init__(self, worker_id=None, lease_s=DEFAULT_LEASE_S, poll_s=2.0):
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_s = lease_s
+        self.poll_s = poll_s
+        self.stopping = threading.Event()
+
+    def stop(self, *_):
+        print(f"🛑 Worker {self.worker_id} stopping")
+        self.stopping.set()
+
+    def run_job(self, job):
+        from campaign_assistant import generate_campaign_plan
+        from llm_runtime import CancellationToken, run_context
+
+        payload = dict(job["payload"])
+        tenant = payload.pop("tenant", "queue")
+        priority = payload.pop("priority", "batch")
+        cancel_token = CancellationToken()
+        outcome = {}
+
+        def target():
+            try:
+                outcome["result"] = generate_campaign_plan(cancel_token=cancel_token, **payload)
+            except Exception as e:
+                outcome["error"] = e
+
+        # LLM calls are scheduled under the submitting user, as if run in the web tier
+        with run_context(tenant=tenant, priority=priority):
+            job_ctx = contextvars.copy_context()
+        thread = threading.Thread(target=job_ctx.run, args=(target,), daemon=True)
+        thread.start()
+
+        while thread.is_alive():
+            thread.join(self.lease_s / 3)
+            if not thread.is_alive():
+                break
+            lease_state = heartbeat(job["id"], self.worker_id, self.lease_s)
+            if lease_state == "lost":
+                cancel_token.cancel("lease lost")
+            elif lease_state == "cancel":
+                cancel_token.cancel("cancelled by user")
+            elif self.stopping.is_set():
+                cancel_token.cancel("worker shutting down")
+
+        result = outcome.get("result")
+        if result and result.get("success"):
+            # Even if the lease was lost meanwhile: the first result written wins
+            written = complete(job["id"], result)
+            print(f"✅ Job {job['id']} done" + ("" if written else " (result already written, ignored)"))
+        elif cancel_token.cancelled:
+            if cancel_token.reason == "worker shutting down":
+                release(job["id"], self.worker_id)
+            elif cancel_token.reason == "cancelled by user":
+                mark_cancelled(job["id"])
+            print(f"⏹️ Job {job['id']} {cancel_token.reason}")
+        else:
+            error = outcome.get("error") or (result or {}).get("error", "unknown error")
+            fail(job["id"], self.worker_id, error)
+            print(f"❌ Job {job['id']} failed: {str(error)[:100]}")
+
+    def run(self, max_jobs=None):
+        processed = 0
+        print(f"👷 Worker {self.worker_id} polling for jobs (lease {self.lease_s:g}s)")
+        while not self.stopping.is_set():
+            reclaimed = reclaim_expired()
+            if reclaimed:
+                print(f"♻️ Reclaimed {reclaimed} job(s) with expired leases")
+            job = claim(self.worker_id, self.lease_s)
+            if job is None:
+                self.stopping.wait(self.poll_s)
+                continue
+            print(f"📥 Claimed job {job['id']} (attempt {job['attempts']}/{job['max_attempts']})")
+            self.run_job(job)
+            processed += 1
+            if max_jobs and processed >= max_jobs:
+                break
+        return processed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a campaign generation worker against the shared job queue")
+    parser.add_argument("--worker-id", default=None, help="Unique worker name (default host-pid)")
+    parser.add_argument("--lease", type=float, default=DEFAULT_LEASE_S, help="Lease length in seconds")
+    parser.add_argument("--poll", type=float, default=2.0, help="Seconds between polls of an empty queue")
+    parser.add_argument("--max-jobs", type=int, default=None, help="Exit after this many jobs")
+    args = parser.parse_args()
+
+    worker = Worker(args.worker_id, args.lease, args.poll)
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    worker.run(args.max_jobs)